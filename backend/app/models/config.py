@@ -15,13 +15,46 @@ class Settings(BaseSettings):
     max_tokens: int = 4000  # Increased for full code responses
     temperature: float = 0.7
     github_token: Optional[str] = None
+    github_bulk_fetch_threshold: int = 50  # Download the repository tarball instead of per-file requests above this many files
+    local_repository_root: Optional[str] = None  # Read owner/repo from local mirrors under this directory instead of GitHub
     log_level: str = "INFO"
     enable_bedrock: bool = True  # Enable Bedrock for AI analysis
+    bedrock_max_concurrency: int = 4  # Bedrock calls in flight at once across the process; further calls wait their turn
+    bedrock_requests_per_minute: int = 50  # Account quota for the model; calls are paced below it and slow down on throttling (0 = no limit)
+    bedrock_tokens_per_minute: int = 200_000  # Token quota for the model (prompt estimated at 4 chars per token, plus max_tokens; 0 = no limit)
     
     # DynamoDB Configuration
     dynamodb_endpoint_url: Optional[str] = None # Set to "http://localhost:1234" for local DynamoDB
     use_local_dynamodb: bool = False # Set to True to use local DynamoDB
     
+    # Persistent cache for API indexes (defaults to a SQLite file in the temp directory)
+    cache_backend: str = "sqlite"  # "sqlite" (single server) or "dynamodb" (shared across instances)
+    cache_db_path: Optional[str] = None
+    cache_table_name: str = "report-analysis-cache"  # DynamoDB table used when cache_backend is "dynamodb"
+    
+    # API discovery pipeline
+    discovery_fetch_concurrency: int = 16  # Concurrent file downloads
+    discovery_extract_workers: int = 0  # Extraction processes (0 = one per CPU)
+    discovery_queue_size: int = 32  # Downloaded files waiting for extraction before downloads pause
+    discovery_time_budget_seconds: float = 300.0  # Stop starting new files after this long (0 = no limit)
+    discovery_byte_budget: int = 256 * 1024 * 1024  # Stop starting new files after scanning this much source (0 = no limit)
+    discovery_file_time_budget_seconds: float = 10.0  # Give up on a single file's route scan after this long (0 = no limit)
+    discovery_detail_cache_bytes: int = 64 * 1024 * 1024  # Scanned source kept for computing API snippets and metrics on demand
+    
+    # Full repository analysis: files fetched and reviewed at once, halved when Bedrock throttles and regrown by one
+    full_analysis_concurrency: int = 8
+    full_analysis_throttle_retries: int = 3  # Retries of a throttled file review before using fallback suggestions
+    
+    # Performance API to source API matching
+    matcher_batch_min_pairs: int = 250_000  # Rank routes with a TF-IDF similarity matrix from this many labels x routes (0 = never)
+    matcher_batch_top_k: int = 25  # Word-related routes fully scored per label in batch mode
+    matcher_cache_entries: int = 20000  # Best matches kept per (route list, label), least recently used dropped first (0 = no cache)
+    matcher_cache_ttl_seconds: float = 7 * 24 * 3600  # Persisted matches of a route list expire after this long
+    
+    # Bedrock answers cached per (model, temperature, max_tokens, prompt); requests with cache=bypass regenerate them
+    bedrock_cache_entries: int = 500  # Answers kept in memory, least recently used dropped first (0 = no cache)
+    bedrock_cache_ttl_seconds: float = 7 * 24 * 3600  # Cached answers (in memory and in the cache store) expire after this long
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,8 +1,8 @@
 """
 Enhanced data models for API improvement analysis.
 """
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Callable
+from pydantic import BaseModel, Field, PrivateAttr, computed_field
 from enum import Enum
 
 
@@ -116,17 +116,102 @@ class DetailedAnalysisResult(BaseModel):
     line_number: Optional[int] = None
 
 
+# Details of a DiscoveredAPI that are computed from its source on first access, with their fallbacks
+API_DETAIL_DEFAULTS = {
+    'complexity_score': 0.0,
+    'potential_issues': [],
+    'risk_level': SeverityLevel.LOW,
+    'code_snippet': '',
+}
+
+
 class DiscoveredAPI(BaseModel):
-    """API discovered in source code."""
+    """API discovered in source code.
+    
+    Discovery only records where an API is. The code snippet, complexity, potential issues and
+    risk level are either passed in or computed by the bound detail loader when first read.
+    """
     endpoint: str
     file_path: str
     function_name: str
     framework: str
-    complexity_score: float
-    potential_issues: List[str]
-    risk_level: SeverityLevel
-    code_snippet: str
     line_number: Optional[int] = None
+    end_line_number: Optional[int] = None  # Last line of the handler, when a parser knows it
+    blob_sha: Optional[str] = None  # Git blob the API was found in
+    
+    _details: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    _detail_loader: Optional[Callable[['DiscoveredAPI'], Dict[str, Any]]] = PrivateAttr(default=None)
+    
+    def __init__(self, **data):
+        details = {name: data.pop(name) for name in API_DETAIL_DEFAULTS if name in data}
+        super().__init__(**data)
+        for name, value in details.items():
+            if value is not None:
+                setattr(self, name, value)
+    
+    def bind_detail_loader(self, loader: Callable[['DiscoveredAPI'], Dict[str, Any]]):
+        """Set the function that computes the details not passed in, called at most once."""
+        self._detail_loader = loader
+    
+    def load_details(self) -> 'DiscoveredAPI':
+        """Compute the details now (the loader may fetch the source), e.g. in a worker thread before an event loop reads them."""
+        self._detail('code_snippet')
+        return self
+    
+    def _detail(self, name: str) -> Any:
+        if name not in self._details:
+            if self._detail_loader is None:
+                # Not kept: a loader bound later (discovery binds one per file) still computes the real value
+                default = API_DETAIL_DEFAULTS[name]
+                return list(default) if isinstance(default, list) else default
+            loaded = self._detail_loader(self)
+            for field, default in API_DETAIL_DEFAULTS.items():
+                if field not in self._details:
+                    self._details[field] = loaded.get(field, list(default) if isinstance(default, list) else default)
+        return self._details[name]
+    
+    @computed_field
+    @property
+    def complexity_score(self) -> float:
+        return self._detail('complexity_score')
+    
+    @complexity_score.setter
+    def complexity_score(self, value: float):
+        self._details['complexity_score'] = float(value)
+    
+    @computed_field
+    @property
+    def potential_issues(self) -> List[str]:
+        return self._detail('potential_issues')
+    
+    @potential_issues.setter
+    def potential_issues(self, value: List[str]):
+        self._details['potential_issues'] = list(value)
+    
+    @computed_field
+    @property
+    def risk_level(self) -> SeverityLevel:
+        return self._detail('risk_level')
+    
+    @risk_level.setter
+    def risk_level(self, value: SeverityLevel):
+        self._details['risk_level'] = SeverityLevel(value)
+    
+    @computed_field
+    @property
+    def code_snippet(self) -> str:
+        return self._detail('code_snippet')
+    
+    @code_snippet.setter
+    def code_snippet(self, value: str):
+        self._details['code_snippet'] = value
+    
+    def to_index_dict(self) -> Dict[str, Any]:
+        """Serialize the location and any details already computed, without computing the others."""
+        data = self.model_dump(exclude=set(API_DETAIL_DEFAULTS))
+        for name, value in self._details.items():
+            data[name] = value.value if isinstance(value, SeverityLevel) else value
+        return data
 
 
 class ProactiveRecommendation(BaseModel):
@@ -2,6 +2,7 @@
 AI-powered recommendation engine using AWS Bedrock for code analysis and suggestions.
 """
 import json
+import asyncio
 import logging
 import re
 from difflib import SequenceMatcher
@@ -21,9 +22,10 @@ logger = logging.getLogger(__name__)
 class AIGitHubAnalyzer:
     """AI-powered analyzer for GitHub repositories and API performance."""
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, bedrock_service: Optional[BedrockService] = None):
         self.settings = settings
-        self.bedrock_service = BedrockService(settings)
+        # Share the application's service (and its response cache) when given one
+        self.bedrock_service = bedrock_service or BedrockService(settings)
         self.diff_analyzer = DiffAnalyzer()
     
     def analyze_matched_apis(self, matched_apis: List[DetailedAnalysisResult]) -> List[DetailedAnalysisResult]:
@@ -31,41 +33,47 @@ class AIGitHubAnalyzer:
         detailed_results = []
         
         for match in matched_apis:
-            # Extract performance API and source API from the match
-            performance_api = match.performance_metrics
-            confidence = match.match_confidence
-            
-            # Create a mock source API for compatibility
-            mock_source_api = DiscoveredAPI(
-                endpoint=match.api_endpoint,
-                file_path=getattr(match, 'file_path', 'unknown'),
-                function_name=getattr(match, 'function_name', 'unknown'),
-                framework=getattr(match, 'framework', 'unknown'),
-                complexity_score=getattr(match, 'complexity_score', 0.0),
-                potential_issues=getattr(match, 'potential_issues', []),
-                risk_level=getattr(match, 'risk_level', 'MEDIUM'),
-                code_snippet=getattr(match, 'code_snippet', '')
-            )
-            
             # Generate AI analysis
-            ai_analysis = self._generate_ai_analysis(performance_api, mock_source_api)
-            
-            # Create detailed analysis result with enhanced formatting
-            detailed_result = DetailedAnalysisResult(
-                api_endpoint=performance_api.endpoint,
-                match_confidence=confidence,
-                performance_metrics=performance_api,
-                analysis=ai_analysis,
-                root_causes=self._extract_root_causes(ai_analysis),
-                code_quality_issues=self._extract_code_quality_issues(ai_analysis),
-                improvements=self._extract_improvements(ai_analysis),
-                implementation_plan=self._create_implementation_plan(ai_analysis)
-            )
-            
-            detailed_results.append(detailed_result)
+            ai_analysis = self._generate_ai_analysis(match.performance_metrics, self._source_api_of(match))
+            detailed_results.append(self._detailed_result(match, ai_analysis))
         
         return detailed_results
     
+    async def aanalyze_matched_apis(self, matched_apis: List[DetailedAnalysisResult]) -> List[DetailedAnalysisResult]:
+        """Async analyze_matched_apis: the APIs are analyzed concurrently (up to Bedrock's in-flight limit), in order."""
+        analyses = await asyncio.gather(*(
+            self._agenerate_ai_analysis(match.performance_metrics, self._source_api_of(match)) for match in matched_apis
+        ))
+        return [self._detailed_result(match, ai_analysis) for match, ai_analysis in zip(matched_apis, analyses)]
+    
+    @staticmethod
+    def _source_api_of(match: DetailedAnalysisResult) -> DiscoveredAPI:
+        """Create a mock source API from a match, for compatibility."""
+        return DiscoveredAPI(
+            endpoint=match.api_endpoint,
+            file_path=getattr(match, 'file_path', 'unknown'),
+            function_name=getattr(match, 'function_name', 'unknown'),
+            framework=getattr(match, 'framework', 'unknown'),
+            complexity_score=getattr(match, 'complexity_score', 0.0),
+            potential_issues=getattr(match, 'potential_issues', []),
+            risk_level=getattr(match, 'risk_level', 'MEDIUM'),
+            code_snippet=getattr(match, 'code_snippet', '')
+        )
+    
+    def _detailed_result(self, match: DetailedAnalysisResult, ai_analysis: Dict[str, Any]) -> DetailedAnalysisResult:
+        """Create detailed analysis result with enhanced formatting."""
+        performance_api = match.performance_metrics
+        return DetailedAnalysisResult(
+            api_endpoint=performance_api.endpoint,
+            match_confidence=match.match_confidence,
+            performance_metrics=performance_api,
+            analysis=ai_analysis,
+            root_causes=self._extract_root_causes(ai_analysis),
+            code_quality_issues=self._extract_code_quality_issues(ai_analysis),
+            improvements=self._extract_improvements(ai_analysis),
+            implementation_plan=self._create_implementation_plan(ai_analysis)
+        )
+    
     def generate_diff_analysis(self, improvements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Generate diff analysis for code improvements."""
         return self.diff_analyzer.generate_improvement_diffs(improvements)
@@ -77,28 +85,59 @@ class AIGitHubAnalyzer:
     def _generate_ai_analysis(self, performance_api: APIPerformanceProfile, source_api: DiscoveredAPI) -> Dict[str, Any]:
         """Generate AI analysis for the API."""
         try:
-            # Log the code snippet being analyzed
-            logger.info(f"Generating AI analysis for API: {performance_api.endpoint}")
-            logger.info(f"Code snippet length: {len(source_api.code_snippet)} chars")
-            logger.info(f"Framework: {source_api.framework}, File: {source_api.file_path}")
-            
-            # Validate code snippet quality
-            code_snippet = source_api.code_snippet or ""
-            if not code_snippet or len(code_snippet.strip()) == 0:
-                logger.warning(f"Empty code snippet for {performance_api.endpoint} - cannot generate meaningful suggestions")
+            prompt = self._analysis_prompt(performance_api, source_api)
+            if prompt is None:
                 return {"improvements": []}
-            
-            # Check if code snippet looks complete (has function definition)
-            has_function_def = bool(re.search(r'\b(def|async def|function|const\s+\w+\s*=\s*(\(|function)|export\s+(function|const)|public\s+\w+\s+\w+\s*\()', code_snippet, re.IGNORECASE))
-            if not has_function_def and len(code_snippet.strip()) < 200:
-                logger.warning(f"Code snippet appears incomplete for {performance_api.endpoint} ({len(code_snippet)} chars, no function def found)")
-                # Still try to use it, but log the issue
-            
-            # Escape JSON special characters in code snippet for prompt
-            escaped_code = code_snippet.replace('{', '{{').replace('}', '}}')
-            
-            # Create a comprehensive prompt for code quality improvements
-            prompt = f"""Analyze this API function and provide ONE specific performance improvement with complete corrected code.
+            try:
+                response = self.bedrock_service.generate_summary_from_prompt(prompt)
+            except RuntimeError as bedrock_error:
+                return self._bedrock_failure(performance_api, bedrock_error)
+            return self._parse_ai_analysis(performance_api, response)
+        except Exception as e:
+            logger.error(f"❌ Unexpected error generating AI analysis for {performance_api.endpoint}: {type(e).__name__}: {e}", exc_info=True)
+            logger.warning(f"Unexpected error for {performance_api.endpoint} - no suggestions available")
+            return {"improvements": []}
+
+    async def _agenerate_ai_analysis(self, performance_api: APIPerformanceProfile, source_api: DiscoveredAPI) -> Dict[str, Any]:
+        """Async _generate_ai_analysis, awaiting the model call."""
+        try:
+            prompt = self._analysis_prompt(performance_api, source_api)
+            if prompt is None:
+                return {"improvements": []}
+            try:
+                response = await self.bedrock_service.agenerate_summary_from_prompt(prompt)
+            except RuntimeError as bedrock_error:
+                return self._bedrock_failure(performance_api, bedrock_error)
+            return self._parse_ai_analysis(performance_api, response)
+        except Exception as e:
+            logger.error(f"❌ Unexpected error generating AI analysis for {performance_api.endpoint}: {type(e).__name__}: {e}", exc_info=True)
+            logger.warning(f"Unexpected error for {performance_api.endpoint} - no suggestions available")
+            return {"improvements": []}
+
+    def _analysis_prompt(self, performance_api: APIPerformanceProfile, source_api: DiscoveredAPI) -> Optional[str]:
+        """Build the improvement prompt for an API, or None if there is no code to analyze."""
+        # Log the code snippet being analyzed
+        logger.info(f"Generating AI analysis for API: {performance_api.endpoint}")
+        logger.info(f"Code snippet length: {len(source_api.code_snippet)} chars")
+        logger.info(f"Framework: {source_api.framework}, File: {source_api.file_path}")
+        
+        # Validate code snippet quality
+        code_snippet = source_api.code_snippet or ""
+        if not code_snippet or len(code_snippet.strip()) == 0:
+            logger.warning(f"Empty code snippet for {performance_api.endpoint} - cannot generate meaningful suggestions")
+            return None
+        
+        # Check if code snippet looks complete (has function definition)
+        has_function_def = bool(re.search(r'\b(def|async def|function|const\s+\w+\s*=\s*(\(|function)|export\s+(function|const)|public\s+\w+\s+\w+\s*\()', code_snippet, re.IGNORECASE))
+        if not has_function_def and len(code_snippet.strip()) < 200:
+            logger.warning(f"Code snippet appears incomplete for {performance_api.endpoint} ({len(code_snippet)} chars, no function def found)")
+            # Still try to use it, but log the issue
+        
+        # Escape JSON special characters in code snippet for prompt
+        escaped_code = code_snippet.replace('{', '{{').replace('}', '}}')
+        
+        # Create a comprehensive prompt for code quality improvements
+        prompt = f"""Analyze this API function and provide ONE specific performance improvement with complete corrected code.
 
 PERFORMANCE ISSUES:
 - Response Time: {performance_api.avg_response_time_ms}ms (SLOW - needs optimization)
@@ -131,109 +170,106 @@ RETURN ONLY THIS JSON (no markdown, no explanations):
 }}
 
 CRITICAL: Return ONLY valid JSON. improved_code must show the actual optimized function implementation."""
-            
+        return prompt
+
+    def _bedrock_failure(self, performance_api: APIPerformanceProfile, bedrock_error: Exception) -> Dict[str, Any]:
+        """Log a failed Bedrock call for an API and return an analysis without suggestions."""
+        # Bedrock failed - log detailed error and return empty
+        logger.error(
+            f"❌ BEDROCK FAILED for {performance_api.endpoint}: {bedrock_error}",
+            exc_info=True
+        )
+        logger.error(
+            f"Bedrock error details for {performance_api.endpoint}:\n"
+            f"  - Error: {bedrock_error}\n"
+            f"  - Check CloudWatch logs for full stack trace\n"
+            f"  - Verify Lambda IAM role has bedrock:InvokeModel permission\n"
+            f"  - Verify Bedrock model access is enabled in AWS console\n"
+            f"  - Check ENABLE_BEDROCK environment variable is 'true'\n"
+            f"  - Verify region {self.settings.aws_region} supports Bedrock"
+        )
+        return {"improvements": []}
+
+    def _parse_ai_analysis(self, performance_api: APIPerformanceProfile, response: str) -> Dict[str, Any]:
+        """Parse and filter the model's improvement suggestions for an API."""
+        if response and response.strip():
             try:
-                response = self.bedrock_service.generate_summary_from_prompt(prompt)
-            except RuntimeError as bedrock_error:
-                # Bedrock failed - log detailed error and return empty
-                logger.error(
-                    f"❌ BEDROCK FAILED for {performance_api.endpoint}: {bedrock_error}",
-                    exc_info=True
-                )
-                logger.error(
-                    f"Bedrock error details for {performance_api.endpoint}:\n"
-                    f"  - Error: {bedrock_error}\n"
-                    f"  - Check CloudWatch logs for full stack trace\n"
-                    f"  - Verify Lambda IAM role has bedrock:InvokeModel permission\n"
-                    f"  - Verify Bedrock model access is enabled in AWS console\n"
-                    f"  - Check ENABLE_BEDROCK environment variable is 'true'\n"
-                    f"  - Verify region {self.settings.aws_region} supports Bedrock"
-                )
-                return {"improvements": []}
-            
-            if response and response.strip():
-                try:
-                    # Use the robust JSON parser to handle malformed responses
-                    logger.debug(f"Raw AI response for {performance_api.endpoint}: {response[:200]}...")
-                    
-                    # Parse using the improved JSON parser
-                    analysis = parse_ai_json_response(response)
-                    
-                    # Validate the structure
-                    if not isinstance(analysis, dict):
-                        raise ValueError("AI response is not a dictionary")
-                    
-                    # Ensure required keys exist with simplified structure
-                    if 'improvements' not in analysis:
-                        analysis['improvements'] = []
+                # Use the robust JSON parser to handle malformed responses
+                logger.debug(f"Raw AI response for {performance_api.endpoint}: {response[:200]}...")
+                
+                # Parse using the improved JSON parser
+                analysis = parse_ai_json_response(response)
+                
+                # Validate the structure
+                if not isinstance(analysis, dict):
+                    raise ValueError("AI response is not a dictionary")
+                
+                # Ensure required keys exist with simplified structure
+                if 'improvements' not in analysis:
+                    analysis['improvements'] = []
+                
+                # Convert improvements to expected format and filter trivial ones
+                improvements = analysis.get('improvements', [])
+                converted_improvements = []
+                
+                for imp in improvements:
+                    current_code = imp.get('current_code', '').strip()
+                    improved_code = imp.get('improved_code', '').strip()
                     
-                    # Convert improvements to expected format and filter trivial ones
-                    improvements = analysis.get('improvements', [])
-                    converted_improvements = []
+                    # Validate that we have both codes
+                    if not current_code or not improved_code:
+                        logger.warning(f"Suggestion missing code for {performance_api.endpoint}")
+                        continue
                     
-                    for imp in improvements:
-                        current_code = imp.get('current_code', '').strip()
-                        improved_code = imp.get('improved_code', '').strip()
-                        
-                        # Validate that we have both codes
-                        if not current_code or not improved_code:
-                            logger.warning(f"Suggestion missing code for {performance_api.endpoint}")
-                            continue
-                        
-                        # Remove import statements from improved_code
-                        improved_code_clean = self._remove_imports(improved_code)
-                        
-                        # Also remove imports from current_code for fair comparison
-                        current_code_clean = self._remove_imports(current_code)
-                        
-                        # Filter out trivial suggestions (just imports, comments, or minimal changes)
-                        if self._is_trivial_suggestion(current_code_clean, improved_code_clean):
-                            logger.warning(f"Skipping trivial suggestion for {performance_api.endpoint}: only imports/comments/minor changes")
-                            continue
-                        
-                        # Validate that improved_code has the function definition
-                        if not re.search(r'\b(def|async def|function|@router\.|@app\.)', improved_code_clean, re.IGNORECASE):
-                            logger.warning(f"Improved code missing function definition for {performance_api.endpoint}")
-                            continue
-                        
-                        converted_improvements.append({
-                            'priority': 'HIGH',
-                            'category': 'code_quality',
-                            'title': imp.get('title', 'Code Improvement'),
-                            'description': imp.get('description', ''),
-                            'current_code': current_code_clean,
-                            'improved_code': improved_code_clean,
-                            'expected_improvement': imp.get('expected_improvement', '')
-                        })
+                    # Remove import statements from improved_code
+                    improved_code_clean = self._remove_imports(improved_code)
                     
-                    # If all suggestions were filtered out, return empty
-                    if not converted_improvements:
-                        logger.warning(f"All AI suggestions were filtered out for {performance_api.endpoint} - no valid suggestions available")
-                        return {"improvements": []}
+                    # Also remove imports from current_code for fair comparison
+                    current_code_clean = self._remove_imports(current_code)
                     
-                    analysis['improvements'] = converted_improvements
-                    analysis['root_causes'] = []  # Not needed
-                    analysis['code_quality_issues'] = []  # Not needed
+                    # Filter out trivial suggestions (just imports, comments, or minimal changes)
+                    if self._is_trivial_suggestion(current_code_clean, improved_code_clean):
+                        logger.warning(f"Skipping trivial suggestion for {performance_api.endpoint}: only imports/comments/minor changes")
+                        continue
                     
-                    logger.info(f"✅ Successfully parsed AI analysis with {len(improvements)} improvements from Bedrock")
-                    return analysis
+                    # Validate that improved_code has the function definition
+                    if not re.search(r'\b(def|async def|function|@router\.|@app\.)', improved_code_clean, re.IGNORECASE):
+                        logger.warning(f"Improved code missing function definition for {performance_api.endpoint}")
+                        continue
                     
-                except json.JSONDecodeError as je:
-                    logger.error(f"JSON decode error for {performance_api.endpoint}: {je}")
-                    logger.debug(f"Response preview: {response[:500]}")
-                    logger.warning(f"Bedrock returned invalid JSON for {performance_api.endpoint} - no suggestions available")
-                    return {"improvements": []}
-                except Exception as e:
-                    logger.error(f"Error parsing AI response for {performance_api.endpoint}: {e}")
-                    logger.warning(f"Failed to parse Bedrock response for {performance_api.endpoint} - no suggestions available")
+                    converted_improvements.append({
+                        'priority': 'HIGH',
+                        'category': 'code_quality',
+                        'title': imp.get('title', 'Code Improvement'),
+                        'description': imp.get('description', ''),
+                        'current_code': current_code_clean,
+                        'improved_code': improved_code_clean,
+                        'expected_improvement': imp.get('expected_improvement', '')
+                    })
+                
+                # If all suggestions were filtered out, return empty
+                if not converted_improvements:
+                    logger.warning(f"All AI suggestions were filtered out for {performance_api.endpoint} - no valid suggestions available")
                     return {"improvements": []}
-            else:
-                logger.warning(f"Empty AI response for {performance_api.endpoint} from Bedrock - no suggestions available")
-                return {"improvements": []}
                 
-        except Exception as e:
-            logger.error(f"❌ Unexpected error generating AI analysis for {performance_api.endpoint}: {type(e).__name__}: {e}", exc_info=True)
-            logger.warning(f"Unexpected error for {performance_api.endpoint} - no suggestions available")
+                analysis['improvements'] = converted_improvements
+                analysis['root_causes'] = []  # Not needed
+                analysis['code_quality_issues'] = []  # Not needed
+                
+                logger.info(f"✅ Successfully parsed AI analysis with {len(improvements)} improvements from Bedrock")
+                return analysis
+                
+            except json.JSONDecodeError as je:
+                logger.error(f"JSON decode error for {performance_api.endpoint}: {je}")
+                logger.debug(f"Response preview: {response[:500]}")
+                logger.warning(f"Bedrock returned invalid JSON for {performance_api.endpoint} - no suggestions available")
+                return {"improvements": []}
+            except Exception as e:
+                logger.error(f"Error parsing AI response for {performance_api.endpoint}: {e}")
+                logger.warning(f"Failed to parse Bedrock response for {performance_api.endpoint} - no suggestions available")
+                return {"improvements": []}
+        else:
+            logger.warning(f"Empty AI response for {performance_api.endpoint} from Bedrock - no suggestions available")
             return {"improvements": []}
     
     def _remove_imports(self, code: str) -> str:
@@ -2,32 +2,494 @@
 API matching engine for matching performance data with source code APIs.
 """
 import re
+import hashlib
 import logging
-from typing import List, Tuple, Dict, Any
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import List, Tuple, Dict, Any, Optional, Set
 from difflib import SequenceMatcher
+import numpy as np
 from app.models.improvement_models import (
     APIPerformanceProfile, DiscoveredAPI, SourceCodeMatch, 
     MatchingResult, SeverityLevel, DetailedAnalysisResult, ImplementationPlan
 )
+from app.utils.ngram_tfidf import NgramTfidf, top_k_positions
 
 logger = logging.getLogger(__name__)
 
+# Words the fuzzy and phrase scores leave out of word overlap
+GENERIC_WORDS = {'get', 'post', 'put', 'delete', 'patch', 'api', 'v1', 'v2', '', '_', '/'}
+SIMILAR_WORD_RATIO = 0.7
+
+# Highest confidence of a source sharing no word, similar word or substring with the performance API:
+# its exact score is 0, its fuzzy score at most 0.3 and its phrase score at most 1
+UNRELATED_SOURCE_MAX_CONFIDENCE = 0.3 * 0.3 + 0.1 * 1.0
+
+
+# Confidence of a label that resolves to a source route template segment by segment
+STRUCTURAL_MATCH_CONFIDENCE = 1.0
+
+HTTP_METHOD_REGEX = re.compile(r'^(get|post|put|delete|patch|head|options)\s+', re.IGNORECASE)
+# {id}, {id:int}, <int:id>, :id, :id(\d+) and ASP.NET [controller] / [action] tokens
+ROUTE_PARAMETER_REGEX = re.compile(r'\{[^}/]*\}|<[^>/]*>|:\w+|\[[^\]/]*\]')
+# *, **, *path and {*path} match the rest of the path
+CATCH_ALL_SEGMENT_REGEX = re.compile(r'^(?:\*\*?\w*|\{\*[^}]*\})$')
+# Label segments that look like values (numbers, UUIDs, hex ids) and may fill a route parameter
+PARAMETER_VALUE_REGEX = re.compile(
+    r'^(?:\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|(?=[a-f]*\d)[0-9a-f]{8,})$'
+)
+# Prefix segments most routes share ("api", "rest", "v1", "v2.1"), which say nothing about the resource
+ROUTE_PREFIX_SEGMENT_REGEX = re.compile(r'^(?:api|rest|v\d+(?:\.\d+)*)$')
+
+# Segment kinds, in the order a router prefers them
+LITERAL_SEGMENT, PARAMETER_SEGMENT, CATCH_ALL_SEGMENT = 0, 1, 2
+
+
+HTTP_METHOD_WORDS = {'get', 'post', 'put', 'delete'}
+
+# Endpoints the scores treat as generic: as written ("POST /"), and after normalization ("post", "")
+GENERIC_ENDPOINTS = {'post /', 'get /', 'put /', 'delete /', 'patch /', '/', 'post', 'get'}
+FUZZY_GENERIC_ENDPOINTS = GENERIC_ENDPOINTS | {'put', 'delete'}
+GENERIC_NORMALIZED_ENDPOINTS = {'', '_', '/', 'post', 'get', 'put', 'delete', 'patch'}
+
+
+def _meaningful_words(normalized: str) -> List[str]:
+    """Words of a normalized endpoint that count for word overlap, in order."""
+    return [w for w in normalized.split('_') if w and w not in GENERIC_WORDS and len(w) > 2]
+
+
+def path_prefix(normalized: str) -> str:
+    """First meaningful segment of a normalized endpoint, skipping path parameters ('' if none)."""
+    for word in _meaningful_words(normalized):
+        if not ROUTE_PARAMETER_REGEX.search(word):
+            return word
+    return ''
+
+
+@lru_cache(maxsize=65536)
+def word_ratio(perf_word: str, source_word: str) -> float:
+    """Character similarity of two words; the same few words meet again and again across endpoints."""
+    return SequenceMatcher(None, perf_word, source_word).ratio()
+
+
+class EndpointFeatures:
+    """What the exact, fuzzy and phrase scores read from one endpoint, computed once per matching session.
+
+    Scoring a pair then compares these records with set operations and at most two SequenceMatcher
+    ratios, instead of normalizing both endpoints again for each score.
+    """
+    __slots__ = ('lowered', 'normalized', 'words', 'has_long_words', 'spaced_words', 'is_generic',
+                 'is_fuzzy_generic', 'is_exact_generic', 'phrase_normalized', 'phrase_words', 'phrase_word_set')
+
+    def __init__(self, matcher: 'APIMatcher', endpoint: str):
+        lowered = endpoint.lower().strip()
+        normalized = matcher._normalize_endpoint_for_exact_match(lowered)
+        self.lowered = lowered
+        self.normalized = normalized
+        self.words = set(_meaningful_words(normalized))
+        self.has_long_words = any(len(w) > 2 for w in normalized.split('_'))
+        self.spaced_words = {w for w in endpoint.lower().split() if len(w) > 2}
+        self.is_generic = lowered in GENERIC_ENDPOINTS or (len(lowered) <= 5 and lowered.strip('/').strip() == '')
+        self.is_fuzzy_generic = lowered in FUZZY_GENERIC_ENDPOINTS or \
+            (len(lowered.strip('/').strip()) <= 2 and '/' in lowered)
+        self.is_exact_generic = normalized in GENERIC_NORMALIZED_ENDPOINTS or len(normalized.strip('_/')) == 0
+        # The phrase score compares the endpoints after _clean_endpoint_for_matching as well
+        phrase_normalized = matcher._normalize_endpoint_for_exact_match(
+            matcher._clean_endpoint_for_matching(lowered)).lstrip('/')
+        self.phrase_normalized = phrase_normalized
+        self.phrase_words = tuple(_meaningful_words(phrase_normalized))
+        self.phrase_word_set = set(self.phrase_words)
+
+
+def split_route(endpoint: str) -> Tuple[Optional[str], Optional[List[str]]]:
+    """Split "POST /users/{id}" into its method (None if absent) and lowercased path segments.
+
+    The segments are None when the endpoint is not a path (labels such as "Get Users").
+    """
+    endpoint = endpoint.strip()
+    method_match = HTTP_METHOD_REGEX.match(endpoint)
+    method = method_match.group(1).upper() if method_match else None
+    path = endpoint[method_match.end():] if method_match else endpoint
+    path = re.sub(r'^https?://[^/]+', '', path.strip()).split('?', 1)[0].split('#', 1)[0]
+    if '/' not in path or ' ' in path.strip():
+        return method, None
+    return method, [segment for segment in path.lower().split('/') if segment]
+
+
+def _segment_kind(segment: str) -> int:
+    if CATCH_ALL_SEGMENT_REGEX.match(segment):
+        return CATCH_ALL_SEGMENT
+    if ROUTE_PARAMETER_REGEX.search(segment):
+        return PARAMETER_SEGMENT
+    return LITERAL_SEGMENT
+
+
+class _RouteNode:
+    """One path segment of the route trie."""
+    __slots__ = ('literals', 'parameter', 'catch_all', 'routes')
+
+    def __init__(self):
+        self.literals: Dict[str, '_RouteNode'] = {}
+        self.parameter: Optional['_RouteNode'] = None
+        self.catch_all: List[int] = []
+        self.routes: List[int] = []
+
+
+class RouteTemplateTrie:
+    """Source route templates by HTTP method and path segment, with wildcard nodes for parameters.
+
+    A concrete label such as "GET /users/42" walks the trie segment by segment and resolves to
+    "/users/{id}", "/users/<int:id>" or "/users/:id" in time proportional to its length. Sources without a
+    method are GET routes, as discovery writes them; labels without a method match any method.
+    """
+
+    def __init__(self, source_apis: List[DiscoveredAPI]):
+        self.roots: Dict[str, _RouteNode] = {}
+        for position, source_api in enumerate(source_apis):
+            method, segments = split_route(source_api.endpoint)
+            if segments is None:
+                continue
+            node = self.roots.setdefault(method or 'GET', _RouteNode())
+            for segment in segments:
+                kind = _segment_kind(segment)
+                if kind == CATCH_ALL_SEGMENT:
+                    node.catch_all.append(position)
+                    break
+                if kind == PARAMETER_SEGMENT:
+                    if node.parameter is None:
+                        node.parameter = _RouteNode()
+                    node = node.parameter
+                else:
+                    node = node.literals.setdefault(segment, _RouteNode())
+            else:
+                node.routes.append(position)
+
+    def _walk(self, node: _RouteNode, segments: List[str], depth: int, kinds: Tuple[int, ...],
+              found: List[Tuple[Tuple[int, ...], int]]):
+        if depth == len(segments):
+            if node.routes:
+                found.append((kinds, node.routes[0]))
+            return
+        segment = segments[depth]
+        if node.catch_all:
+            found.append((kinds + (CATCH_ALL_SEGMENT,), node.catch_all[0]))
+        # A template segment in the label only matches a template segment of the source, and a word
+        # ("orders") names a resource rather than filling a parameter
+        label_kind = _segment_kind(segment)
+        if label_kind == LITERAL_SEGMENT and segment in node.literals:
+            self._walk(node.literals[segment], segments, depth + 1, kinds + (LITERAL_SEGMENT,), found)
+        if node.parameter is not None and (
+                label_kind == PARAMETER_SEGMENT
+                or (label_kind == LITERAL_SEGMENT and PARAMETER_VALUE_REGEX.match(segment))):
+            self._walk(node.parameter, segments, depth + 1, kinds + (PARAMETER_SEGMENT,), found)
+
+    def resolve(self, endpoint: str) -> Optional[int]:
+        """Position of the source route a label resolves to, or None.
+
+        Literal segments win over parameters and parameters over catch-alls, segment by segment from
+        the left as in most routers; equally specific routes resolve to the first source. Only label
+        segments that look like values fill parameters, and routes made mostly of wildcards
+        ("/api/:slug", "/{*path}") would take too many labels, so a path also needs one literal segment
+        besides "api"/version prefixes in common with its route. Labels that do not resolve are scored.
+        """
+        method, segments = split_route(endpoint)
+        if segments is None:
+            return None
+        roots = [self.roots[method]] if method in self.roots else [] if method else list(self.roots.values())
+        found: List[Tuple[Tuple[int, ...], int]] = []
+        for root in roots:
+            self._walk(root, segments, 0, (), found)
+        found = [match for match in found if not segments or any(
+            kind == LITERAL_SEGMENT and not ROUTE_PREFIX_SEGMENT_REGEX.match(segments[depth])
+            for depth, kind in enumerate(match[0])
+        )]
+        return min(found)[1] if found else None
+
+
+class SourceAPIIndex:
+    """Inverted index of source APIs by normalized path words and character trigrams.
+
+    A source can only reach the usual confidence threshold if its normalized endpoint contains or is
+    contained in the performance API's, shares a word with it, has a word similar in characters to one
+    of its words, or has no meaningful words at all (generic routes such as "POST /"). The index finds
+    exactly those sources, so scoring them alone gives the same best match as scoring every source.
+    """
+
+    def __init__(self, matcher: 'APIMatcher', source_apis: List[DiscoveredAPI]):
+        self.matcher = matcher
+        self.source_apis = source_apis
+        self.features = [EndpointFeatures(matcher, source_api.endpoint) for source_api in source_apis]
+        self.always_scored: List[int] = []
+        self.by_normalized: Dict[str, List[int]] = {}
+        self.by_word: Dict[str, List[int]] = {}
+        self.by_trigram: Dict[str, Set[int]] = {}
+        self._similar_words: Dict[str, List[str]] = {}
+        self._word_letters: Optional[Dict[str, Counter]] = None
+        self.routes = RouteTemplateTrie(source_apis)
+        self._tfidf: Optional[NgramTfidf] = None
+        # Partitions by HTTP method and first path segment, searched before widening to every candidate
+        self.methods: List[str] = []
+        self.prefixes: List[str] = []
+
+        for i, (source_api, features) in enumerate(zip(source_apis, self.features)):
+            method_match = HTTP_METHOD_REGEX.match(source_api.endpoint.strip())
+            self.methods.append(method_match.group(1).upper() if method_match else 'GET')
+            self.prefixes.append(path_prefix(features.normalized))
+            normalized = features.normalized
+            if not features.words:
+                self.always_scored.append(i)
+            self.by_normalized.setdefault(normalized, []).append(i)
+            for word in features.words:
+                self.by_word.setdefault(word, []).append(i)
+            for j in range(len(normalized) - 2):
+                self.by_trigram.setdefault(normalized[j:j + 3], set()).add(i)
+
+    def similar_words(self, word: str) -> List[str]:
+        """Indexed words whose character similarity to a performance word passes the fuzzy score's cut."""
+        if word not in self._similar_words:
+            if self._word_letters is None:
+                self._word_letters = {candidate: Counter(candidate) for candidate in self.by_word}
+            letters = Counter(word).items()
+            similar = []
+            for candidate, candidate_letters in self._word_letters.items():
+                total = len(word) + len(candidate)
+                # Both the length and the shared letters bound the ratio from above, and are cheaper than it
+                if 2 * min(len(word), len(candidate)) <= SIMILAR_WORD_RATIO * total:
+                    continue
+                shared = sum(min(count, candidate_letters[letter]) for letter, count in letters)
+                if 2 * shared <= SIMILAR_WORD_RATIO * total:
+                    continue
+                if word_ratio(word, candidate) > SIMILAR_WORD_RATIO:
+                    similar.append(candidate)
+            self._similar_words[word] = similar
+        return self._similar_words[word]
+
+    def candidates(self, perf: EndpointFeatures, similarity: Optional[np.ndarray] = None,
+                   related: Optional[Set[int]] = None) -> Optional[List[int]]:
+        """Positions of the sources worth scoring in source order, or None if every source must be scored.
+        
+        With the label's row of the batch similarity matrix, the sources related through words are
+        replaced by the matcher's batch_top_k most similar ones. Sources whose normalized endpoint
+        contains or is contained in the label's and generic sources are always kept, so matches scoring
+        0.9 or more are the same as without the batch matrix.
+        """
+        top_k = self.matcher.batch_top_k if similarity is not None else 0
+        perf_normalized = perf.normalized
+        # Containing sources are found through trigrams, so shorter labels ("GET /api/v1") are always scored fully
+        too_short = len(perf_normalized) < 3
+        exhaustive = self.matcher.min_confidence_threshold <= UNRELATED_SOURCE_MAX_CONFIDENCE \
+            or not perf.words or too_short
+        if (exhaustive and not top_k) or too_short:
+            return None
+
+        candidates = set(related) if related is not None else self.related(perf)
+        if top_k:
+            # The similarity ranking stands in for the word and similar-word lookups
+            candidates.update(top_k_positions(similarity, top_k, exclude=candidates))
+        else:
+            for word in perf.words:
+                for similar_word in self.similar_words(word):
+                    candidates.update(self.by_word[similar_word])
+        return sorted(candidates)
+
+    def related(self, perf: EndpointFeatures) -> Set[int]:
+        """Generic sources and sources whose normalized endpoint contains or is contained in the label's."""
+        perf_normalized = perf.normalized
+        candidates = set(self.always_scored)
+        if len(perf_normalized) >= 3:
+            # Sources whose normalized endpoint is a substring of the performance one
+            for start in range(len(perf_normalized)):
+                for end in range(start + 1, len(perf_normalized) + 1):
+                    candidates.update(self.by_normalized.get(perf_normalized[start:end], ()))
+            # Sources containing the performance endpoint hold all of its trigrams
+            postings = sorted((self.by_trigram.get(perf_normalized[j:j + 3], set())
+                               for j in range(len(perf_normalized) - 2)), key=len)
+            candidates.update(set.intersection(*postings))
+        return candidates
+
+    def candidate_tiers(self, perf: EndpointFeatures, similarity: Optional[np.ndarray] = None) -> List[List[int]]:
+        """Candidates in widening tiers, each containing the previous one.
+        
+        The first tier holds the candidates with the label's HTTP method and first path segment, plus
+        the related sources of its method; the second every candidate of its method and all related
+        sources; the last every candidate. Labels without a method ("Users") skip the method tier.
+        """
+        method_match = HTTP_METHOD_REGEX.match(perf.lowered)
+        method = method_match.group(1).upper() if method_match else None
+        prefix = path_prefix(perf.normalized)
+        related = self.related(perf)
+        candidates = self.candidates(perf, similarity, related)
+        if candidates is None:
+            candidates = range(len(self.source_apis))
+
+        tiers = []
+        if prefix:
+            tiers.append([position for position in candidates
+                          if (method is None or self.methods[position] == method)
+                          and (self.prefixes[position] == prefix or position in related)])
+        if method:
+            tiers.append([position for position in candidates
+                          if self.methods[position] == method or position in related])
+        tiers.append(list(candidates))
+        return tiers
+
+    def similarity_matrix(self, perf_features: List[EndpointFeatures]) -> np.ndarray:
+        """Cosine similarity of the labels' and sources' character trigram TF-IDF vectors (labels x sources)."""
+        if self._tfidf is None:
+            self._tfidf = NgramTfidf([features.normalized for features in self.features])
+        return self._tfidf.similarity([features.normalized for features in perf_features])
+
+
+# Part of every match cache key; bump it when scoring changes so persisted matches of older rules are dropped
+MATCHER_VERSION = 4
+
+
+def match_label_key(endpoint: str) -> str:
+    """Normalized performance label; matching reads labels case-insensitively and without outer spaces."""
+    return endpoint.lower().strip()
+
+
+class MatchCache:
+    """Best matches per (source API list version, performance label), with LRU eviction.
+
+    Entries live in memory and, when a cache store is given, are persisted as one item per version and
+    label, so reruns against the same commit after a restart only score labels not seen before. Items
+    stay small however many labels a version collects, and a run only writes the labels it scored.
+    """
+    NAMESPACE = 'api_match'
+
+    def __init__(self, store=None, max_entries: int = 20000, ttl_seconds: Optional[float] = None):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[Optional[int], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _store_key(version: str, label: str) -> str:
+        # Labels can be long; a digest keeps the key within DynamoDB's sort key limit
+        return f"{version}:{hashlib.sha256(label.encode('utf-8')).hexdigest()}"
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, version: str, labels: List[str]) -> Dict[str, Tuple[Optional[int], float]]:
+        """Cached (source position or None, confidence) of the labels found in memory or in the store."""
+        found = {}
+        with self._lock:
+            for label in labels:
+                entry = self._entries.get((version, label))
+                if entry is not None:
+                    self._entries.move_to_end((version, label))
+                    found[label] = entry
+        missing = {self._store_key(version, label): label for label in labels if label not in found}
+        if missing and self.store is not None:
+            stored = self.store.get_many(self.NAMESPACE, list(missing))
+            with self._lock:
+                for key, (position, confidence) in stored.items():
+                    entry = (position, confidence)
+                    self._entries[(version, missing[key])] = entry
+                    found[missing[key]] = entry
+                self._evict()
+        return found
+
+    def put_many(self, version: str, results: Dict[str, Tuple[Optional[int], float]]):
+        """Cache new results and persist them, one store item per label."""
+        with self._lock:
+            for label, entry in results.items():
+                self._entries[(version, label)] = entry
+                self._entries.move_to_end((version, label))
+            self._evict()
+        if self.store is not None and results:
+            stored = self.store.put_many(
+                self.NAMESPACE, {self._store_key(version, label): list(entry) for label, entry in results.items()},
+                ttl_seconds=self.ttl_seconds
+            )
+            if not stored:
+                logger.warning(f"MatchCache: could not persist {len(results)} matches of source list {version[:12]}")
+
 
 class APIMatcher:
     """Engine for matching performance APIs with source code APIs."""
     
-    def __init__(self, min_confidence_threshold: float = 0.3):
+    def __init__(self, min_confidence_threshold: float = 0.3, batch_min_pairs: int = 0, batch_top_k: int = 25,
+                 match_cache: Optional[MatchCache] = None):
         self.min_confidence_threshold = min_confidence_threshold
+        # Batch mode: at batch_min_pairs labels x routes (0 = never), a TF-IDF similarity matrix picks
+        # the batch_top_k word-related routes each label is scored against
+        self.batch_min_pairs = batch_min_pairs
+        self.batch_top_k = batch_top_k
+        self.match_cache = match_cache
+    
+    def _source_version(self, source_apis: List[DiscoveredAPI], batch_mode: bool) -> str:
+        """Version of a source API list for the match cache.
+        
+        Matches depend on the source endpoints and their order (ties go to the first source), and on the
+        matcher's settings; file paths and handlers are read from the list itself on a cache hit.
+        """
+        digest = hashlib.sha256(
+            f"{MATCHER_VERSION}|{self.min_confidence_threshold}|{self.batch_top_k if batch_mode else 0}".encode('utf-8')
+        )
+        for source_api in source_apis:
+            digest.update(b'\0' + source_api.endpoint.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _find_best_matches(self, performance_apis: List[APIPerformanceProfile],
+                           source_apis: List[DiscoveredAPI]) -> List[Tuple[DiscoveredAPI, float]]:
+        """Find the best matching source API of each performance API, sharing one source index.
+        
+        Labels already in the match cache for this source list are not scored again, and the source
+        index is only built when some label is missing.
+        """
+        batch_mode = bool(self.batch_min_pairs and self.batch_top_k and source_apis
+                          and len(performance_apis) * len(source_apis) >= self.batch_min_pairs)
+        labels = [match_label_key(perf_api.endpoint) for perf_api in performance_apis]
+        version = self._source_version(source_apis, batch_mode) if self.match_cache is not None else None
+        cached = self.match_cache.get_many(version, labels) if self.match_cache is not None else {}
+        
+        # One performance API per label still to score
+        pending: Dict[str, APIPerformanceProfile] = {}
+        for label, perf_api in zip(labels, performance_apis):
+            if label not in cached and label not in pending:
+                pending[label] = perf_api
+        if cached:
+            logger.info(f"APIMatcher: {sum(label in cached for label in labels)} of {len(labels)} performance APIs found in the match cache")
+        
+        computed: Dict[str, Tuple[Optional[int], float]] = {}
+        if pending:
+            source_index = SourceAPIIndex(self, source_apis)
+            pending_apis = list(pending.values())
+            similarity = None
+            if batch_mode:
+                similarity = source_index.similarity_matrix(
+                    [EndpointFeatures(self, perf_api.endpoint) for perf_api in pending_apis])
+                logger.info(f"APIMatcher: Batch mode, scoring at most {self.batch_top_k} word-related source APIs per performance API")
+            positions = {id(source_api): position for position, source_api in enumerate(source_apis)}
+            for i, (label, perf_api) in enumerate(pending.items()):
+                source_api, confidence = self._find_best_match(
+                    perf_api, source_apis, source_index, similarity[i] if similarity is not None else None)
+                computed[label] = (positions[id(source_api)] if source_api is not None else None, confidence)
+            if self.match_cache is not None:
+                self.match_cache.put_many(version, computed)
+        
+        results = []
+        for label in labels:
+            position, confidence = cached[label] if label in cached else computed[label]
+            results.append((source_apis[position], confidence) if position is not None else (None, 0.0))
+        return results
     
     def match_apis_with_color_coding(self, performance_apis: List[APIPerformanceProfile], 
                                    source_apis: List[DiscoveredAPI]) -> List[Dict[str, Any]]:
         """Match performance APIs with source code APIs and add color coding."""
         logger.info(f"APIMatcher: Starting matching with {len(performance_apis)} performance APIs and {len(source_apis)} source APIs")
         matched_apis_with_colors = []
+        best_matches = self._find_best_matches(performance_apis, source_apis)
         
         for i, perf_api in enumerate(performance_apis):
             logger.info(f"APIMatcher: Processing performance API {i+1}: '{perf_api.endpoint}'")
-            best_match = self._find_best_match(perf_api, source_apis)
+            best_match = best_matches[i]
             logger.info(f"APIMatcher: Best match for '{perf_api.endpoint}': {best_match[0].endpoint if best_match[0] else 'None'} (confidence: {best_match[1]:.2f})")
             
             if best_match and best_match[1] >= self.min_confidence_threshold:
@@ -113,10 +575,9 @@ class APIMatcher:
         matches = []
         unmatched_performance = []
         unmatched_source = source_apis.copy()  # Start with all source APIs as unmatched
+        best_matches = self._find_best_matches(performance_apis, source_apis)
         
-        for perf_api in performance_apis:
-            best_match = self._find_best_match(perf_api, source_apis)
-            
+        for perf_api, best_match in zip(performance_apis, best_matches):
             if best_match and best_match[1] >= self.min_confidence_threshold:
                 # Create match
                 source_api, confidence = best_match
@@ -181,79 +642,106 @@ class APIMatcher:
         )
     
     def _find_best_match(self, perf_api: APIPerformanceProfile, 
-                        source_apis: List[DiscoveredAPI]) -> Tuple[DiscoveredAPI, float]:
-        """Find the best matching source API for a performance API using enhanced matching."""
-        best_match = None
+                        source_apis: List[DiscoveredAPI],
+                        source_index: Optional[SourceAPIIndex] = None,
+                        similarity: Optional[np.ndarray] = None) -> Tuple[DiscoveredAPI, float]:
+        """Find the best matching source API for a performance API using enhanced matching.
+        
+        Only the sources that can reach the confidence threshold are scored, which gives the same best
+        match as scoring every source whenever it clears the threshold. The result differs from scoring
+        every source only in these cases (test_api_matcher_equivalence.py checks them):
+        - A label that resolves to a route template matches it with STRUCTURAL_MATCH_CONFIDENCE, even
+          when another source scores higher on words.
+        - Sources with the label's method and first path segment are searched first, then those with
+          its method: a match in an earlier tier that clears the threshold wins over a higher scoring
+          source in a later one.
+        - With a row of the batch similarity matrix, only the most similar word-related sources are
+          scored, so only matches of 0.9 or more are certain to be the same.
+        - Below the threshold the confidence may be lower than the best of all sources; callers treat
+          both as unmatched.
+        """
+        if source_index is None:
+            source_index = SourceAPIIndex(self, source_apis)
+        
+        # Labels that resolve to a source route template need no scoring
+        position = source_index.routes.resolve(perf_api.endpoint)
+        if position is not None:
+            return source_index.source_apis[position], STRUCTURAL_MATCH_CONFIDENCE
+        
+        best_position = None
         best_confidence = 0.0
         
+        # Search the label's method and path prefix first, widening only while nothing clears the threshold
+        perf = EndpointFeatures(self, perf_api.endpoint)
+        scored = set()
+        for tier in source_index.candidate_tiers(perf, similarity):
+            for position in tier:
+                if position in scored:
+                    continue
+                scored.add(position)
+                total_confidence = self._calculate_total_match_confidence(perf, source_index.features[position])
+                # Equal confidences go to the earlier source, as when scoring in source order
+                if total_confidence > best_confidence or \
+                        (best_position is not None and total_confidence == best_confidence and position < best_position):
+                    best_confidence = total_confidence
+                    best_position = position
+            if best_confidence >= self.min_confidence_threshold:
+                break
+        
+        return (source_index.source_apis[best_position], best_confidence) if best_position is not None else (None, 0.0)
+    
+    def _calculate_total_match_confidence(self, perf: EndpointFeatures, source: EndpointFeatures) -> float:
+        """Combine the exact, fuzzy and phrase scores of one source API."""
         # Enhanced matching with multiple strategies - EXACT WORDS and SIMILAR WORDS only
         # NO semantic matching (meaning-based) - only exact words and character-based similarity
-        for source_api in source_apis:
-            # Calculate confidence scores - only word-based matching, no semantic
-            exact_match_score = self._calculate_exact_match_confidence(perf_api, source_api)
-            fuzzy_match_score = self._calculate_fuzzy_match_confidence(perf_api, source_api)
-            phrase_match_score = self._calculate_phrase_match_confidence(perf_api, source_api)
-            
-            # Check if source is generic endpoint (like "POST /", "/")
-            source_endpoint_clean = source_api.endpoint.lower().strip()
-            generic_patterns = ['post /', 'get /', 'put /', 'delete /', 'patch /', '/', 'post', 'get']
-            is_generic_source = source_endpoint_clean in generic_patterns or \
-                               (len(source_endpoint_clean) <= 5 and source_endpoint_clean.strip('/').strip() == '')
-            
-            # Extract meaningful words from performance endpoint
-            perf_words = [w for w in perf_api.endpoint.lower().split() if w and len(w) > 2 and w not in ['get', 'post', 'put', 'delete']]
-            
-            # If source is generic and performance has specific words, heavily penalize
-            if is_generic_source and perf_words:
-                # Require at least some word overlap for generic endpoints
-                source_words = [w for w in source_api.endpoint.lower().split() if w and len(w) > 2]
-                common_words = set(perf_words) & set(source_words)
-                if len(common_words) == 0:
-                    # No word match - very low confidence for generic endpoint
-                    total_confidence = min(exact_match_score * 0.10 + fuzzy_match_score * 0.05 + phrase_match_score * 0.05, 0.2)
-                else:
-                    # Some word match but still generic - low confidence
-                    total_confidence = min(exact_match_score * 0.30 + fuzzy_match_score * 0.20 + phrase_match_score * 0.30, 0.5)
+        # Calculate confidence scores - only word-based matching, no semantic
+        exact_match_score = self._calculate_exact_match_confidence(perf, source)
+        fuzzy_match_score = self._calculate_fuzzy_match_confidence(perf, source)
+        phrase_match_score = self._calculate_phrase_match_confidence(perf, source)
+        
+        # Check if source is generic endpoint (like "POST /", "/")
+        is_generic_source = source.is_generic
+        
+        # Meaningful words of the performance endpoint, split on spaces
+        perf_words = perf.spaced_words - HTTP_METHOD_WORDS
+        
+        # If source is generic and performance has specific words, heavily penalize
+        if is_generic_source and perf_words:
+            # Require at least some word overlap for generic endpoints
+            common_words = perf_words & source.spaced_words
+            if len(common_words) == 0:
+                # No word match - very low confidence for generic endpoint
+                total_confidence = min(exact_match_score * 0.10 + fuzzy_match_score * 0.05 + phrase_match_score * 0.05, 0.2)
             else:
-                # Normal matching logic
-                if exact_match_score >= 0.9:
-                    # Very high confidence for exact/near-exact matches
-                    total_confidence = max(exact_match_score, phrase_match_score * 0.95)
-                else:
-                    # Weighted combination - focus on exact words and similar words (character-based) only
-                    total_confidence = (
-                        exact_match_score * 0.60 +      # Exact matches are MOST important (60%)
-                        fuzzy_match_score * 0.30 +      # Fuzzy matching for similar word patterns (30%)
-                        phrase_match_score * 0.10       # Phrase matching for word overlap (10%)
-                        # Removed: semantic_match_score (no meaning-based matching)
-                        # Removed: framework_match_score (not relevant for word matching)
-                    )
-            
-            if total_confidence > best_confidence:
-                best_confidence = total_confidence
-                best_match = source_api
+                # Some word match but still generic - low confidence
+                total_confidence = min(exact_match_score * 0.30 + fuzzy_match_score * 0.20 + phrase_match_score * 0.30, 0.5)
+        else:
+            # Normal matching logic
+            if exact_match_score >= 0.9:
+                # Very high confidence for exact/near-exact matches
+                total_confidence = max(exact_match_score, phrase_match_score * 0.95)
+            else:
+                # Weighted combination - focus on exact words and similar words (character-based) only
+                total_confidence = (
+                    exact_match_score * 0.60 +      # Exact matches are MOST important (60%)
+                    fuzzy_match_score * 0.30 +      # Fuzzy matching for similar word patterns (30%)
+                    phrase_match_score * 0.10       # Phrase matching for word overlap (10%)
+                    # Removed: semantic_match_score (no meaning-based matching)
+                    # Removed: framework_match_score (not relevant for word matching)
+                )
         
-        return (best_match, best_confidence) if best_match else (None, 0.0)
+        return total_confidence
     
-    def _calculate_exact_match_confidence(self, perf_api: APIPerformanceProfile, 
-                                        source_api: DiscoveredAPI) -> float:
+    def _calculate_exact_match_confidence(self, perf: EndpointFeatures, source: EndpointFeatures) -> float:
         """Calculate exact match confidence with improved normalization."""
-        perf_endpoint = perf_api.endpoint.lower().strip()
-        source_endpoint = source_api.endpoint.lower().strip()
-        
-        # Normalize both endpoints
-        perf_normalized = self._normalize_endpoint_for_exact_match(perf_endpoint)
-        source_normalized = self._normalize_endpoint_for_exact_match(source_endpoint)
+        perf_normalized = perf.normalized
+        source_normalized = source.normalized
         
         # Check if source is generic (like "POST /", "/", "GET /")
-        generic_patterns = ['', '_', '/', 'post', 'get', 'put', 'delete', 'patch']
-        is_generic_source = source_normalized in generic_patterns or len(source_normalized.strip('_/')) == 0
-        
-        # Extract meaningful words from performance endpoint
-        perf_words = [w for w in perf_normalized.split('_') if w and len(w) > 2]
+        is_generic_source = source.is_exact_generic
         
         # If source is generic and perf has specific words, penalize heavily
-        if is_generic_source and perf_words:
+        if is_generic_source and perf.has_long_words:
             return 0.0  # No exact match for generic endpoints
         
         # Exact match after normalization
@@ -291,28 +779,17 @@ class APIMatcher:
         
         return endpoint.lower()
     
-    def _calculate_fuzzy_match_confidence(self, perf_api: APIPerformanceProfile, 
-                                        source_api: DiscoveredAPI) -> float:
+    def _calculate_fuzzy_match_confidence(self, perf: EndpointFeatures, source: EndpointFeatures) -> float:
         """Calculate fuzzy match confidence using CHARACTER similarity and WORD overlap - NO MEANING."""
-        perf_endpoint = perf_api.endpoint.lower().strip()
-        source_endpoint = source_api.endpoint.lower().strip()
-        
         # Check if source is generic (like "POST /", "/")
-        generic_patterns = ['post /', 'get /', 'put /', 'delete /', 'patch /', '/', 'post', 'get', 'put', 'delete']
-        is_generic_source = source_endpoint in generic_patterns or \
-                           (len(source_endpoint.strip('/').strip()) <= 2 and '/' in source_endpoint)
-        
-        # Use the improved normalization method
-        perf_normalized = self._normalize_endpoint_for_exact_match(perf_endpoint)
-        source_normalized = self._normalize_endpoint_for_exact_match(source_endpoint)
+        is_generic_source = source.is_fuzzy_generic
         
-        # Extract meaningful words (exclude HTTP methods and generic terms)
-        generic_words = {'get', 'post', 'put', 'delete', 'patch', 'api', 'v1', 'v2', '', '_', '/'}
-        perf_words = [w for w in perf_normalized.split('_') if w and w not in generic_words and len(w) > 2]
-        source_words = [w for w in source_normalized.split('_') if w and w not in generic_words and len(w) > 2]
+        perf_normalized = perf.normalized
+        source_normalized = source.normalized
         
-        perf_words_set = set(perf_words)
-        source_words_set = set(source_words)
+        # Meaningful words (exclude HTTP methods and generic terms)
+        perf_words_set = perf.words
+        source_words_set = source.words
         
         # If source is generic and perf has specific words, return very low score
         if is_generic_source and perf_words_set:
@@ -347,9 +824,9 @@ class APIMatcher:
                 for source_word in source_words_set:
                     # Character-based similarity (not semantic)
                     if perf_word and source_word:
-                        word_similarity = SequenceMatcher(None, perf_word, source_word).ratio()
+                        word_similarity = word_ratio(perf_word, source_word)
                         # If words are similar in characters (like "user" and "users")
-                        if word_similarity > 0.7:
+                        if word_similarity > SIMILAR_WORD_RATIO:
                             similar_word_count += word_similarity
             
             if similar_word_count > 0:
@@ -523,15 +1000,10 @@ class APIMatcher:
             return False
         return word1 in word2 or word2 in word1
     
-    def _calculate_phrase_similarity(self, perf_endpoint: str, source_endpoint: str) -> float:
+    def _calculate_phrase_similarity(self, perf: EndpointFeatures, source: EndpointFeatures) -> float:
         """Calculate similarity based on EXACT WORD matches and CHARACTER similarity - NO MEANING."""
-        # Normalize both endpoints first
-        perf_clean = self._normalize_endpoint_for_exact_match(perf_endpoint)
-        source_clean = self._normalize_endpoint_for_exact_match(source_endpoint)
-        
-        # Normalize source endpoint
-        source_normalized = source_clean.lstrip('/')
-        perf_normalized = perf_clean
+        perf_normalized = perf.phrase_normalized
+        source_normalized = source.phrase_normalized
         
         # Check exact match after normalization
         if perf_normalized == source_normalized:
@@ -541,13 +1013,11 @@ class APIMatcher:
         if perf_normalized in source_normalized or source_normalized in perf_normalized:
             return 0.95
         
-        # Extract meaningful words (exclude HTTP methods and generic terms)
-        generic_words = {'get', 'post', 'put', 'delete', 'patch', 'api', 'v1', 'v2', '', '_', '/'}
-        perf_words_meaningful = [w for w in perf_normalized.split('_') if w and w not in generic_words and len(w) > 2]
-        source_words_meaningful = [w for w in source_normalized.split('_') if w and w not in generic_words and len(w) > 2]
-        
-        perf_words_meaningful_set = set(perf_words_meaningful)
-        source_words_meaningful_set = set(source_words_meaningful)
+        # Meaningful words (exclude HTTP methods and generic terms)
+        perf_words_meaningful = perf.phrase_words
+        source_words_meaningful = source.phrase_words
+        perf_words_meaningful_set = perf.phrase_word_set
+        source_words_meaningful_set = source.phrase_word_set
         
         # Check if source is generic (no meaningful words)
         is_generic_source = len(source_words_meaningful_set) == 0
@@ -663,18 +1133,10 @@ class APIMatcher:
         
         return semantic_matches / total_words if total_words > 0 else 0.0
     
-    def _calculate_phrase_match_confidence(self, perf_api: APIPerformanceProfile, 
-                                        source_api: DiscoveredAPI) -> float:
+    def _calculate_phrase_match_confidence(self, perf: EndpointFeatures, source: EndpointFeatures) -> float:
         """Calculate phrase-level matching confidence."""
-        perf_endpoint = perf_api.endpoint.lower().strip()
-        source_endpoint = source_api.endpoint.lower().strip()
-        
-        # Clean endpoints for better matching
-        perf_clean = self._clean_endpoint_for_matching(perf_endpoint)
-        source_clean = self._clean_endpoint_for_matching(source_endpoint)
-        
-        # Use the phrase similarity method we already have
-        return self._calculate_phrase_similarity(perf_clean, source_clean)
+        # The cleaned endpoints (see _clean_endpoint_for_matching) are part of the feature records
+        return self._calculate_phrase_similarity(perf, source)
     
     def _calculate_framework_match_confidence(self, perf_api: APIPerformanceProfile, 
                                             source_api: DiscoveredAPI) -> float:
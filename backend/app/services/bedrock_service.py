@@ -1,24 +1,190 @@
 """
 AWS Bedrock service for AI-powered analysis summaries.
+
+Answers are cached per (model, temperature, max_tokens, prompt), in memory and
+in the persistent cache store, so re-analysing an unchanged file or report does
+not pay for the same model call again.
 """
 import json
+import time
+import asyncio
+import hashlib
 import logging
 import os
+import random
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
 import boto3
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 from botocore.config import Config
-from botocore.exceptions import ClientError, BotoCoreError
+from botocore.exceptions import (
+    BotoCoreError, ClientError, ConnectionClosedError, EndpointConnectionError, ReadTimeoutError
+)
 from app.models.schemas import PerformanceAnalysis
 from app.models.config import Settings
+from app.utils.concurrency_limit import ConcurrencyLimit
+from app.utils.rate_limiter import AdaptiveRateLimiter
 
 logger = logging.getLogger(__name__)
 
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+# Error codes of calls rejected because a request or token quota of the account was exceeded
+THROTTLING_ERROR_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException'}
+
+# Error codes of calls that failed on the service side and may succeed when sent again
+TRANSIENT_ERROR_CODES = {'ServiceUnavailableException', 'InternalServerException', 'ModelNotReadyException'}
+
+# Attempts per model call; retries happen here rather than in botocore, so each one waits for the rate limiter
+MAX_CALL_ATTEMPTS = 2
+
+# Rough prompt size per token for English text and code, for the tokens-per-minute limit
+CHARS_PER_TOKEN = 4
+
+
+def _error_code(error: Exception) -> str:
+    """Code of a botocore ClientError in UpperCamelCase (stream errors use lowerCamelCase codes), or ''."""
+    if not isinstance(error, ClientError):
+        return ''
+    code = error.response.get('Error', {}).get('Code', '')
+    return code[:1].upper() + code[1:]
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Check whether a botocore error is a throttling response."""
+    return _error_code(error) in THROTTLING_ERROR_CODES
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check whether a failed model call is worth sending again (throttled, transient or a dropped connection)."""
+    return _error_code(error) in THROTTLING_ERROR_CODES | TRANSIENT_ERROR_CODES \
+        or isinstance(error, (EndpointConnectionError, ConnectionClosedError, ReadTimeoutError))
+
+# Set for the duration of a request made with cache=bypass: answers are regenerated and replace cached ones
+_bypass_response_cache: ContextVar[bool] = ContextVar('bypass_response_cache', default=False)
+
+
+@contextmanager
+def bypass_response_cache(enabled: bool = True):
+    """Make Bedrock calls inside the block skip cached answers (and refresh them)."""
+    token = _bypass_response_cache.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass_response_cache.reset(token)
+
+
+class BedrockThrottlingError(RuntimeError):
+    """A Bedrock call was throttled; callers may retry it after slowing down."""
+
+
+class BedrockResponseCache:
+    """Model answers per prompt hash, in an in-memory LRU backed by an optional persistent cache store."""
+    NAMESPACE = 'bedrock_responses'
+
+    def __init__(self, store=None, max_entries: int = 500, ttl_seconds: Optional[float] = None):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at or None, answer)
+        self._entries: 'OrderedDict[str, Tuple[Optional[float], str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {'memory_hits': 0, 'store_hits': 0, 'misses': 0, 'bypassed': 0, 'stored': 0}
+
+    @staticmethod
+    def key(model_id: str, temperature: float, max_tokens: int, prompt: str) -> str:
+        """Hash of everything that determines the model's answer."""
+        request = json.dumps([ANTHROPIC_VERSION, model_id, temperature, max_tokens, prompt])
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer for a key from memory, then from the store, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, answer = entry
+                if expires_at is None or expires_at >= time.time():
+                    self._entries.move_to_end(key)
+                    self._counts['memory_hits'] += 1
+                    return answer
+                del self._entries[key]
+
+        stored = self.store.get(self.NAMESPACE, key) if self.store is not None else None
+        if isinstance(stored, dict) and isinstance(stored.get('answer'), str):
+            self._remember(key, stored.get('expires_at'), stored['answer'])
+            self._count('store_hits')
+            return stored['answer']
+        self._count('misses')
+        return None
+
+    def put(self, key: str, answer: str):
+        """Cache an answer in memory and in the store."""
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        self._remember(key, expires_at, answer)
+        self._count('stored')
+        if self.store is not None:
+            self.store.put(self.NAMESPACE, key, {'answer': answer, 'expires_at': expires_at},
+                           ttl_seconds=self.ttl_seconds)
+
+    def record_bypass(self):
+        """Count a call that skipped the cache because of cache=bypass."""
+        self._count('bypassed')
+
+    def _remember(self, key: str, expires_at: Optional[float], answer: str):
+        with self._lock:
+            self._entries[key] = (expires_at, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit counts and hit rate since startup (bypassed calls are not lookups)."""
+        with self._lock:
+            counts = dict(self._counts)
+            entries = len(self._entries)
+        hits = counts['memory_hits'] + counts['store_hits']
+        lookups = hits + counts['misses']
+        return {
+            **counts,
+            'hits': hits,
+            'lookups': lookups,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': entries,
+            'max_memory_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'persistent': self.store is not None
+        }
+
 
 class BedrockService:
-    """Service for interacting with AWS Bedrock."""
+    """Service for interacting with AWS Bedrock.
     
-    def __init__(self, settings: Settings):
+    Synchronous methods use a boto3 client and are meant for worker threads; async handlers await the
+    a-prefixed methods, which use an aiobotocore client of the running event loop. Both kinds of call
+    share one limit on in-flight model calls and one requests/tokens per minute limiter, which slows
+    down when Bedrock throttles.
+    """
+    
+    def __init__(self, settings: Settings, response_cache: Optional[BedrockResponseCache] = None):
         self.settings = settings
         self.bedrock_client = None
+        self.response_cache = response_cache
+        self.call_limit = ConcurrencyLimit(getattr(settings, 'bedrock_max_concurrency', 4))
+        self.rate_limiter = AdaptiveRateLimiter(getattr(settings, 'bedrock_requests_per_minute', 0),
+                                                getattr(settings, 'bedrock_tokens_per_minute', 0))
+        # (config options, client arguments) shared by the sync and async clients
+        self._client_args: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+        # Per event loop, the task opening its async client: a client is bound to the loop it was opened on
+        self._async_clients: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._async_clients_lock = threading.Lock()
         self._initialize_client()
     
     def _initialize_client(self):
@@ -78,17 +244,19 @@ class BedrockService:
             # Configure timeouts for Bedrock requests
             # Note: API Gateway has a 30-second timeout, but Lambda Function URLs support 900s
             # Each Bedrock call should complete in reasonable time for multiple APIs
-            boto_config = Config(
+            config_options = dict(
                 connect_timeout=10,
                 read_timeout=60,  # 60 seconds per Bedrock call - reasonable for complex analysis
-                retries={'max_attempts': 2, 'mode': 'adaptive'}
+                # No botocore retries: _invoke_model retries through the shared rate limiter instead
+                retries={'total_max_attempts': 1, 'mode': 'standard'}
             )
             
             self.bedrock_client = boto3.client(
                 'bedrock-runtime',
-                config=boto_config,
+                config=Config(**config_options),
                 **bedrock_config
             )
+            self._client_args = (config_options, bedrock_config)
             logger.info("Bedrock client initialized successfully with timeout configuration")
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock client: {str(e)}", exc_info=True)
@@ -102,64 +270,243 @@ class BedrockService:
             )
             self.bedrock_client = None
     
-    def generate_summary_from_prompt(self, prompt: str) -> str:
-        """Generate response from custom prompt using AWS Bedrock. Raises exceptions on failure instead of returning fallback."""
-        if not self.bedrock_client:
-            error_msg = "Bedrock client not available. Check AWS credentials and configuration."
-            logger.error(error_msg)
-            raise RuntimeError(error_msg)
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """Response cache key of a prompt, or None when the cache is off."""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.key(self.settings.bedrock_model_id, self.settings.temperature,
+                                       self.settings.max_tokens, prompt)
+
+    def _cached_response(self, key: Optional[str]) -> Optional[str]:
+        """Cached answer for a cache key, unless the request bypasses the cache (the fresh answer replaces it)."""
+        if key is None:
+            return None
+        if _bypass_response_cache.get():
+            self.response_cache.record_bypass()
+            return None
+        return self.response_cache.get(key)
+
+    def _request_body(self, prompt: str) -> str:
+        return json.dumps({
+            "anthropic_version": ANTHROPIC_VERSION,
+            "max_tokens": self.settings.max_tokens,
+            "temperature": self.settings.temperature,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        })
+
+    @staticmethod
+    def _chunk_text(event: Dict[str, Any]) -> Optional[str]:
+        """Text delta carried by one event of a response stream, if any."""
+        chunk = json.loads(event['chunk']['bytes'].decode('utf-8'))
+        if 'delta' in chunk and 'text' in chunk['delta']:
+            return chunk['delta']['text']
+        return None
+
+    def _estimated_tokens(self, prompt: str) -> int:
+        """Tokens a call is charged against the per-minute quota: the prompt's plus the max_tokens reserved."""
+        return len(prompt) // CHARS_PER_TOKEN + self.settings.max_tokens
+
+    def _record_outcome(self, error: Optional[Exception], epoch: int):
+        """Let the rate limiter speed up after a success or slow down after throttling."""
+        if error is None:
+            self.rate_limiter.record_success()
+        elif is_throttling_error(error):
+            self.rate_limiter.record_throttle(epoch)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before sending a failed call again, or None if it should not be retried."""
+        if attempt + 1 >= MAX_CALL_ATTEMPTS or not is_retryable_error(error):
+            return None
+        # The rate limiter already slowed down for a throttled call; other failures back off with jitter
+        delay = 0.0 if is_throttling_error(error) else random.uniform(0, 2 ** attempt)
+        logger.warning(f"Bedrock call failed ({_error_code(error) or type(error).__name__}), retrying in {delay:.2f}s")
+        return delay
+
+    def _invoke_model(self, prompt: str) -> Tuple[str, int]:
+        """Stream the model's answer to a prompt; returns the text and the number of chunks.
+
+        Every attempt, retries included, waits for the shared rate limiter and holds an in-flight slot.
+        """
+        for attempt in range(MAX_CALL_ATTEMPTS):
+            epoch = self.rate_limiter.acquire(self._estimated_tokens(prompt))
+            try:
+                with self.call_limit.slot():
+                    response = self.bedrock_client.invoke_model_with_response_stream(
+                        modelId=self.settings.bedrock_model_id,
+                        body=self._request_body(prompt),
+                        contentType='application/json',
+                        accept='application/json'
+                    )
+
+                    texts = []
+                    for event in response['body']:
+                        text = self._chunk_text(event)
+                        if text is not None:
+                            texts.append(text)
+            except Exception as e:
+                self._record_outcome(e, epoch)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._record_outcome(None, epoch)
+            return ''.join(texts), len(texts)
+
+    async def _get_async_client(self):
+        """aiobotocore client of the running event loop, opened on first use.
         
-        try:
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": self.settings.max_tokens,
-                "temperature": self.settings.temperature,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
+        Each loop gets its own client. Clients left open by loops that have closed since cannot be
+        closed any more, so they are only dropped.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            for stale_loop in [other for other in self._async_clients if other.is_closed()]:
+                logger.warning("Dropping the async Bedrock client of a closed event loop (it was not closed with aclose)")
+                del self._async_clients[stale_loop]
+            task = self._async_clients.get(loop)
+            if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+                self._async_clients[loop] = task = loop.create_task(self._open_async_client())
+        # Shielded: a cancelled call must not cancel the client other calls are waiting for
+        client, _ = await asyncio.shield(task)
+        return client
 
-            logger.info(f"Invoking Bedrock model {self.settings.bedrock_model_id} with prompt length {len(prompt)} chars")
-            response = self.bedrock_client.invoke_model_with_response_stream(
-                modelId=self.settings.bedrock_model_id,
-                body=body,
-                contentType='application/json',
-                accept='application/json'
-            )
+    async def _open_async_client(self):
+        config_options, client_kwargs = self._client_args
+        context = get_session().create_client('bedrock-runtime', config=AioConfig(**config_options), **client_kwargs)
+        client = await context.__aenter__()
+        logger.info("Async Bedrock client initialized")
+        return client, context
 
-            completion_text = ""
-            chunk_count = 0
-            for event in response['body']:
-                chunk = json.loads(event['chunk']['bytes'].decode('utf-8'))
-                if 'delta' in chunk and 'text' in chunk['delta']:
-                    completion_text += chunk['delta']['text']
-                    chunk_count += 1
-            
-            if not completion_text:
-                error_msg = "Bedrock returned empty response"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
-            
-            logger.info(f"Bedrock response received: {len(completion_text)} chars in {chunk_count} chunks")
-            return completion_text
-            
-        except ClientError as e:
+    @staticmethod
+    async def _close_async_client(task: asyncio.Task):
+        """Close the client opened by task, on the task's own loop."""
+        await asyncio.wait([task])
+        if task.cancelled() or task.exception() is not None:
+            return
+        _, context = task.result()
+        await context.__aexit__(None, None, None)
+
+    async def aclose(self):
+        """Close the async clients (on application shutdown), each on the event loop it was opened on."""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            clients, self._async_clients = self._async_clients, {}
+        for client_loop, task in clients.items():
+            if client_loop is loop:
+                await self._close_async_client(task)
+            elif client_loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._close_async_client(task), client_loop))
+
+    async def _ainvoke_model(self, prompt: str) -> Tuple[str, int]:
+        """Async _invoke_model: the request and the stream are awaited without blocking the event loop."""
+        client = await self._get_async_client()
+        for attempt in range(MAX_CALL_ATTEMPTS):
+            epoch = await self.rate_limiter.aacquire(self._estimated_tokens(prompt))
+            try:
+                async with self.call_limit.aslot():
+                    response = await client.invoke_model_with_response_stream(
+                        modelId=self.settings.bedrock_model_id,
+                        body=self._request_body(prompt),
+                        contentType='application/json',
+                        accept='application/json'
+                    )
+
+                    texts = []
+                    async for event in response['body']:
+                        text = self._chunk_text(event)
+                        if text is not None:
+                            texts.append(text)
+            except Exception as e:
+                self._record_outcome(e, epoch)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._record_outcome(None, epoch)
+            return ''.join(texts), len(texts)
+
+    def _call_error(self, e: Exception) -> RuntimeError:
+        """Log a failed model call and convert it to the RuntimeError callers handle."""
+        if isinstance(e, ClientError):
             error_code = e.response.get('Error', {}).get('Code', 'Unknown')
             error_msg = e.response.get('Error', {}).get('Message', str(e))
+            if is_throttling_error(e):
+                logger.warning(f"Bedrock throttled [{error_code}]: {error_msg}")
+                return BedrockThrottlingError(f"Bedrock API error [{error_code}]: {error_msg}")
             logger.error(f"Bedrock ClientError [{error_code}]: {error_msg}", exc_info=True)
-            raise RuntimeError(f"Bedrock API error [{error_code}]: {error_msg}") from e
-        except BotoCoreError as e:
+            return RuntimeError(f"Bedrock API error [{error_code}]: {error_msg}")
+        if isinstance(e, BotoCoreError):
             logger.error(f"Bedrock BotoCoreError: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Bedrock connection error: {str(e)}") from e
-        except json.JSONDecodeError as e:
+            return RuntimeError(f"Bedrock connection error: {str(e)}")
+        if isinstance(e, json.JSONDecodeError):
             logger.error(f"Failed to parse Bedrock response: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Invalid Bedrock response format: {str(e)}") from e
+            return RuntimeError(f"Invalid Bedrock response format: {str(e)}")
+        logger.error(f"Unexpected Bedrock error: {type(e).__name__}: {str(e)}", exc_info=True)
+        return RuntimeError(f"Unexpected Bedrock error: {str(e)}")
+
+    def _check_client(self):
+        if not self.bedrock_client:
+            error_msg = "Bedrock client not available. Check AWS credentials and configuration."
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+    @staticmethod
+    def _check_completion(completion_text: str, chunk_count: int):
+        if not completion_text:
+            error_msg = "Bedrock returned empty response"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        logger.info(f"Bedrock response received: {len(completion_text)} chars in {chunk_count} chunks")
+
+    def generate_summary_from_prompt(self, prompt: str) -> str:
+        """Generate response from custom prompt using AWS Bedrock. Raises exceptions on failure instead of returning fallback."""
+        self._check_client()
+        
+        cache_key = self._cache_key(prompt)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            logger.info(f"Bedrock response served from cache: {len(cached)} chars for prompt length {len(prompt)} chars")
+            return cached
+        
+        try:
+            logger.info(f"Invoking Bedrock model {self.settings.bedrock_model_id} with prompt length {len(prompt)} chars")
+            completion_text, chunk_count = self._invoke_model(prompt)
+        except Exception as e:
+            raise self._call_error(e) from e
+        self._check_completion(completion_text, chunk_count)
+        
+        if cache_key is not None:
+            self.response_cache.put(cache_key, completion_text)
+        return completion_text
+
+    async def agenerate_summary_from_prompt(self, prompt: str) -> str:
+        """Async generate_summary_from_prompt for request handlers; raises RuntimeError on failure."""
+        self._check_client()
+        
+        cache_key = self._cache_key(prompt)
+        # The cache store may be remote (DynamoDB), so lookups run off the event loop
+        cached = await asyncio.to_thread(self._cached_response, cache_key) if cache_key is not None else None
+        if cached is not None:
+            logger.info(f"Bedrock response served from cache: {len(cached)} chars for prompt length {len(prompt)} chars")
+            return cached
+        
+        try:
+            logger.info(f"Invoking Bedrock model {self.settings.bedrock_model_id} with prompt length {len(prompt)} chars")
+            completion_text, chunk_count = await self._ainvoke_model(prompt)
         except Exception as e:
-            logger.error(f"Unexpected Bedrock error: {type(e).__name__}: {str(e)}", exc_info=True)
-            raise RuntimeError(f"Unexpected Bedrock error: {str(e)}") from e
+            raise self._call_error(e) from e
+        self._check_completion(completion_text, chunk_count)
+        
+        if cache_key is not None:
+            await asyncio.to_thread(self.response_cache.put, cache_key, completion_text)
+        return completion_text
 
     def generate_summary(self, analysis: PerformanceAnalysis) -> str:
         """Generate a summary of the analysis results using AWS Bedrock."""
@@ -168,32 +515,48 @@ class BedrockService:
                 logger.warning("Bedrock client not available, using fallback summary")
                 return self._generate_fallback_summary(analysis)
             
+            prompt = self._build_prompt(analysis)
+            cache_key = self._cache_key(prompt)
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                logger.info("Bedrock summary served from cache")
+                return cached
+            
             try:
-                body = json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": self.settings.max_tokens,
-                    "temperature": self.settings.temperature,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": self._build_prompt(analysis)
-                        }
-                    ]
-                })
+                completion_text, _ = self._invoke_model(prompt)
+                if not completion_text:
+                    return 'No summary generated'
+                if cache_key is not None:
+                    self.response_cache.put(cache_key, completion_text)
+                return completion_text
+            except ClientError as e:
+                logger.error(f"Bedrock error: {str(e)}")
+                return self._generate_fallback_summary(analysis)
+        except Exception as e:
+            logger.error(f"Unexpected Bedrock error: {str(e)}")
+            return self._generate_fallback_summary(analysis)
 
-                response = self.bedrock_client.invoke_model_with_response_stream(
-                    modelId=self.settings.bedrock_model_id,
-                    body=body,
-                    contentType='application/json',
-                    accept='application/json'
-                )
-
-                completion_text = ""
-                for event in response['body']:
-                    chunk = json.loads(event['chunk']['bytes'].decode('utf-8'))
-                    if 'delta' in chunk and 'text' in chunk['delta']:
-                        completion_text += chunk['delta']['text']
-                return completion_text if completion_text else 'No summary generated'
+    async def agenerate_summary(self, analysis: PerformanceAnalysis) -> str:
+        """Async generate_summary for request handlers; falls back to a generated summary on failure."""
+        try:
+            if not self.bedrock_client:
+                logger.warning("Bedrock client not available, using fallback summary")
+                return self._generate_fallback_summary(analysis)
+            
+            prompt = self._build_prompt(analysis)
+            cache_key = self._cache_key(prompt)
+            cached = await asyncio.to_thread(self._cached_response, cache_key) if cache_key is not None else None
+            if cached is not None:
+                logger.info("Bedrock summary served from cache")
+                return cached
+            
+            try:
+                completion_text, _ = await self._ainvoke_model(prompt)
+                if not completion_text:
+                    return 'No summary generated'
+                if cache_key is not None:
+                    await asyncio.to_thread(self.response_cache.put, cache_key, completion_text)
+                return completion_text
             except ClientError as e:
                 logger.error(f"Bedrock error: {str(e)}")
                 return self._generate_fallback_summary(analysis)
@@ -0,0 +1,285 @@
+"""
+Persistent key-value store for analysis caches and indexes.
+
+SQLite keeps a single server's cache in a local file; DynamoDB shares it
+between instances and survives Lambda container recycling.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCacheStore:
+    """Namespaced JSON key-value store backed by a local SQLite file."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(tempfile.gettempdir(), 'report_analysis_cache.db')
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'namespace TEXT NOT NULL, '
+                'cache_key TEXT NOT NULL, '
+                'value TEXT NOT NULL, '
+                'expires_at REAL, '
+                'PRIMARY KEY (namespace, cache_key))'
+            )
+            self._connection.commit()
+        logger.info(f"Using SQLite cache store at {self.db_path}")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Get a value, or None if it is missing or expired."""
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    'SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND cache_key = ?',
+                    (namespace, key)
+                ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self.delete(namespace, key)
+                return None
+            return json.loads(value)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {namespace}/{key}: {str(e)}")
+            return None
+
+    def put(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Store a JSON-serializable value, optionally expiring after ttl_seconds."""
+        try:
+            expires_at = time.time() + ttl_seconds if ttl_seconds else None
+            with self._lock:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO cache_entries (namespace, cache_key, value, expires_at) VALUES (?, ?, ?, ?)',
+                    (namespace, key, json.dumps(value, default=str), expires_at)
+                )
+                self._connection.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache write failed for {namespace}/{key}: {str(e)}")
+            return False
+
+    # Keys per SELECT, under SQLite's limit on bound parameters
+    READ_BATCH_SIZE = 500
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values at once, leaving missing and expired keys out."""
+        keys = list(keys)
+        found = {}
+        try:
+            now = time.time()
+            for start in range(0, len(keys), self.READ_BATCH_SIZE):
+                batch = keys[start:start + self.READ_BATCH_SIZE]
+                with self._lock:
+                    rows = self._connection.execute(
+                        'SELECT cache_key, value, expires_at FROM cache_entries '
+                        f'WHERE namespace = ? AND cache_key IN ({", ".join("?" * len(batch))})',
+                        (namespace, *batch)
+                    ).fetchall()
+                for key, value, expires_at in rows:
+                    if expires_at is None or expires_at >= now:
+                        found[key] = json.loads(value)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {len(keys)} keys of {namespace}: {str(e)}")
+        return found
+
+    def put_many(self, namespace: str, values: Dict[str, Any], ttl_seconds: Optional[float] = None) -> bool:
+        """Store several JSON-serializable values in one transaction, optionally expiring after ttl_seconds."""
+        try:
+            expires_at = time.time() + ttl_seconds if ttl_seconds else None
+            rows = [(namespace, key, json.dumps(value, default=str), expires_at) for key, value in values.items()]
+            with self._lock:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO cache_entries (namespace, cache_key, value, expires_at) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+                self._connection.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache write failed for {len(values)} keys of {namespace}: {str(e)}")
+            return False
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """Delete a value."""
+        try:
+            with self._lock:
+                self._connection.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? AND cache_key = ?',
+                    (namespace, key)
+                )
+                self._connection.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {namespace}/{key}: {str(e)}")
+            return False
+
+
+class DynamoDBCacheStore:
+    """Namespaced JSON key-value store backed by a DynamoDB table, with zlib-compressed values."""
+
+    # DynamoDB rejects items over 400 KB
+    MAX_VALUE_BYTES = 390 * 1024
+
+    def __init__(self, dynamodb_service, table_name: str = 'report-analysis-cache'):
+        self.table_name = table_name
+        self.dynamodb = dynamodb_service.dynamodb
+        self.table = self.dynamodb.Table(table_name)
+        self._create_table_if_not_exists()
+        logger.info(f"Using DynamoDB cache store in table {table_name}")
+
+    def _create_table_if_not_exists(self):
+        """Create the cache table (namespace + key, expiring through DynamoDB TTL) if it doesn't exist."""
+        try:
+            self.table.load()
+        except Exception:
+            try:
+                table = self.dynamodb.create_table(
+                    TableName=self.table_name,
+                    KeySchema=[
+                        {'AttributeName': 'namespace', 'KeyType': 'HASH'},
+                        {'AttributeName': 'cache_key', 'KeyType': 'RANGE'}
+                    ],
+                    AttributeDefinitions=[
+                        {'AttributeName': 'namespace', 'AttributeType': 'S'},
+                        {'AttributeName': 'cache_key', 'AttributeType': 'S'}
+                    ],
+                    BillingMode='PAY_PER_REQUEST'
+                )
+                table.wait_until_exists()
+                self.dynamodb.meta.client.update_time_to_live(
+                    TableName=self.table_name,
+                    TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'}
+                )
+                logger.info(f"Table {self.table_name} created successfully")
+            except Exception as e:
+                logger.warning(f"Could not create cache table {self.table_name}: {str(e)}")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Get a value, or None if it is missing or expired."""
+        try:
+            item = self.table.get_item(Key={'namespace': namespace, 'cache_key': key}).get('Item')
+            return self._value(item) if item is not None else None
+        except Exception as e:
+            logger.warning(f"Cache read failed for {namespace}/{key}: {str(e)}")
+            return None
+
+    def _item(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float]) -> Optional[Dict[str, Any]]:
+        """The table item of a value, or None (logged) if it is too large for DynamoDB."""
+        data = zlib.compress(json.dumps(value, default=str).encode('utf-8'))
+        if len(data) > self.MAX_VALUE_BYTES:
+            logger.warning(f"Cache value for {namespace}/{key} is too large for DynamoDB ({len(data)} bytes compressed)")
+            return None
+        item = {'namespace': namespace, 'cache_key': key, 'value': data}
+        if ttl_seconds:
+            item['expires_at'] = int(time.time() + ttl_seconds)
+        return item
+
+    @staticmethod
+    def _value(item: Dict[str, Any]) -> Optional[Any]:
+        """Decoded value of a table item, or None if it has expired."""
+        # TTL deletion is lazy, so expiry is checked on read as well
+        expires_at = item.get('expires_at')
+        if expires_at is not None and float(expires_at) < time.time():
+            return None
+        return json.loads(zlib.decompress(bytes(item['value'])).decode('utf-8'))
+
+    def put(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Store a JSON-serializable value, optionally expiring after ttl_seconds."""
+        try:
+            item = self._item(namespace, key, value, ttl_seconds)
+            if item is None:
+                return False
+            self.table.put_item(Item=item)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache write failed for {namespace}/{key}: {str(e)}")
+            return False
+
+    # Keys per BatchGetItem request, DynamoDB's limit
+    READ_BATCH_SIZE = 100
+    # Rounds of retrying keys DynamoDB left unprocessed (throttling) before giving up on them
+    MAX_UNPROCESSED_RETRIES = 3
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values with BatchGetItem, leaving missing and expired keys out."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        try:
+            for start in range(0, len(keys), self.READ_BATCH_SIZE):
+                request = {self.table_name: {
+                    'Keys': [{'namespace': namespace, 'cache_key': key} for key in keys[start:start + self.READ_BATCH_SIZE]]
+                }}
+                for attempt in range(self.MAX_UNPROCESSED_RETRIES + 1):
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        value = self._value(item)
+                        if value is not None:
+                            found[item['cache_key']] = value
+                    request = response.get('UnprocessedKeys') or {}
+                    if not request:
+                        break
+                    time.sleep(0.1 * 2 ** attempt)
+                if request:
+                    logger.warning(f"Cache read of {namespace} left {len(request[self.table_name]['Keys'])} keys unprocessed")
+        except Exception as e:
+            logger.warning(f"Cache read failed for {len(keys)} keys of {namespace}: {str(e)}")
+        return found
+
+    def put_many(self, namespace: str, values: Dict[str, Any], ttl_seconds: Optional[float] = None) -> bool:
+        """Store several JSON-serializable values with batched writes, optionally expiring after ttl_seconds.
+
+        Returns False if any value was too large or the writes failed.
+        """
+        try:
+            stored_all = True
+            # The batch writer sends 25 items per request and resends the ones DynamoDB leaves unprocessed
+            with self.table.batch_writer() as batch:
+                for key, value in values.items():
+                    item = self._item(namespace, key, value, ttl_seconds)
+                    if item is None:
+                        stored_all = False
+                        continue
+                    batch.put_item(Item=item)
+            return stored_all
+        except Exception as e:
+            logger.warning(f"Cache write failed for {len(values)} keys of {namespace}: {str(e)}")
+            return False
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """Delete a value."""
+        try:
+            self.table.delete_item(Key={'namespace': namespace, 'cache_key': key})
+            return True
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {namespace}/{key}: {str(e)}")
+            return False
+
+
+def create_cache_store(settings, dynamodb_service=None):
+    """Create the cache store selected by CACHE_BACKEND, falling back to SQLite when DynamoDB is unavailable."""
+    if getattr(settings, 'cache_backend', 'sqlite') == 'dynamodb':
+        try:
+            if dynamodb_service is None:
+                from app.services.dynamodb_service import DynamoDBService
+                dynamodb_service = DynamoDBService(
+                    endpoint_url=getattr(settings, 'dynamodb_endpoint_url', None),
+                    region_name=getattr(settings, 'aws_region', 'us-east-1')
+                )
+            return DynamoDBCacheStore(dynamodb_service, getattr(settings, 'cache_table_name', 'report-analysis-cache'))
+        except Exception as e:
+            logger.warning(f"DynamoDB cache store unavailable, using SQLite: {str(e)}")
+    return SQLiteCacheStore(getattr(settings, 'cache_db_path', None))
@@ -0,0 +1,316 @@
+"""
+Producer/consumer pipeline for API discovery.
+
+Downloading files is I/O-bound while pattern and AST extraction is CPU-bound,
+so the two run as separate stages: an asyncio fetch stage with high
+concurrency feeds a bounded queue, and extraction consumers hand the files
+to a process pool shared by all discoveries. A full queue pauses the downloads (backpressure). AI
+fallback and validation need the Bedrock client and run back in the parent
+(unless disabled because an OpenAPI spec already lists the routes).
+
+Files are started in the order given (callers pass them best candidates
+first) until the time or byte budget runs out; the rest are skipped. Skipped
+files, including generated or minified ones rejected by extraction, are
+reported with their reason. Files whose fetch or extraction failed are kept
+out of the results, so callers can tell a partial scan from a complete one.
+"""
+import os
+import time
+import asyncio
+import logging
+import contextvars
+import threading
+import multiprocessing
+import aiohttp
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+from app.models.improvement_models import DiscoveredAPI
+from app.utils.file_classifier import SkippedSourceFile
+
+logger = logging.getLogger(__name__)
+
+# Files above this size use chunked extraction in the parent process
+CHUNKED_EXTRACTION_SIZE = 1024 * 1024
+
+# GitHubService of an extraction worker process, created once by the pool initializer
+_worker_service = None
+
+# Extraction process pool shared by every discovery, started on first use
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+
+def _init_extraction_worker(settings):
+    """Create the extraction service of a worker process.
+
+    It has no Bedrock client, and its cache store is only opened on first use, which extraction never makes.
+    """
+    global _worker_service
+    from app.services.github_service import GitHubService
+    _worker_service = GitHubService(settings)
+
+
+def _get_extraction_pool(workers: int, settings) -> ProcessPoolExecutor:
+    """The shared extraction process pool, starting it if needed.
+
+    Workers are spawned rather than forked: a fork of the server, which runs threads and event loops,
+    could copy locks held by other threads (logging, the helper loops) into a worker and deadlock it.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_extraction_worker,
+                initargs=(settings,)
+            )
+        return _extraction_pool
+
+
+def _discard_extraction_pool(pool: ProcessPoolExecutor):
+    """Forget a broken extraction pool so the next discovery starts a new one."""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False)
+
+
+def _extract_in_worker(content: str, file_path: str) -> Tuple[List[DiscoveredAPI], bool]:
+    """Run the CPU-bound extraction of one file inside a worker process."""
+    return _worker_service._extract_pattern_apis(content, file_path)
+
+
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.files = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+
+    def record(self, size: int, started: float):
+        """Count one file processed by the stage since started."""
+        finished = time.perf_counter()
+        self.files += 1
+        self.bytes += size
+        self.busy_seconds += finished - started
+        self.first_started = started if self.first_started is None else min(self.first_started, started)
+        self.last_finished = finished if self.last_finished is None else max(self.last_finished, finished)
+
+    def summary(self) -> str:
+        """One log line with the stage's files, volume and rate."""
+        if not self.files:
+            return f"{self.name}: idle"
+        wall = max(self.last_finished - self.first_started, 1e-6)
+        return (
+            f"{self.name}: {self.files} files, {self.bytes / (1024 * 1024):.2f} MB in {wall:.2f}s "
+            f"({self.files / wall:.1f} files/s, {self.bytes / (1024 * 1024) / wall:.2f} MB/s, busy {self.busy_seconds:.2f}s)"
+        )
+
+
+class DiscoveryPipeline:
+    """Fetches and extracts the API files of a repository source as a two-stage pipeline."""
+
+    def __init__(self, github_service, source, fetch_concurrency: int = 16, extract_workers: int = 0,
+                 queue_size: int = 32, time_budget_seconds: float = 0, byte_budget: int = 0,
+                 on_file_result: Optional[Callable[[str, List[DiscoveredAPI]], None]] = None,
+                 on_file_skipped: Optional[Callable[[str, str], None]] = None, use_ai: bool = True):
+        self.github_service = github_service
+        self.source = source
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.extract_workers = max(1, extract_workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size)
+        self.time_budget_seconds = time_budget_seconds
+        self.byte_budget = byte_budget
+        self.on_file_result = on_file_result
+        self.on_file_skipped = on_file_skipped
+        # Off when a spec already lists the routes and only pattern matches of the rest are wanted
+        self.use_ai = use_ai
+        self.skipped_files: Dict[str, str] = {}
+        self.failed_files: Dict[str, str] = {}
+        self.fetch_stats = StageStats('fetch')
+        self.extract_stats = StageStats('extract')
+        self.complete_stats = StageStats('ai/filter')
+
+    def run(self, api_files: List[Dict[str, Any]], prefetched_contents: Dict[str, str]) -> Dict[str, List[DiscoveredAPI]]:
+        """Process the files and return their APIs keyed by path in input order.
+
+        Files skipped by the budget and files that failed (listed in failed_files) are absent.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._run(api_files, prefetched_contents))
+
+        # Called from code already running an event loop (e.g. an async endpoint): use a helper thread,
+        # carrying the caller's context variables (such as a request's Bedrock cache bypass) over to it
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=1) as helper:
+            return helper.submit(context.run, asyncio.run, self._run(api_files, prefetched_contents)).result()
+
+    def _skip_file(self, file_path: str, reason: str):
+        """Record a file that was not scanned and report it to the caller."""
+        self.skipped_files[file_path] = reason
+        if self.on_file_skipped:
+            self.on_file_skipped(file_path, reason)
+
+    def _fail_file(self, file_path: str, reason: str):
+        """Record a file that could not be fetched or extracted (its APIs are unknown, unlike a skipped file's)."""
+        logger.warning(f"Error processing file {file_path}: {reason}")
+        self.failed_files[file_path] = reason
+
+    def _create_executor(self, file_count: int) -> Tuple[Executor, bool]:
+        """Get the shared extraction process pool, or a thread pool where processes are unavailable or not worth it."""
+        if self.extract_workers > 1 and file_count > self.extract_workers:
+            try:
+                return _get_extraction_pool(self.extract_workers, self.github_service.settings), True
+            except (OSError, NotImplementedError, ValueError) as e:
+                # e.g. AWS Lambda has no /dev/shm for multiprocessing semaphores
+                logger.warning(f"Process pool unavailable, extracting in threads: {str(e)}")
+        return ThreadPoolExecutor(max_workers=self.extract_workers), False
+
+    async def _run(self, api_files: List[Dict[str, Any]], prefetched_contents: Dict[str, str]) -> Dict[str, List[DiscoveredAPI]]:
+        file_results: Dict[str, List[DiscoveredAPI]] = {}
+        if not api_files:
+            return file_results
+
+        started = time.perf_counter()
+        deadline = started + self.time_budget_seconds if self.time_budget_seconds > 0 else None
+        scanned_bytes = 0
+        budget_reason = None
+        budget_skipped: List[str] = []
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        executor, use_processes = self._create_executor(len(api_files))
+        extract = _extract_in_worker if use_processes else self.github_service._extract_pattern_apis
+        consumer_count = self.extract_workers * 2 if use_processes else self.extract_workers
+        pending_files = iter(api_files)
+
+        def budget_exhausted() -> Optional[str]:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return f"time budget of {self.time_budget_seconds:g}s"
+            if self.byte_budget > 0 and scanned_bytes >= self.byte_budget:
+                return f"byte budget of {self.byte_budget / (1024 * 1024):.1f} MB"
+            return None
+
+        async def fetch(session: aiohttp.ClientSession):
+            nonlocal scanned_bytes, budget_reason
+            for file_info in pending_files:
+                file_path = file_info['path']
+                budget_reason = budget_reason or budget_exhausted()
+                if budget_reason:
+                    budget_skipped.append(file_path)
+                    self._skip_file(file_path, f"discovery {budget_reason} exhausted")
+                    continue
+                content = prefetched_contents.get(file_path)
+                if content is None:
+                    fetch_started = time.perf_counter()
+                    try:
+                        content = await self.source.fetch_file_content_async(file_path, session)
+                    except Exception as e:
+                        self._fail_file(file_path, f"fetch failed: {str(e)}")
+                        continue
+                    if content is None:
+                        self._fail_file(file_path, "fetch failed")
+                        continue
+                    self.fetch_stats.record(len(content), fetch_started)
+                if content:
+                    scanned_bytes += len(content)
+                    # Waits while the extraction stage is behind
+                    await queue.put((file_info, content))
+                else:
+                    file_results[file_path] = []
+
+        async def consume():
+            nonlocal executor, extract, use_processes
+            loop = asyncio.get_running_loop()
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                file_info, content = item
+                file_path = file_info['path']
+                try:
+                    extract_started = time.perf_counter()
+                    if file_info.get('size', 0) > CHUNKED_EXTRACTION_SIZE:
+                        logger.debug(f"Large file detected: {file_path} ({file_info['size']} bytes), using chunked processing")
+                        apis = await asyncio.to_thread(
+                            self.github_service._extract_apis_from_file_chunked, content, file_path
+                        )
+                        is_final = True
+                    else:
+                        try:
+                            apis, is_final = await loop.run_in_executor(executor, extract, content, file_path)
+                        except BrokenProcessPool:
+                            if use_processes:
+                                logger.warning("Extraction process pool broke, continuing in threads")
+                                _discard_extraction_pool(executor)
+                                executor = ThreadPoolExecutor(max_workers=self.extract_workers)
+                                extract = self.github_service._extract_pattern_apis
+                                use_processes = False
+                            apis, is_final = await loop.run_in_executor(executor, extract, content, file_path)
+                    self.extract_stats.record(len(content), extract_started)
+
+                    if not is_final:
+                        complete_started = time.perf_counter()
+                        apis = await asyncio.to_thread(
+                            self.github_service._complete_file_apis, apis, content, file_path, self.use_ai
+                        )
+                        self.complete_stats.record(len(content), complete_started)
+
+                    if apis:
+                        # Details are computed on first access, from the content kept here while it is cached
+                        self.github_service._bind_api_details(apis, self.source, file_info.get('sha'), content)
+                        logger.info(f"Found {len(apis)} APIs in {file_path}")
+                        if self.on_file_result:
+                            self.on_file_result(file_path, apis)
+                    else:
+                        logger.debug(f"No APIs found in {file_path}")
+                    file_results[file_path] = apis
+                except SkippedSourceFile as e:
+                    # Generated or minified: rejected for good, so it counts as scanned (with no APIs)
+                    logger.warning(f"Skipped {file_path}: {str(e)}")
+                    file_results[file_path] = []
+                    self._skip_file(file_path, str(e))
+                except Exception as e:
+                    self._fail_file(file_path, f"extraction failed: {str(e)}")
+
+        try:
+            consumers = [asyncio.create_task(consume()) for _ in range(consumer_count)]
+            async with aiohttp.ClientSession() as session:
+                await asyncio.gather(*(fetch(session) for _ in range(self.fetch_concurrency)))
+            for _ in consumers:
+                await queue.put(None)
+            await asyncio.gather(*consumers)
+        finally:
+            # The process pool is shared and outlives this run
+            if not use_processes:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        if self.failed_files:
+            logger.warning(
+                f"Discovery for {self.source.describe()} could not scan {len(self.failed_files)} files: "
+                f"{list(self.failed_files)[:10]}..."
+            )
+        if budget_skipped:
+            logger.warning(
+                f"Discovery for {self.source.describe()} reached its {budget_reason}: scanned {len(file_results)} "
+                f"of {len(api_files)} files, skipped lowest priority {budget_skipped[:10]}..."
+            )
+        logger.info(
+            f"Discovery pipeline for {self.source.describe()}: {len(file_results)} files in {elapsed:.2f}s "
+            f"({len(file_results) / max(elapsed, 1e-6):.1f} files/s, "
+            f"{self.extract_workers} {'processes' if use_processes else 'threads'}, "
+            f"fetch concurrency {self.fetch_concurrency}, queue {self.queue_size})"
+        )
+        for stats in (self.fetch_stats, self.extract_stats, self.complete_stats):
+            logger.info(f"  {stats.summary()}")
+        return {file_info['path']: file_results[file_info['path']] for file_info in api_files
+                if file_info['path'] in file_results}
@@ -9,20 +9,164 @@ import time
 import random
 import asyncio
 import aiohttp
-import multiprocessing
-from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
+import queue
+import tarfile
+import threading
+import contextvars
+from collections import OrderedDict
+from functools import partial
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Callable, Set
 from app.models.improvement_models import DiscoveredAPI, SeverityLevel
 from app.models.config import Settings
+from app.services.cache_store import create_cache_store
+from app.services.route_patterns import get_route_scanner
+from app.services.python_routes import extract_python_routes
+from app.services.discovery_pipeline import DiscoveryPipeline
+from app.services import openapi_spec
+from app.utils.source_index import SourceFileIndex
+from app.utils.file_classifier import classify_source, SkippedSourceFile
+from app.utils.path_filter import IgnoreRules, PathFilter, compile_substrings, file_extension, is_ignore_file
+from app.services.repository_source import (
+    RepositorySource, GitHubRepositorySource, LocalRepositorySource, SKIPPED_DIRECTORIES
+)
 
 logger = logging.getLogger(__name__)
 
+# Path and name signals used to scan the most likely API files first (substring, weight)
+API_FILE_PRIORITY_SIGNALS = [
+    # Directories that hold route definitions
+    ('controllers/', 40), ('routes/', 40), ('routers/', 40), ('handlers/', 35),
+    ('endpoints/', 35), ('views/', 25), ('resources/', 20), ('api/', 20),
+    # File names of route definitions
+    ('controller.', 40), ('urls.py', 40), ('views.py', 35), ('routes.', 35),
+    ('router.', 35), ('endpoints.', 35), ('handler', 25), ('route', 20),
+    ('endpoint', 20), ('viewsets.py', 20), ('resource.', 15), ('api', 10),
+    # Application entry points
+    ('main.', 10), ('app.', 10), ('server.', 10), ('index.', 5),
+]
+
+# Paths of dependencies, build output, tests, assets and configuration, never scanned for APIs
+API_FILE_SKIP_PATTERNS = [
+    # Version control and IDE
+    '.git/', '.svn/', '.hg/', '.bzr/', '.idea/', '.vscode/', '.vs/',
+
+    # Package managers and dependencies
+    'node_modules/', 'bower_components/', 'vendor/', 'packages/',
+    '__pycache__/', '.pytest_cache/', '.mypy_cache/', '.coverage/',
+
+    # Virtual environments and build artifacts
+    'venv/', 'env/', '.venv/', '.env/', 'virtualenv/', 'conda/',
+    'bin/', 'obj/', 'target/', 'build/', 'dist/', 'out/', 'release/',
+
+    # Testing and documentation
+    'test/', 'tests/', 'spec/', 'specs/', '__tests__/', 'test_',
+    'docs/', 'documentation/', 'doc/', 'wiki/', 'examples/',
+
+    # Static assets and resources
+    'assets/', 'static/', 'public/', 'resources/', 'media/', 'images/',
+    'css/', 'scss/', 'sass/', 'less/', 'fonts/', 'icons/',
+
+    # Configuration and environment
+    'config/', 'conf/', 'settings/', 'secrets/', '.config/',
+    '.env', '.env.local', '.env.production', '.env.development',
+
+    # Lock files and manifests
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'composer.lock',
+    'poetry.lock', 'Pipfile.lock', 'Gemfile.lock', 'Cargo.lock',
+
+    # Build and dependency files
+    'pom.xml', 'build.gradle', 'build.xml', 'Makefile', 'CMakeLists.txt',
+    'requirements.txt', 'Pipfile', 'setup.py', 'pyproject.toml',
+    'package.json', 'composer.json', 'Gemfile', 'Cargo.toml',
+
+    # System and temporary files
+    '.DS_Store', '.Thumbs.db', 'Thumbs.db', '.directory',
+    '*.tmp', '*.temp', '*.log', '*.cache', '*.pid',
+
+    # File extensions to skip (excluding .py files which may contain APIs)
+    '.json', '.xml', '.yml', '.yaml', '.md', '.txt', '.log', '.lock',
+    '.min.js', '.min.css', '.map', '.bundle', '.chunk',
+
+    # Framework-specific non-API files (be more specific)
+    'migrations/', 'seeds/', 'fixtures/', 'templates/', 'layouts/',
+    'components/', 'widgets/', 'mixins/',
+
+    # Database and data files
+    'data/', 'database/', 'db/', 'sql/', 'migrations/',
+    '*.db', '*.sqlite', '*.sqlite3', '*.db3',
+
+    # Backup and temporary directories
+    'backup/', 'backups/', 'tmp/', 'temp/', 'cache/', 'logs/',
+    '*.bak', '*.backup', '*.old', '*.orig'
+]
+
+# Early termination for obvious non-API files
+NON_API_INDICATORS = [
+    'test', 'spec', 'mock', 'stub', 'fixture', 'example', 'demo',
+    'readme', 'changelog', 'license', 'contributing', 'todo',
+    'config', 'setting', 'env', 'docker', 'dockerfile', 'compose',
+    'gitignore', 'gitattributes', 'editorconfig', 'eslintrc',
+    'prettierrc', 'babelrc', 'webpack', 'rollup', 'vite',
+    'package', 'manifest', 'lock', 'yarn', 'npm', 'pip',
+    'requirements', 'setup', 'pyproject', 'cargo', 'gemfile'
+]
+
+# Common API file indicators
+API_FILE_INDICATORS = [
+    # Common API file names
+    'controller', 'route', 'api', 'endpoint', 'handler', 'service',
+    'app.py', 'main.py', 'server.py', 'service.py', 'routes.py',
+    'api.py', 'endpoints.py', 'handlers.py', 'controllers.py',
+
+    # Framework-specific files
+    'views.py', 'urls.py', 'viewsets.py',  # Django
+    'app.js', 'server.js', 'index.js', 'routes.js',  # Node.js
+    'Application.java', 'Controller.java', 'Service.java',  # Java
+    'Program.cs', 'Controller.cs', 'Startup.cs', 'ApiController.cs',  # C#
+    'Controllers', 'ApiControllers', 'WebApi', 'Api',  # C# directories
+    'app.rb', 'routes.rb', 'application.rb',  # Ruby
+    'main.go', 'server.go', 'handlers.go',  # Go
+    'main.rs', 'lib.rs', 'handlers.rs',  # Rust
+    'index.php', 'routes.php', 'api.php',  # PHP
+
+    # Generic patterns
+    'api', 'rest', 'web', 'http', 'server', 'app', 'main'
+]
+
+# File extensions that commonly contain APIs
+API_FILE_EXTENSIONS = frozenset([
+    '.py', '.js', '.ts', '.java', '.cs', '.rb', '.go', '.rs',
+    '.php', '.swift', '.kt', '.scala', '.clj', '.hs', '.dart',
+    '.ex', '.exs', '.fs', '.fsx', '.fsi', '.cr', '.ecr', '.nim',
+    '.nims', '.zig', '.v', '.odin', '.jai', '.cpp', '.c', '.h',
+    '.hpp', '.cc', '.cxx', '.m', '.mm', '.cljs', '.cljc', '.lhs',
+    '.sbt', '.gradle', '.pom', '.xml', '.yaml', '.yml', '.json',
+    '.toml', '.ini', '.cfg', '.conf', '.properties'
+])
+
+# Compiled once; discovery checks every entry of the repository listing
+API_FILE_FILTER = PathFilter(exclude_substrings=API_FILE_SKIP_PATTERNS + NON_API_INDICATORS)
+API_FILE_INDICATOR_REGEX = compile_substrings(indicator.lower() for indicator in API_FILE_INDICATORS)
+
+# Framework conventions that need the original case (UsersController.cs, UserResource.java)
+ROUTE_CLASS_FILE_REGEX = re.compile(r'[a-z](Controller|Resource|Handler)\.\w+$')
+
+
+def api_file_priority(file_path: str) -> int:
+    """Score how likely a file is to define routes; higher scores are scanned first."""
+    path_lower = '/' + file_path.lower()
+    score = sum(weight for signal, weight in API_FILE_PRIORITY_SIGNALS if signal in path_lower)
+    if ROUTE_CLASS_FILE_REGEX.search(os.path.basename(file_path)):
+        score += 20
+    # Prefer shallow files: entry points and route modules rarely sit deep in a tree
+    return score - path_lower.count('/')
+
 
 class GitHubService:
     """Service for interacting with GitHub API and analyzing repositories."""
     
-    def __init__(self, settings: Settings, github_token: Optional[str] = None, bedrock_service=None):
+    def __init__(self, settings: Settings, github_token: Optional[str] = None, bedrock_service=None,
+                 api_index_store=None):
         self.settings = settings
         self.github_token = github_token or getattr(settings, 'github_token', None) or os.getenv('GITHUB_TOKEN')
         self.headers = {
@@ -36,7 +180,30 @@ class GitHubService:
         self._debug_worst_apis = None  # For debugging when no APIs found
         self._file_cache = {}
         self._api_patterns_cache = None
-        self._max_workers = min(4, multiprocessing.cpu_count())
+        self.discovery_fetch_concurrency = getattr(settings, 'discovery_fetch_concurrency', 16)
+        self.discovery_extract_workers = getattr(settings, 'discovery_extract_workers', 0)
+        self.discovery_queue_size = getattr(settings, 'discovery_queue_size', 32)
+        self.discovery_time_budget_seconds = getattr(settings, 'discovery_time_budget_seconds', 300.0)
+        self.discovery_byte_budget = getattr(settings, 'discovery_byte_budget', 256 * 1024 * 1024)
+        self.discovery_file_time_budget_seconds = getattr(settings, 'discovery_file_time_budget_seconds', 10.0)
+        self.bulk_fetch_threshold = getattr(settings, 'github_bulk_fetch_threshold', 50)
+        # Opened on first use: extraction worker processes build a service but never touch the store
+        self._api_index_store = api_index_store
+        self._api_index_store_lock = threading.Lock()
+        # Recently scanned files, kept so API details can be computed without fetching them again
+        self.api_detail_cache_bytes = getattr(settings, 'discovery_detail_cache_bytes', 64 * 1024 * 1024)
+        self._api_detail_sources: "OrderedDict[str, Any]" = OrderedDict()
+        self._api_detail_source_bytes = 0
+        self._api_detail_lock = threading.Lock()
+    
+    @property
+    def api_index_store(self):
+        """Store of persisted API indexes, opened on first use."""
+        if self._api_index_store is None:
+            with self._api_index_store_lock:
+                if self._api_index_store is None:
+                    self._api_index_store = create_cache_store(self.settings)
+        return self._api_index_store
     
     def is_github_available(self) -> bool:
         """Check if GitHub token is available."""
@@ -178,71 +345,251 @@ class GitHubService:
             logger.error(f"Error getting file content: {str(e)}")
             return None
     
+    def get_blob_content(self, owner: str, repo: str, sha: str) -> Optional[str]:
+        """Get the content of a git blob by SHA (unaffected by later commits to the branch)."""
+        try:
+            url = f"{self.base_url}/repos/{owner}/{repo}/git/blobs/{sha}"
+            response = self._make_github_request(url)
+            
+            import base64
+            content = response.json().get('content', '')
+            return base64.b64decode(content).decode('utf-8')
+        except Exception as e:
+            logger.error(f"Error getting blob {sha}: {str(e)}")
+            return None
+    
+    async def get_file_content_async(self, session: aiohttp.ClientSession, owner: str, repo: str, path: str,
+                                     branch: str = None) -> Optional[str]:
+        """Get content of a file on an aiohttp session, retrying rate-limited requests ('' if not UTF-8, None on failure)."""
+        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
+        params = {'ref': branch} if branch else {}
+        headers = {key: value for key, value in self.headers.items() if value}
+        headers['Accept'] = 'application/vnd.github.v3.raw'
+        
+        for attempt in range(self.max_retries):
+            try:
+                async with session.get(url, headers=headers, params=params,
+                                       timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    if response.status == 200:
+                        return (await response.read()).decode('utf-8')
+                    if response.status in (403, 429) and attempt < self.max_retries - 1:
+                        delay = self.rate_limit_delay * (2 ** (attempt + 1)) + random.uniform(0, 1)
+                        logger.warning(f"GitHub returned {response.status} for {path}, retrying in {delay:.2f} seconds...")
+                        await asyncio.sleep(delay)
+                        continue
+                    logger.error(f"Error getting file content for {path}: HTTP {response.status}")
+                    return None
+            except UnicodeDecodeError:
+                # Binary content holds no routes: an empty file rather than a failed fetch
+                logger.debug(f"Skipping non UTF-8 file: {path}")
+                return ''
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.max_retries - 1:
+                    logger.warning(f"Request for {path} failed, retrying: {str(e)}")
+                    continue
+                logger.error(f"Error getting file content for {path}: {str(e)}")
+        return None
+    
+    def get_commit_sha(self, owner: str, repo: str, ref: str = None) -> Optional[str]:
+        """Resolve a branch, tag or the default branch to its commit SHA."""
+        try:
+            url = f"{self.base_url}/repos/{owner}/{repo}/commits/{ref or 'HEAD'}"
+            response = self._make_github_request(url)
+            return response.json().get('sha')
+        except Exception as e:
+            logger.error(f"Error resolving commit for {owner}/{repo}: {str(e)}")
+            return None
+    
+    def compare_commits(self, owner: str, repo: str, base: str, head: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the files changed between two commits, or None if the list is unavailable or truncated."""
+        try:
+            url = f"{self.base_url}/repos/{owner}/{repo}/compare/{base}...{head}"
+            response = self._make_github_request(url)
+            files = response.json().get('files', [])
+            # The compare API returns at most 300 files; beyond that the diff is incomplete
+            if len(files) >= 300:
+                logger.info(f"Compare {base[:12]}...{head[:12]} touches 300+ files, diff is truncated")
+                return None
+            return files
+        except Exception as e:
+            logger.error(f"Error comparing commits for {owner}/{repo}: {str(e)}")
+            return None
+    
+    def iter_repository_tarball(self, owner: str, repo: str, ref: str = None) -> Iterator[Tuple[str, bytes]]:
+        """Stream the repository tarball at a ref (preferably a commit SHA) and yield (path, bytes) for every regular file."""
+        url = f"{self.base_url}/repos/{owner}/{repo}/tarball"
+        if ref:
+            url += f"/{ref}"
+        
+        with requests.get(url, headers=self.headers, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            # 'r|gz' reads the archive sequentially, so it is never written to disk or held in memory whole
+            with tarfile.open(fileobj=response.raw, mode='r|gz') as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    # Archive entries are prefixed with a '<owner>-<repo>-<sha>/' top-level directory
+                    path = member.name.split('/', 1)[1] if '/' in member.name else member.name
+                    file_obj = archive.extractfile(member)
+                    if file_obj is None:
+                        continue
+                    yield path, file_obj.read()
+    
+    def fetch_files_bulk(self, owner: str, repo: str, paths: Iterable[str], ref: str = None) -> Dict[str, str]:
+        """Fetch the decoded content of many files at a ref with a single tarball download.
+        
+        Sources pass their resolved commit SHA, so the files match the commit the API index is keyed by.
+        """
+        wanted = set(paths)
+        contents = {}
+        
+        try:
+            start_time = time.time()
+            for path, data in self.iter_repository_tarball(owner, repo, ref):
+                if path not in wanted:
+                    continue
+                try:
+                    contents[path] = data.decode('utf-8')
+                except UnicodeDecodeError:
+                    logger.debug(f"Skipping non UTF-8 file from tarball: {path}")
+            logger.info(f"Bulk fetched {len(contents)}/{len(wanted)} files from {owner}/{repo} tarball in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            logger.warning(f"Bulk tarball fetch failed for {owner}/{repo}, falling back to per-file requests: {str(e)}")
+        
+        return contents
+    
+    def get_repository_source(self, owner: str, repo: str, branch: str = None) -> RepositorySource:
+        """Get the source for a repository, preferring a local mirror when one is configured."""
+        local_root = getattr(self.settings, 'local_repository_root', None)
+        if local_root:
+            for candidate in (os.path.join(local_root, owner, repo), os.path.join(local_root, owner, f"{repo}.git")):
+                if os.path.isdir(candidate):
+                    logger.info(f"Using local mirror {candidate} for {owner}/{repo}")
+                    return LocalRepositorySource(candidate, branch)
+        return GitHubRepositorySource(self, owner, repo, branch)
+    
     def discover_apis_in_repository(self, owner: str, repo: str, branch: str = None) -> List[DiscoveredAPI]:
         """Discover all APIs in a repository for a specific branch."""
+        return self.discover_apis_from_source(self.get_repository_source(owner, repo, branch))
+    
+    def discover_apis_with_details(self, owner: str, repo: str, branch: str = None) -> List[DiscoveredAPI]:
+        """Discover the APIs of a repository and compute every API's details, for callers that report them all.
+        
+        Computing details may fetch sources from GitHub, so async handlers run this in a worker thread and
+        then read the details on the event loop without blocking it.
+        """
+        return [api.load_details() for api in self.discover_apis_in_repository(owner, repo, branch)]
+    
+    def iter_discovered_apis(self, source: RepositorySource,
+                             on_file_skipped: Optional[Callable[[str, str], None]] = None) -> Iterator[DiscoveredAPI]:
+        """Yield APIs as their files are scanned, then any found only by the final passes (index, aggressive scan)."""
+        results: queue.Queue = queue.Queue()
+        done = object()
+        
+        def on_file_result(file_path: str, apis: List[DiscoveredAPI]):
+            for api in apis:
+                results.put(api)
+        
+        def discover():
+            try:
+                for api in self.discover_apis_from_source(source, on_file_result, on_file_skipped):
+                    results.put(api)
+            finally:
+                results.put(done)
+        
+        # The caller's context variables (such as a request's Bedrock cache bypass) apply to the discovery thread
+        threading.Thread(target=contextvars.copy_context().run, args=(discover,), daemon=True).start()
+        seen_endpoints = set()
+        while True:
+            api = results.get()
+            if api is done:
+                return
+            unique_key = f"{api.endpoint}|{api.file_path}"
+            if unique_key not in seen_endpoints:
+                seen_endpoints.add(unique_key)
+                yield api
+    
+    def discover_apis_from_source(self, source: RepositorySource,
+                                  on_file_result: Optional[Callable[[str, List[DiscoveredAPI]], None]] = None,
+                                  on_file_skipped: Optional[Callable[[str, str], None]] = None) -> List[DiscoveredAPI]:
+        """Discover all APIs in the files of a repository source.
+        
+        Committed OpenAPI/Swagger specs are read first; when there is one, the other API files are only
+        pattern matched for routes the spec does not list. Each scanned file's APIs are reported to
+        on_file_result, and every file left unscanned (generated, minified, over its time budget or past
+        the discovery budget) to on_file_skipped with the reason.
+        """
         discovered_apis = []
+        files = []
+        complete = True
+        skipped_files: Dict[str, str] = {}
+        ignore_rules = IgnoreRules()
+        
+        def record_skipped(file_path: str, reason: str):
+            skipped_files[file_path] = reason
+            if on_file_skipped:
+                on_file_skipped(file_path, reason)
         
         try:
-            # Get all files in the repository
-            files = self._get_all_files(owner, repo, '', branch)
-            branch_info = f" (branch: {branch})" if branch else " (default branch)"
-            logger.info(f"Found {len(files)} total files in repository {owner}/{repo}{branch_info}")
-            
-            # Debug: Log file types found
-            file_types = {}
-            for file_info in files:
-                ext = file_info['path'].split('.')[-1] if '.' in file_info['path'] else 'no_ext'
-                file_types[ext] = file_types.get(ext, 0) + 1
-            logger.info(f"File types found: {dict(sorted(file_types.items(), key=lambda x: x[1], reverse=True)[:10])}")
-            
-            api_files = []
-            processed_files = 0
-            max_files_to_process = 100  # Limit for performance
-            
-            # Filter API files first
-            for file_info in files:
-                if processed_files >= max_files_to_process:
-                    logger.info(f"Processed {max_files_to_process} files, stopping for performance")
-                    break
-                    
-                if self._is_api_file(file_info['path']):
-                    api_files.append(file_info)
-                    processed_files += 1
-                    
-            # Process files in parallel for better performance
-            logger.info(f"Processing {len(api_files)} API files in parallel...")
-            
-            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
-                # Submit all file processing tasks
-                future_to_file = {
-                    executor.submit(self._process_single_file, owner, repo, file_info, branch): file_info 
-                    for file_info in api_files
-                }
+            # Reuse the persisted index for this exact commit, or rescan only what changed since the last one
+            commit = source.resolve_commit()
+            file_results = None
+            if commit:
+                cached_index = self._load_api_index(source, commit)
+                if cached_index is not None:
+                    logger.info(f"Using persisted API index for {source.describe()}@{commit[:12]}")
+                    for file_path, reason in cached_index.get('skipped_files', {}).items():
+                        record_skipped(file_path, reason)
+                    return self._bind_api_details([DiscoveredAPI(**api) for api in cached_index['apis']], source)
+                incremental = self._discover_incrementally(source, commit, on_file_result, record_skipped)
+                if incremental is not None:
+                    file_results, complete, ignore_rules = incremental
+            
+            if file_results is None:
+                # Get all files in the repository
+                files = source.list_files()
+                logger.info(f"Found {len(files)} total files in repository {source.describe()}")
                 
-                # Collect results as they complete
-                for future in as_completed(future_to_file):
-                    file_info = future_to_file[future]
-                    file_path = file_info['path']
-                    
-                    try:
-                        apis = future.result()
-                        if apis:
-                            discovered_apis.extend(apis)
-                            logger.info(f"Found {len(apis)} APIs in {file_path}")
-                        else:
-                            logger.debug(f"No APIs found in {file_path}")
-                    except Exception as e:
-                        logger.warning(f"Error processing file {file_path}: {str(e)}")
-                        continue
+                # Debug: Log file types found
+                file_types = {}
+                for file_info in files:
+                    ext = file_info['path'].split('.')[-1] if '.' in file_info['path'] else 'no_ext'
+                    file_types[ext] = file_types.get(ext, 0) + 1
+                logger.info(f"File types found: {dict(sorted(file_types.items(), key=lambda x: x[1], reverse=True)[:10])}")
+                
+                # Honour the repository's .gitignore / .analyzerignore files
+                ignore_rules = self.load_ignore_rules(source, (file_info['path'] for file_info in files))
+                if len(ignore_rules):
+                    files = [file_info for file_info in files if not ignore_rules.is_ignored(file_info['path'])]
+                    logger.info(f"{len(files)} files left after applying {len(ignore_rules)} ignore rules")
+                
+                # A committed spec lists the routes in one file read
+                spec_results, handler_files = self._discover_from_specs(source, files)
+                for spec_path, spec_apis in spec_results.items():
+                    if on_file_result and spec_apis:
+                        on_file_result(spec_path, spec_apis)
+                
+                # Filter API files first, most likely route definitions first (the budget may stop the scan early)
+                api_files = [file_info for file_info in files
+                             if self._is_api_file(file_info['path']) and file_info['path'] not in handler_files]
+                api_files.sort(key=lambda file_info: api_file_priority(file_info['path']), reverse=True)
+                logger.info(f"Found {len(api_files)} API candidate files, top priority: {[f['path'] for f in api_files[:5]]}")
+                
+                file_results = self._scan_api_files(source, api_files, on_file_result, record_skipped, use_ai=not spec_results)
+                complete = len(file_results) == len(api_files)
+                if spec_results:
+                    file_results = self._merge_spec_apis(spec_results, file_results)
             
-            logger.info(f"Scanned {len(api_files)} API files: {api_files[:10]}...")
+            for apis in file_results.values():
+                discovered_apis.extend(apis)
             
             # If no APIs found, try aggressive scanning
             if not discovered_apis:
                 logger.warning(f"No APIs found with standard patterns. Trying aggressive scan...")
-                discovered_apis = self._aggressive_api_scan(owner, repo, branch)
+                discovered_apis = self._aggressive_api_scan(source, ignore_rules)
             
             # If still no APIs found, return empty list (only create samples when explicitly enabled)
+            is_debug_sample = False
             if not discovered_apis:
                 logger.warning(
                     "No APIs found even with aggressive scan. This may indicate the repository doesn't contain API code or uses unsupported patterns."
@@ -253,6 +600,7 @@ class GitHubService:
                 if hasattr(self, '_debug_worst_apis') and self._debug_worst_apis is not None:
                     logger.info("Creating debug sample APIs for testing (explicitly enabled)...")
                     discovered_apis = self._create_debug_sample_apis()
+                    is_debug_sample = True
             
             # Final deduplication across all files
             if discovered_apis:
@@ -272,40 +620,237 @@ class GitHubService:
                 discovered_apis = unique_apis
                 logger.info(f"After final deduplication: {len(discovered_apis)} unique APIs")
             
-            return discovered_apis
+            if commit and not is_debug_sample and complete:
+                spec_files = [path for path in file_results if openapi_spec.is_spec_file(path)]
+                self._save_api_index(source, commit, file_results, discovered_apis, skipped_files, spec_files,
+                                     ignore_rules.sources)
+            elif commit and not complete:
+                logger.info(f"Not persisting partial API index for {source.describe()}@{commit[:12]}")
+            
+            return self._bind_api_details(discovered_apis, source)
         except Exception as e:
-            logger.error(f"Error discovering APIs in repository {owner}/{repo}: {str(e)}")
+            logger.error(f"Error discovering APIs in repository {source.describe()}: {str(e)}")
             return []
     
-    def _process_single_file(self, owner: str, repo: str, file_info: dict, branch: str = None) -> List[DiscoveredAPI]:
-        """Process a single file for API extraction (used in parallel processing)."""
-        try:
-            file_path = file_info['path']
-            file_size = file_info.get('size', 0)
+    def _scan_api_files(self, source: RepositorySource, api_files: List[Dict[str, Any]],
+                        on_file_result: Optional[Callable[[str, List[DiscoveredAPI]], None]] = None,
+                        on_file_skipped: Optional[Callable[[str, str], None]] = None,
+                        use_ai: bool = True) -> Dict[str, List[DiscoveredAPI]]:
+        """Extract APIs from the given files through the fetch/extract pipeline, keyed by file path in input order.
+        
+        Files left over when the discovery budget runs out, and files whose fetch or extraction failed, are
+        missing from the result, so a shorter result means a partial scan. Without use_ai only pattern
+        matches are kept (no AI fallback or validation).
+        """
+        # Let the source fetch large file sets in bulk (e.g. a single tarball download)
+        prefetched_contents = source.prefetch_files([f['path'] for f in api_files])
+        
+        logger.info(f"Processing {len(api_files)} API files through the discovery pipeline...")
+        pipeline = DiscoveryPipeline(
+            self, source,
+            fetch_concurrency=self.discovery_fetch_concurrency,
+            extract_workers=self.discovery_extract_workers,
+            queue_size=self.discovery_queue_size,
+            time_budget_seconds=self.discovery_time_budget_seconds,
+            byte_budget=self.discovery_byte_budget,
+            on_file_result=on_file_result,
+            on_file_skipped=on_file_skipped,
+            use_ai=use_ai
+        )
+        file_results = pipeline.run(api_files, prefetched_contents)
+        
+        logger.info(
+            f"Scanned {len(file_results)} of {len(api_files)} API files ({len(pipeline.failed_files)} failed): "
+            f"{api_files[:10]}..."
+        )
+        return file_results
+    
+    def load_ignore_rules(self, source: RepositorySource, paths: Iterable[str]) -> IgnoreRules:
+        """Compile the rules of the .gitignore and .analyzerignore files among the given repository paths."""
+        ignore_paths = [path for path in paths if is_ignore_file(path)]
+        if not ignore_paths:
+            return IgnoreRules()
+        
+        prefetched_contents = source.prefetch_files(ignore_paths)
+        ignore_files = {}
+        for path in ignore_paths:
+            content = prefetched_contents.get(path)
+            if content is None:
+                content = source.get_file_content(path)
+            if content:
+                ignore_files[path] = content
+        
+        ignore_rules = IgnoreRules.from_files(ignore_files)
+        logger.info(f"Loaded {len(ignore_rules)} ignore rules from {len(ignore_files)} files of {source.describe()}")
+        return ignore_rules
+    
+    def _discover_from_specs(self, source: RepositorySource,
+                             files: List[Dict[str, Any]]) -> Tuple[Dict[str, List[DiscoveredAPI]], Set[str]]:
+        """Build APIs from the committed OpenAPI/Swagger specs, keyed by spec file, with the handler files they cover.
+        
+        Operations whose operationId or router controller names a module of the tree point at that module;
+        the others point at the spec itself until a scanned route takes their place.
+        """
+        spec_results: Dict[str, List[DiscoveredAPI]] = {}
+        handler_files: Set[str] = set()
+        spec_candidates = [f for f in files if openapi_spec.is_spec_file(f['path'], f.get('size', 0))]
+        if not spec_candidates:
+            return spec_results, handler_files
+        
+        # Module paths without extension, grouped by file name for suffix lookups ("api/users" -> "src/api/users.py")
+        modules_by_name: Dict[str, List[Tuple[str, str]]] = {}
+        for file_info in files:
+            module, extension = os.path.splitext(file_info['path'])
+            if extension in ('.py', '.js', '.ts', '.go', '.java', '.rb', '.php', '.cs'):
+                modules_by_name.setdefault(module.rsplit('/', 1)[-1], []).append((module, file_info['path']))
+        
+        def find_handler_file(operation: openapi_spec.SpecOperation) -> Optional[str]:
+            for candidate in openapi_spec.handler_candidates(operation):
+                for module, path in modules_by_name.get(candidate.rsplit('/', 1)[-1], []):
+                    if module == candidate or module.endswith('/' + candidate):
+                        return path
+            return None
+        
+        for file_info in spec_candidates:
+            spec_path = file_info['path']
+            content = source.get_file_content(spec_path)
+            spec = openapi_spec.parse_spec(content, spec_path) if content else None
+            if spec is None:
+                continue
             
-            # Use chunking for large files
-            if file_size > 1024 * 1024:  # 1MB limit
-                logger.debug(f"Large file detected: {file_path} ({file_size} bytes), using chunked processing")
-                return self._extract_apis_from_file_chunked(owner, repo, file_path, branch)
-            else:
-                content = self.get_file_content(owner, repo, file_path, branch)
-                if content:
-                    return self._extract_apis_from_file(content, file_path)
-                else:
-                    return []
-        except Exception as e:
-            logger.warning(f"Error processing file {file_info['path']}: {str(e)}")
-            return []
+            apis = []
+            for operation in openapi_spec.spec_operations(spec, content):
+                handler_file = find_handler_file(operation)
+                if handler_file:
+                    handler_files.add(handler_file)
+                apis.append(DiscoveredAPI(
+                    endpoint=f"{operation.method} {operation.path}" if operation.method != 'GET' else operation.path,
+                    file_path=handler_file or spec_path,
+                    function_name=openapi_spec.handler_function(operation),
+                    framework='OpenAPI',
+                    # Handlers are located by name when their details are first needed
+                    line_number=None if handler_file else operation.line_number
+                ))
+            spec_results[spec_path] = apis
+            logger.info(
+                f"Found {len(apis)} APIs in spec {spec_path} "
+                f"({sum(1 for api in apis if api.file_path != spec_path)} mapped to handler files)"
+            )
+        
+        return spec_results, handler_files
+    
+    def _merge_spec_apis(self, spec_results: Dict[str, List[DiscoveredAPI]],
+                         file_results: Dict[str, List[DiscoveredAPI]]) -> Dict[str, List[DiscoveredAPI]]:
+        """Combine spec APIs with scanned ones: a scanned route the spec lists replaces the spec's entry."""
+        scanned_routes = {
+            openapi_spec.endpoint_route_key(api.endpoint)
+            for apis in file_results.values() for api in apis
+        }
+        merged = {}
+        for spec_path, apis in spec_results.items():
+            merged[spec_path] = [
+                api for api in apis if openapi_spec.endpoint_route_key(api.endpoint) not in scanned_routes
+            ]
+            logger.info(f"Spec {spec_path}: {len(apis) - len(merged[spec_path])} routes located in scanned files")
+        merged.update(file_results)
+        return merged
     
-    def _aggressive_api_scan(self, owner: str, repo: str, branch: str = None) -> List[DiscoveredAPI]:
+    def _discover_incrementally(self, source: RepositorySource, commit: str,
+                                on_file_result: Optional[Callable[[str, List[DiscoveredAPI]], None]] = None,
+                                on_file_skipped: Optional[Callable[[str, str], None]] = None
+                                ) -> Optional[Tuple[Dict[str, List[DiscoveredAPI]], bool, IgnoreRules]]:
+        """Rescan only files changed since the last indexed commit, with a flag set when every change was scanned.
+        
+        Also returns the ignore rules applied. Returns None if a full scan is needed.
+        """
+        head_pointer = self.api_index_store.get('api_index_head', source.cache_key())
+        if not head_pointer:
+            return None
+        
+        base_commit = head_pointer.get('commit')
+        base_index = self._load_api_index_files(source, base_commit) if base_commit else None
+        if base_index is None:
+            return None
+        
+        changes = source.changed_files(base_commit)
+        if changes is None:
+            logger.info(f"Could not diff {source.describe()} against {base_commit[:12]}, running full discovery")
+            return None
+        
+        changed = set(changes['changed'])
+        stale = changed | set(changes['removed'])
+        spec_files = base_index.get('spec_files', [])
+        if any(openapi_spec.is_spec_file(path) for path in stale):
+            logger.info(f"An API spec of {source.describe()} changed since {base_commit[:12]}, running full discovery")
+            return None
+        if any(is_ignore_file(path) for path in stale):
+            logger.info(f"Ignore rules of {source.describe()} changed since {base_commit[:12]}, running full discovery")
+            return None
+        ignore_rules = self.load_ignore_rules(source, base_index.get('ignore_files', []))
+        file_results = {
+            path: [DiscoveredAPI(**api) for api in apis]
+            for path, apis in base_index['files'].items()
+            if path not in stale
+        }
+        for path, reason in base_index.get('skipped_files', {}).items():
+            if path not in stale and on_file_skipped:
+                on_file_skipped(path, reason)
+        changed_api_files = [{'path': path, 'size': 0} for path in changes['changed']
+                             if self._is_api_file(path) and not ignore_rules.is_ignored(path)]
+        changed_api_files.sort(key=lambda file_info: api_file_priority(file_info['path']), reverse=True)
+        logger.info(
+            f"Incremental discovery for {source.describe()}: {len(stale)} files changed since {base_commit[:12]}, "
+            f"rescanning {len(changed_api_files)} API files and reusing {len(file_results)}"
+        )
+        
+        rescanned = self._scan_api_files(source, changed_api_files, on_file_result, on_file_skipped, use_ai=not spec_files)
+        if spec_files:
+            # Rescanned routes that the spec lists replace the spec's entries
+            spec_results = {path: file_results.pop(path) for path in spec_files if path in file_results}
+            rescanned = self._merge_spec_apis(spec_results, rescanned)
+        file_results.update(rescanned)
+        return file_results, all(path in rescanned for path in (f['path'] for f in changed_api_files)), ignore_rules
+    
+    def _load_api_index(self, source: RepositorySource, commit: str) -> Optional[Dict[str, Any]]:
+        """Load the persisted final API list of a repository commit."""
+        return self.api_index_store.get('api_index', f"{source.repository_key()}@{commit}")
+    
+    def _load_api_index_files(self, source: RepositorySource, commit: str) -> Optional[Dict[str, Any]]:
+        """Load the persisted per-file APIs and skipped files of a repository commit (only needed for incremental rescans)."""
+        return self.api_index_store.get('api_index_files', f"{source.repository_key()}@{commit}")
+    
+    def _save_api_index(self, source: RepositorySource, commit: str, file_results: Dict[str, List[DiscoveredAPI]],
+                        apis: List[DiscoveredAPI], skipped_files: Optional[Dict[str, str]] = None,
+                        spec_files: Optional[List[str]] = None, ignore_files: Optional[List[str]] = None):
+        """Persist the final and per-file API lists of a repository commit as separate entries.
+        
+        Cache hits only read the final list; the per-file entry is read when the next commit is rescanned incrementally.
+        """
+        key = f"{source.repository_key()}@{commit}"
+        files = {path: [api.to_index_dict() for api in file_apis] for path, file_apis in file_results.items()}
+        skipped_files = skipped_files or {}
+        if (self.api_index_store.put('api_index_files', key, {
+                    'commit': commit, 'files': files, 'skipped_files': skipped_files,
+                    'spec_files': spec_files or [], 'ignore_files': ignore_files or []
+                })
+                and self.api_index_store.put('api_index', key, {
+                    'commit': commit,
+                    'apis': [api.to_index_dict() for api in apis],
+                    'skipped_files': skipped_files
+                })):
+            self.api_index_store.put('api_index_head', source.cache_key(), {'commit': commit})
+            logger.info(f"Persisted API index for {source.describe()}@{commit[:12]} ({len(apis)} APIs)")
+    
+    def _aggressive_api_scan(self, source: RepositorySource, ignore_rules: Optional[IgnoreRules] = None) -> List[DiscoveredAPI]:
         """Aggressive API scanning when standard patterns fail."""
         discovered_apis = []
         
         try:
             # Get ALL files, not just API files
-            all_files = self._get_all_files(owner, repo, '', branch)
-            branch_info = f" (branch: {branch})" if branch else " (default branch)"
-            logger.info(f"Aggressive scan: Found {len(all_files)} total files{branch_info}")
+            all_files = source.list_files()
+            if ignore_rules:
+                all_files = [file_info for file_info in all_files if not ignore_rules.is_ignored(file_info['path'])]
+            logger.info(f"Aggressive scan: Found {len(all_files)} total files in {source.describe()}")
             
             # Scan more file types - comprehensive list
             api_extensions = ['.cs', '.py', '.js', '.ts', '.java', '.rb', '.go', '.rs', '.php', '.swift', '.kt',
@@ -322,7 +867,11 @@ class GitHubService:
                 file_path = file_info['path']
                 if any(file_path.lower().endswith(ext) for ext in all_extensions):
                     scanned_files += 1
-                    content = self.get_file_content(owner, repo, file_path, branch)
+                    content = source.get_file_content(file_path)
+                    skip_reason = classify_source(content, file_path) if content else None
+                    if skip_reason:
+                        logger.info(f"Aggressive scan: skipping {file_path} ({skip_reason})")
+                        continue
                     if content:
                         # Try AI-powered detection for each file
                         apis = self._ai_powered_api_detection(content, file_path)
@@ -331,7 +880,11 @@ class GitHubService:
                         discovered_apis.extend(apis)
                         
                         # Also try manual patterns with relaxed criteria
-                        manual_apis = self._extract_apis_from_file(content, file_path)
+                        try:
+                            manual_apis = self._extract_apis_from_file(content, file_path)
+                        except SkippedSourceFile as e:
+                            logger.warning(f"Aggressive scan: skipped {file_path}: {str(e)}")
+                            manual_apis = []
                         if manual_apis:
                             logger.info(f"Manual patterns found {len(manual_apis)} APIs in {file_path}")
                         discovered_apis.extend(manual_apis)
@@ -447,651 +1000,40 @@ class GitHubService:
                 files.append(item)
             elif item['type'] == 'dir':
                 # Skip common non-source directories
-                if item['name'] not in ['.git', 'node_modules', '__pycache__', '.pytest_cache', 'venv', 'env', 'bin', 'obj', 'packages']:
+                if item['name'] not in SKIPPED_DIRECTORIES:
                     sub_files = self._get_all_files(owner, repo, item['path'], branch)
                     files.extend(sub_files)
         
         return files
     
-    @lru_cache(maxsize=1000)
     def _is_api_file(self, file_path: str) -> bool:
         """Check if file is likely to contain API definitions - OPTIMIZED FOR SPEED."""
-        # Comprehensive list of dependency files and folders to skip
-        skip_patterns = [
-            # Version control and IDE
-            '.git/', '.svn/', '.hg/', '.bzr/', '.idea/', '.vscode/', '.vs/',
-            
-            # Package managers and dependencies
-            'node_modules/', 'bower_components/', 'vendor/', 'packages/',
-            '__pycache__/', '.pytest_cache/', '.mypy_cache/', '.coverage/',
-            
-            # Virtual environments and build artifacts
-            'venv/', 'env/', '.venv/', '.env/', 'virtualenv/', 'conda/',
-            'bin/', 'obj/', 'target/', 'build/', 'dist/', 'out/', 'release/',
-            
-            # Testing and documentation
-            'test/', 'tests/', 'spec/', 'specs/', '__tests__/', 'test_',
-            'docs/', 'documentation/', 'doc/', 'wiki/', 'examples/',
-            
-            # Static assets and resources
-            'assets/', 'static/', 'public/', 'resources/', 'media/', 'images/',
-            'css/', 'scss/', 'sass/', 'less/', 'fonts/', 'icons/',
-            
-            # Configuration and environment
-            'config/', 'conf/', 'settings/', 'secrets/', '.config/',
-            '.env', '.env.local', '.env.production', '.env.development',
-            
-            # Lock files and manifests
-            'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'composer.lock',
-            'poetry.lock', 'Pipfile.lock', 'Gemfile.lock', 'Cargo.lock',
-            
-            # Build and dependency files
-            'pom.xml', 'build.gradle', 'build.xml', 'Makefile', 'CMakeLists.txt',
-            'requirements.txt', 'Pipfile', 'setup.py', 'pyproject.toml',
-            'package.json', 'composer.json', 'Gemfile', 'Cargo.toml',
-            
-            # System and temporary files
-            '.DS_Store', '.Thumbs.db', 'Thumbs.db', '.directory',
-            '*.tmp', '*.temp', '*.log', '*.cache', '*.pid',
-            
-            # File extensions to skip (excluding .py files which may contain APIs)
-            '.json', '.xml', '.yml', '.yaml', '.md', '.txt', '.log', '.lock',
-            '.min.js', '.min.css', '.map', '.bundle', '.chunk',
-            
-            # Framework-specific non-API files (be more specific)
-            'migrations/', 'seeds/', 'fixtures/', 'templates/', 'layouts/',
-            'components/', 'widgets/', 'mixins/',
-            
-            # Database and data files
-            'data/', 'database/', 'db/', 'sql/', 'migrations/',
-            '*.db', '*.sqlite', '*.sqlite3', '*.db3',
-            
-            # Backup and temporary directories
-            'backup/', 'backups/', 'tmp/', 'temp/', 'cache/', 'logs/',
-            '*.bak', '*.backup', '*.old', '*.orig'
-        ]
-        
-        file_lower = file_path.lower()
-        
-        # Skip if matches any skip pattern
-        if any(pattern in file_lower for pattern in skip_patterns):
-            return False
-        
-        # Early termination for obvious non-API files (performance optimization)
-        non_api_indicators = [
-            'test', 'spec', 'mock', 'stub', 'fixture', 'example', 'demo',
-            'readme', 'changelog', 'license', 'contributing', 'todo',
-            'config', 'setting', 'env', 'docker', 'dockerfile', 'compose',
-            'gitignore', 'gitattributes', 'editorconfig', 'eslintrc',
-            'prettierrc', 'babelrc', 'webpack', 'rollup', 'vite',
-            'package', 'manifest', 'lock', 'yarn', 'npm', 'pip',
-            'requirements', 'setup', 'pyproject', 'cargo', 'gemfile'
-        ]
-        
-        # Check for non-API indicators first (faster)
-        if any(indicator in file_lower for indicator in non_api_indicators):
+        if not API_FILE_FILTER.accepts(file_path):
             return False
-        
-        # Common API file indicators
-        api_indicators = [
-            # Common API file names
-            'controller', 'route', 'api', 'endpoint', 'handler', 'service',
-            'app.py', 'main.py', 'server.py', 'service.py', 'routes.py',
-            'api.py', 'endpoints.py', 'handlers.py', 'controllers.py',
-            
-            # Framework-specific files
-            'views.py', 'urls.py', 'viewsets.py',  # Django
-            'app.js', 'server.js', 'index.js', 'routes.js',  # Node.js
-            'Application.java', 'Controller.java', 'Service.java',  # Java
-            'Program.cs', 'Controller.cs', 'Startup.cs', 'ApiController.cs',  # C#
-            'Controllers', 'ApiControllers', 'WebApi', 'Api',  # C# directories
-            'app.rb', 'routes.rb', 'application.rb',  # Ruby
-            'main.go', 'server.go', 'handlers.go',  # Go
-            'main.rs', 'lib.rs', 'handlers.rs',  # Rust
-            'index.php', 'routes.php', 'api.php',  # PHP
-            
-            # Generic patterns
-            'api', 'rest', 'web', 'http', 'server', 'app', 'main'
-        ]
-        
-        # File extensions that commonly contain APIs
-        api_extensions = [
-            '.py', '.js', '.ts', '.java', '.cs', '.rb', '.go', '.rs', 
-            '.php', '.swift', '.kt', '.scala', '.clj', '.hs', '.dart', 
-            '.ex', '.exs', '.fs', '.fsx', '.fsi', '.cr', '.ecr', '.nim', 
-            '.nims', '.zig', '.v', '.odin', '.jai', '.cpp', '.c', '.h', 
-            '.hpp', '.cc', '.cxx', '.m', '.mm', '.cljs', '.cljc', '.lhs',
-            '.sbt', '.gradle', '.pom', '.xml', '.yaml', '.yml', '.json',
-            '.toml', '.ini', '.cfg', '.conf', '.properties'
-        ]
-        
-        file_lower = file_path.lower()
-        
-        # Check if file has API indicators
-        has_api_indicators = any(indicator in file_lower for indicator in api_indicators)
-        
-        # Check if file has API-friendly extension
-        has_api_extension = any(file_lower.endswith(ext) for ext in api_extensions)
-        
-        # Check if it's a configuration file that might define routes
-        config_files = ['routes', 'urls', 'endpoints', 'api', 'swagger', 'openapi']
-        is_config_file = any(config in file_lower for config in config_files)
-        
-        return has_api_indicators or (has_api_extension and is_config_file) or has_api_extension
+        return (API_FILE_INDICATOR_REGEX.search(file_path.lower()) is not None
+                or file_extension(file_path) in API_FILE_EXTENSIONS)
     
     def _extract_apis_from_file(self, content: str, file_path: str) -> List[DiscoveredAPI]:
-        """Extract API definitions from file content - UNIVERSAL API DETECTION."""
-        apis = []
-        
-        # UNIVERSAL API DETECTION PATTERNS - Covers ALL frameworks and languages
-        
-        # Python frameworks - COMPREHENSIVE
-        python_patterns = [
-            # FastAPI - Comprehensive and Fixed
-            (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@api_router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@APIRouter\(\)\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # FastAPI with path parameters
-            (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
-            
-            # FastAPI with additional parameters
-            (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*dependencies\s*=', r'\1', r'\2'),
-            (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*tags\s*=', r'\1', r'\2'),
-            (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*response_model\s*=', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*dependencies\s*=', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*tags\s*=', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*response_model\s*=', r'\1', r'\2'),
-            
-            # FastAPI with multiple parameters
-            (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*[^)]*\)', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*[^)]*\)', r'\1', r'\2'),
-            
-            # FastAPI without quotes (less common but possible)
-            (r'@app\.(get|post|put|delete|patch|head|options)\(([^)]+)\)', r'\1', r'\2'),
-            (r'@router\.(get|post|put|delete|patch|head|options)\(([^)]+)\)', r'\1', r'\2'),
-            
-            # Flask - Comprehensive and Fixed
-            (r'@app\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@app\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
-            (r'@app\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']', r'\2', r'\1'),
-            (r'@app\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']', r'\2', r'\1'),
-            
-            # Flask with path parameters
-            (r'@app\.route\(["\']([^"\']*<[^>]*>[^"\']*)["\']', 'GET', r'\1'),
-            (r'@app\.route\(["\']([^"\']*<[^>]*>[^"\']*)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
-            
-            # Flask Blueprint patterns
-            (r'@bp\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@bp\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
-            (r'@blueprint\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@blueprint\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
-            
-            # Flask with additional parameters
-            (r'@app\.route\(["\']([^"\']+)["\'],\s*[^)]*\)', 'GET', r'\1'),
-            (r'@bp\.route\(["\']([^"\']+)["\'],\s*[^)]*\)', 'GET', r'\1'),
-            
-            # Generic route patterns (catch-all for Flask-like frameworks)
-            (r'@.*\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@.*\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
-            
-            # Additional Python API patterns
-            (r'@(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
-            
-            # Function-based API patterns
-            (r'def\s+(get_|post_|put_|delete_|patch_|head_|options_)(\w+)', r'\1', r'\2'),
-            (r'def\s+(api_|endpoint_)(\w+)', 'API', r'\2'),
-            (r'async\s+def\s+(get_|post_|put_|delete_|patch_|head_|options_)(\w+)', r'\1', r'\2'),
-            (r'async\s+def\s+(api_|endpoint_)(\w+)', 'API', r'\2'),
-            
-            # Django REST Framework - Enhanced and Comprehensive
-            (r'@api_view\(\[["\']([^"\']+)["\']\]\)', r'\1', ''),
-            (r'class\s+(\w+ViewSet|.*ViewSet).*:', 'REST', ''),
-            (r'class\s+(\w+APIView|.*APIView).*:', 'REST', ''),
-            (r'class\s+(\w+GenericViewSet).*:', 'REST', ''),
-            (r'class\s+(\w+ModelViewSet).*:', 'REST', ''),
-            (r'@action\(detail=(True|False)', 'POST', ''),
-            (r'path\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'url\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r're_path\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            
-            # Django REST Framework with decorators
-            (r'@api_view\(\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']\]\)', r'\1', ''),
-            (r'@action\(detail=(True|False),\s*methods\s*=\s*\[["\']([^"\']+)["\']\]', r'\2', ''),
-            (r'@action\(detail=(True|False),\s*methods\s*=\s*\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']\]', r'\2', ''),
-            
-            # Django URL patterns with views
-            (r'path\(["\']([^"\']+)["\'],\s*(\w+)\.as_view\(\)', 'GET', r'\1'),
-            (r'url\(["\']([^"\']+)["\'],\s*(\w+)\.as_view\(\)', 'GET', r'\1'),
-            (r're_path\(["\']([^"\']+)["\'],\s*(\w+)\.as_view\(\)', 'GET', r'\1'),
-            
-            # Django class-based views
-            (r'class\s+(\w+View).*:', 'GET', r'\1'),
-            (r'class\s+(\w+CreateView).*:', 'POST', r'\1'),
-            (r'class\s+(\w+UpdateView).*:', 'PUT', r'\1'),
-            (r'class\s+(\w+DeleteView).*:', 'DELETE', r'\1'),
-            (r'class\s+(\w+ListView).*:', 'GET', r'\1'),
-            (r'class\s+(\w+DetailView).*:', 'GET', r'\1'),
-            
-            # Sanic - Enhanced
-            (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@bp\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Bottle - Enhanced
-            (r'@(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@route\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # CherryPy - Enhanced
-            (r'@cherrypy\.expose.*\ndef\s+(\w+)', 'GET', r'\1'),
-            (r'@cherrypy\.tools\.(get|post|put|delete|patch)', r'\1', ''),
-            (r'def\s+(\w+)\s*\(self', 'GET', r'\1'),
-            (r'def\s+(index|default)\s*\(self', 'GET', r'\1'),
-            
-            # Tornado
-            (r'class\s+(\w+Handler)', 'HTTP', r'\1'),
-            (r'def\s+(get|post|put|delete|patch)\s*\(', r'\1', ''),
-            (r'@tornado\.web\.(get|post|put|delete|patch)', r'\1', ''),
-            
-            # Quart
-            (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Starlette
-            (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Sails.js (Python-like)
-            (r'(\w+):\s*function\s*\(req,\s*res\)', 'GET', r'\1'),
-            
-            # Generic Python patterns
-            (r'def\s+(get|post|put|delete|patch)_(\w+)', r'\1', r'\2'),
-            (r'def\s+(\w+)\s*\(.*request.*\)', 'HTTP', r'\1'),
-            (r'def\s+(\w+)\s*\(.*req.*\)', 'HTTP', r'\1'),
-            (r'def\s+(\w+)\s*\(.*response.*\)', 'HTTP', r'\1'),
-        ]
-        
-        # Java frameworks - COMPREHENSIVE
-        java_patterns = [
-            # Spring Boot - Enhanced and Comprehensive
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping|RequestMapping)\(["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            (r'@RequestMapping\([^)]*value\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@RequestMapping\([^)]*method\s*=\s*RequestMethod\.([A-Z]+)', r'\1', ''),
-            (r'@RestController.*?class\s+(\w+)', 'REST', ''),
-            (r'@Controller.*?class\s+(\w+)', 'REST', ''),
-            (r'@RestController', 'REST', ''),
-            (r'@Controller', 'REST', ''),
-            (r'@RequestMapping\([^)]*path\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@RequestMapping\([^)]*value\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            
-            # Spring Boot with additional parameters
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*value\s*=\s*["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*path\s*=\s*["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            
-            # Spring Boot with path variables
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            
-            # Spring Boot with produces/consumes
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*produces\s*=\s*["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*consumes\s*=\s*["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            
-            # Spring Boot with headers
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*headers\s*=\s*["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            
-            # Spring Boot with params
-            (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*params\s*=\s*["\']([^"\']+)["\']', 
-             lambda m: m.group(1).replace('Mapping', '').upper(), r'\2'),
-            
-            # JAX-RS - Enhanced
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@Consumes\(["\']([^"\']+)["\']', 'POST', ''),
-            (r'@Produces\(["\']([^"\']+)["\']', 'GET', ''),
-            
-            # Jersey - Enhanced
-            (r'@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@GET.*?@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@POST.*?@Path\(["\']([^"\']+)["\']', 'POST', r'\1'),
-            (r'@PUT.*?@Path\(["\']([^"\']+)["\']', 'PUT', r'\1'),
-            (r'@DELETE.*?@Path\(["\']([^"\']+)["\']', 'DELETE', r'\1'),
-            
-            # Struts
-            (r'@Action\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@Namespace\(["\']([^"\']+)["\']', 'GET', ''),
-            
-            # Play Framework
-            (r'@(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@Action\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            
-            # Generic Java patterns
-            (r'public\s+.*\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'public\s+.*\s+(\w+)\s*\(.*HttpServletRequest.*\)', 'HTTP', r'\1'),
-            (r'public\s+.*\s+(\w+)\s*\(.*HttpServletResponse.*\)', 'HTTP', r'\1'),
-            (r'@WebServlet\(["\']([^"\']+)["\']', 'GET', r'\1'),
-        ]
-        
-        # JavaScript/Node.js frameworks - COMPREHENSIVE
-        js_patterns = [
-            # Express.js - Enhanced and Comprehensive
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'express\.Router\(\)\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'\.route\(["\']([^"\']+)["\']\)\.(get|post|put|delete|patch)', r'\2', r'\1'),
-            (r'\.all\(["\']([^"\']+)["\']', 'ALL', r'\1'),
-            (r'\.use\(["\']([^"\']+)["\']', 'USE', r'\1'),
-            
-            # Express.js with middleware
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*[^,]+,\s*function', r'\1', r'\2'),
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*\[[^\]]+\],\s*function', r'\1', r'\2'),
-            
-            # Express.js with path parameters
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*:[^"\']*)["\']', r'\1', r'\2'),
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
-            
-            # Express.js with async/await
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*async\s*\(', r'\1', r'\2'),
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*async\s*function', r'\1', r'\2'),
-            
-            # Express.js with arrow functions
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*\([^)]*\)\s*=>', r'\1', r'\2'),
-            
-            # Express.js with error handling
-            (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*\([^,]+,\s*[^,]+,\s*[^)]+\)\s*=>', r'\1', r'\2'),
-            
-            # Koa.js - Enhanced
-            (r'router\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Hapi.js - Enhanced
-            (r'route:\s*{\s*path:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'method:\s*["\']([^"\']+)["\'].*path:\s*["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'route\([^)]*path\s*:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'route\([^)]*method\s*:\s*["\']([^"\']+)["\']', r'\1', ''),
-            (r'server\.route\([^)]*path\s*:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            
-            # NestJS - Enhanced
-            (r'@(Get|Post|Put|Delete|Patch|Head|Options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@Controller\(["\']([^"\']+)["\']', 'REST', ''),
-            (r'@Controller', 'REST', ''),
-            (r'@Injectable', 'SERVICE', ''),
-            
-            # Sails.js - Enhanced
-            (r'(\w+):\s*function\s*\(req,\s*res\)', 'GET', r'\1'),
-            (r'(\w+):\s*function\s*\(req,\s*res,\s*next\)', 'GET', r'\1'),
-            (r'(\w+):\s*async\s*function\s*\(req,\s*res\)', 'GET', r'\1'),
-            
-            # Next.js API Routes
-            (r'export\s+default\s+function\s+handler', 'API', ''),
-            (r'export\s+default\s+async\s+function\s+handler', 'API', ''),
-            (r'export\s+async\s+function\s+(get|post|put|delete|patch)', r'\1', ''),
-            
-            # Nuxt.js
-            (r'export\s+default\s+async\s+function\s+handler', 'API', ''),
-            (r'export\s+default\s+function\s+handler', 'API', ''),
-            
-            # Fastify
-            (r'fastify\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Restify
-            (r'server\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Generic JavaScript patterns
-            (r'function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'const\s+(get|post|put|delete|patch)(\w+)\s*=', r'\1', r'\2'),
-            (r'async\s+function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'(\w+)\s*:\s*async\s*\([^)]*req[^)]*\)', 'HTTP', r'\1'),
-            (r'(\w+)\s*:\s*\([^)]*req[^)]*\)', 'HTTP', r'\1'),
-        ]
-        
-        # C# frameworks - Enhanced patterns
-        csharp_patterns = [
-            # ASP.NET Core - Specific patterns for controller detection
-            (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+.*?\s+(\w+)\s*\(', r'\1', r'\2'),
-            (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+async\s+.*?\s+(\w+)\s*\(', r'\1', r'\2'),
-            
-            # Route attributes with HTTP methods
-            (r'\[Route\(["\']([^"\']+)["\']\]\s*\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]', r'\2', r'\1'),
-            (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*\[Route\(["\']([^"\']+)["\']\]', r'\1', r'\2'),
-            
-            # Controller-level route with method-level HTTP attributes (specific for api/[controller] pattern)
-            (r'\[Route\(["\']api/\[controller\]\["\']\)\]\s*.*?\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+.*?\s+(\w+)\s*\(', r'\1', r'/api/Employees'),
-            (r'\[Route\(["\']api/\[controller\]\["\']\)\]\s*.*?\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+async\s+.*?\s+(\w+)\s*\(', r'\1', r'/api/Employees'),
-            
-            # Method-level route attributes
-            (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*\[Route\(["\']([^"\']+)["\']\]', r'\1', r'\2'),
-            (r'\[Route\(["\']([^"\']+)["\']\]\s*\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]', r'\2', r'\1'),
-            
-            # Generic route patterns
-            (r'\[Route\(["\']([^"\']+)["\']\]', 'GET', r'\1'),
-            (r'\[Route\(["\']([^"\']+)["\'],\s*Name\s*=\s*["\']([^"\']+)["\']\]', 'GET', r'\1'),
-            
-            # Controller classes
-            (r'public\s+class\s+(\w+Controller)', 'REST', r'\1'),
-            (r'public\s+class\s+(\w+ApiController)', 'REST', r'\1'),
-            
-            # API methods with return types
-            (r'public\s+(IHttpActionResult|HttpResponseMessage|IActionResult)\s+(\w+)\s*\(', 'GET', r'\2'),
-            (r'public\s+async\s+(Task<IHttpActionResult>|Task<HttpResponseMessage>|Task<IActionResult>)\s+(\w+)\s*\(', 'GET', r'\2'),
-            
-            # Minimal API patterns (.NET 6+)
-            (r'app\.Map(Get|Post|Put|Delete|Patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'Map(Get|Post|Put|Delete|Patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Web API 2 patterns
-            (r'\[ActionName\(["\']([^"\']+)["\']\]', 'GET', r'\1'),
-            (r'\[AcceptVerbs\(["\']([^"\']+)["\']\]', r'\1', ''),
-            
-            # Generic API patterns
-            (r'public\s+.*\s+(Get|Post|Put|Delete|Patch)(\w+)\s*\(', r'\1', r'\1\2'),
-            (r'private\s+.*\s+(Get|Post|Put|Delete|Patch)(\w+)\s*\(', r'\1', r'\1\2'),
-        ]
-        
-        # PHP frameworks - Enhanced and Comprehensive
-        php_patterns = [
-            # Laravel - Enhanced
-            (r'Route::(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'Route::resource\(["\']([^"\']+)["\']', 'REST', r'\1'),
-            (r'Route::apiResource\(["\']([^"\']+)["\']', 'REST', r'\1'),
-            (r'Route::group\([^)]*\)', 'GROUP', ''),
-            (r'Route::middleware\([^)]*\)', 'MIDDLEWARE', ''),
-            (r'Route::prefix\(["\']([^"\']+)["\']\)', 'PREFIX', r'\1'),
-            (r'Route::name\(["\']([^"\']+)["\']\)', 'NAME', r'\1'),
-            
-            # Laravel with closures
-            (r'Route::(get|post|put|delete|patch)\(["\']([^"\']+)["\'],\s*function', r'\1', r'\2'),
-            (r'Route::(get|post|put|delete|patch)\(["\']([^"\']+)["\'],\s*\[[^\]]+\]', r'\1', r'\2'),
-            
-            # Laravel with path parameters
-            (r'Route::(get|post|put|delete|patch)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
-            
-            # Symfony - Enhanced
-            (r'@Route\(["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@Route\([^)]*path\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'@Route\([^)]*methods\s*=\s*\[["\']([^"\']+)["\']', r'\1', ''),
-            (r'@Route\([^)]*name\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            
-            # CodeIgniter - Enhanced
-            (r'\$route\[["\']([^"\']+)["\']\]', 'GET', r'\1'),
-            (r'\$route\[["\']([^"\']+)["\']\]\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            
-            # Slim Framework
-            (r'\$app->(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'\$app->(get|post|put|delete|patch)\(["\']([^"\']+)["\'],\s*function', r'\1', r'\2'),
-            
-            # Generic PHP patterns
-            (r'function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'public\s+function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-        ]
+        """Extract API definitions from file content - UNIVERSAL API DETECTION.
         
-        # Ruby frameworks - Enhanced and Comprehensive
-        ruby_patterns = [
-            # Ruby on Rails - Enhanced
-            (r'def\s+(index|show|create|update|destroy|new|edit)', 'REST', r'\1'),
-            (r'resources\s+:(\w+)', 'REST', r'\1'),
-            (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
-            (r'put\s+["\']([^"\']+)["\']', 'PUT', r'\1'),
-            (r'delete\s+["\']([^"\']+)["\']', 'DELETE', r'\1'),
-            (r'patch\s+["\']([^"\']+)["\']', 'PATCH', r'\1'),
-            (r'head\s+["\']([^"\']+)["\']', 'HEAD', r'\1'),
-            (r'options\s+["\']([^"\']+)["\']', 'OPTIONS', r'\1'),
-            
-            # Rails with constraints
-            (r'get\s+["\']([^"\']+)["\'],\s*to:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\'],\s*to:\s*["\']([^"\']+)["\']', 'POST', r'\1'),
-            
-            # Rails with path parameters
-            (r'get\s+["\']([^"\']*:[^"\']*)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']*:[^"\']*)["\']', 'POST', r'\1'),
-            
-            # Rails with namespaces
-            (r'namespace\s+:(\w+)\s+do', 'NAMESPACE', r'\1'),
-            (r'scope\s+["\']([^"\']+)["\']\s+do', 'SCOPE', r'\1'),
-            
-            # Sinatra - Enhanced
-            (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
-            (r'put\s+["\']([^"\']+)["\']', 'PUT', r'\1'),
-            (r'delete\s+["\']([^"\']+)["\']', 'DELETE', r'\1'),
-            (r'patch\s+["\']([^"\']+)["\']', 'PATCH', r'\1'),
-            (r'head\s+["\']([^"\']+)["\']', 'HEAD', r'\1'),
-            (r'options\s+["\']([^"\']+)["\']', 'OPTIONS', r'\1'),
-            
-            # Sinatra with blocks
-            (r'get\s+["\']([^"\']+)["\']\s+do', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\']\s+do', 'POST', r'\1'),
-            
-            # Sinatra with path parameters
-            (r'get\s+["\']([^"\']*:[^"\']*)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']*:[^"\']*)["\']', 'POST', r'\1'),
-            
-            # Generic Ruby patterns
-            (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'def\s+(\w+)\s*\([^)]*req[^)]*\)', 'HTTP', r'\1'),
-        ]
-        
-        # Go frameworks
-        go_patterns = [
-            # Gin
-            (r'\.(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'router\.(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Echo
-            (r'\.(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Gorilla Mux
-            (r'\.HandleFunc\(["\']([^"\']+)["\']', 'GET', r'\1'),
-        ]
-        
-        # Rust frameworks
-        rust_patterns = [
-            # Actix Web
-            (r'\.route\(["\']([^"\']+)["\'],\s*web::(get|post|put|delete|patch)', r'\2', r'\1'),
-            (r'web::(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Rocket
-            (r'#\[(get|post|put|delete|patch)\(["\']([^"\']+)["\']\]', r'\1', r'\2'),
-        ]
-        
-        # Generic patterns (catch-all)
-        generic_patterns = [
-            # URL patterns in any language
-            (r'["\']([^"\']*api[^"\']*)["\']', 'API', r'\1'),
-            (r'["\']([^"\']*endpoint[^"\']*)["\']', 'API', r'\1'),
-            (r'["\']([^"\']*service[^"\']*)["\']', 'API', r'\1'),
-            
-            # Function names that look like APIs
-            (r'def\s+(get_|post_|put_|delete_|patch_|api_|endpoint_)(\w+)', 'API', r'\1\2'),
-            (r'function\s+(get|post|put|delete|patch|api|endpoint)(\w+)', 'API', r'\1\2'),
-            (r'public\s+.*\s+(get|post|put|delete|patch|api|endpoint)(\w+)', 'API', r'\1\2'),
-            
-            # Route definitions
-            (r'route\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'path\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'url\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
-        ]
+        Raises SkippedSourceFile for generated, minified or binary files and when the scan overruns its time budget.
+        """
+        apis, is_final = self._extract_pattern_apis(content, file_path)
+        if is_final:
+            return apis
+        return self._complete_file_apis(apis, content, file_path)
+    
+    def _extract_pattern_apis(self, content: str, file_path: str) -> Tuple[List[DiscoveredAPI], bool]:
+        """CPU-only extraction (AST and patterns); the flag is True when no AI fallback or filtering applies."""
+        apis = []
         
-        # Combine ALL patterns for universal API detection
-        # Additional comprehensive patterns for more frameworks
-        additional_patterns = [
-            # TypeScript patterns
-            (r'@(Get|Post|Put|Delete|Patch|Head|Options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@Controller\(["\']([^"\']+)["\']', 'REST', r'\1'),
-            (r'@Injectable', 'SERVICE', ''),
-            
-            # Kotlin patterns
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'@RestController.*?class\s+(\w+)', 'REST', r'\1'),
-            (r'@Controller.*?class\s+(\w+)', 'REST', r'\1'),
-            
-            # Swift patterns
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'func\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            
-            # Dart/Flutter patterns
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'Future<.*>\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            
-            # Scala patterns
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            
-            # Clojure patterns
-            (r'\(defn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'\(defroutes\s+(\w+)', 'ROUTES', r'\1'),
-            
-            # Elixir patterns
-            (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
-            
-            # Haskell patterns
-            (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
-            (r'(\w+)\s*::\s*Handler', 'HANDLER', r'\1'),
-            
-            # F# patterns
-            (r'let\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Crystal patterns
-            (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
-            (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
-            (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            
-            # Nim patterns
-            (r'proc\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            
-            # Zig patterns
-            (r'fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'pub\s+fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            
-            # V patterns
-            (r'fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            (r'pub\s+fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-            
-            # Odin patterns
-            (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
-            (r'(\w+)\s*::\s*proc', 'PROC', r'\1'),
-            
-            # Jai patterns
-            (r'(\w+)\s*::\s*proc', 'PROC', r'\1'),
-            (r'fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
-        ]
+        # Generated, minified and binary files never reach the patterns (they can backtrack for seconds)
+        skip_reason = classify_source(content, file_path)
+        if skip_reason:
+            raise SkippedSourceFile(skip_reason)
+        deadline = None
+        if self.discovery_file_time_budget_seconds > 0:
+            deadline = time.perf_counter() + self.discovery_file_time_budget_seconds
         
         # Skip only pure configuration files that typically don't contain API endpoints
         config_files = [
@@ -1137,10 +1079,10 @@ class GitHubService:
         # Only skip if it's a config file AND has no API indicators
         if is_config_file and not has_api_indicators:
             logger.info(f"Skipping pure configuration file {file_path} - contains setup/configuration code, not API endpoints")
-            return apis
+            return apis, True
         elif has_config_patterns and not has_api_indicators:
             logger.info(f"Skipping configuration file {file_path} - contains setup/configuration code, not API endpoints")
-            return apis
+            return apis, True
         
         # Special handling for C# controllers with [Route("api/[controller]")] pattern
         if file_path.endswith('.cs') and '[Route("api/[controller]")]' in content:
@@ -1148,89 +1090,80 @@ class GitHubService:
             csharp_apis = self._extract_csharp_controller_apis(content, file_path)
             if csharp_apis:
                 apis.extend(csharp_apis)
-                return apis  # Return early for C# controllers
-        
-        all_patterns = (python_patterns + java_patterns + js_patterns + 
-                       csharp_patterns + php_patterns + ruby_patterns + 
-                       go_patterns + rust_patterns + generic_patterns + additional_patterns)
-        
-        for pattern_tuple in all_patterns:
-            if len(pattern_tuple) == 3:
-                pattern, method_pattern, endpoint_pattern = pattern_tuple
+                return apis, True  # Return early for C# controllers
+        
+        # Split the file once; line lookups and function bodies are shared by all matches
+        source_index = SourceFileIndex(content, file_path)
+        
+        # Python modules are parsed instead of pattern matched; unparsable files fall back to the patterns
+        if file_path.endswith('.py'):
+            apis.extend(self._extract_python_apis(content, file_path))
+        
+        # Route markers are located in one pass and only their candidate positions are matched
+        route_matches = get_route_scanner(file_path).scan(content, deadline) if not apis else []
+        for route_pattern, match in route_matches:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise SkippedSourceFile(f"route extraction exceeded its {self.discovery_file_time_budget_seconds:g}s time budget")
+            pattern = route_pattern.regex.pattern
+            method_pattern = route_pattern.method
+            endpoint_pattern = route_pattern.endpoint
+            
+            # Extract HTTP method
+            if callable(method_pattern):
+                http_method = method_pattern(match)
             else:
-                # Handle old format for backward compatibility
-                pattern = pattern_tuple
-                method_pattern = 'GET'
-                endpoint_pattern = r'\1'
-            
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                # Extract HTTP method
-                if callable(method_pattern):
-                    http_method = method_pattern(match)
-                else:
-                    try:
-                        http_method = match.expand(method_pattern).upper()
-                    except:
-                        http_method = 'GET'
-                
-                # Extract endpoint
                 try:
-                    endpoint = match.expand(endpoint_pattern)
+                    http_method = match.expand(method_pattern).upper()
                 except:
-                    endpoint = match.group(1) if match.groups() else ''
-                
-                if endpoint:
-                    # Validate that this is actually an API endpoint, not configuration
-                    if self._is_valid_api_endpoint(endpoint, content, match.start()):
-                        # Extract function name (next line or same line)
-                        lines = content.split('\n')
-                        match_line = content[:match.start()].count('\n')
-                        
-                        # Debug: Log line number calculation
-                        logger.debug(f"Found API '{endpoint}' at line {match_line + 1} in {file_path}")
-                        
-                        function_name = self._extract_function_name(lines, match_line)
-                        framework = self._detect_framework(file_path, pattern)
-                        
-                        # Calculate complexity score
-                        complexity = self._calculate_complexity(content, match_line)
-                        
-                        # Identify potential issues
-                        potential_issues = self._identify_potential_issues(content, match_line)
-                        
-                        # Determine risk level
-                        risk_level = self._determine_risk_level(complexity, potential_issues)
-                        
-                        # Extract code snippet
-                        code_snippet = self._extract_code_snippet(lines, match_line)
-                        
-                        # Create endpoint with HTTP method
-                        full_endpoint = f"{http_method} {endpoint}" if http_method != 'GET' else endpoint
-                        
-                        # Debug: Log API creation with line number
-                        logger.debug(f"Creating API '{full_endpoint}' with line_number={match_line + 1}")
-                        
-                        api = DiscoveredAPI(
-                            endpoint=full_endpoint,
-                            file_path=file_path,
-                            function_name=function_name,
-                            framework=framework,
-                            complexity_score=complexity,
-                            potential_issues=potential_issues,
-                            risk_level=risk_level,
-                            code_snippet=code_snippet,
-                            line_number=match_line + 1  # Convert 0-based to 1-based line numbers
-                        )
-                        apis.append(api)
-        
+                    http_method = 'GET'
+            
+            # Extract endpoint
+            try:
+                endpoint = match.expand(endpoint_pattern)
+            except:
+                endpoint = match.group(1) if match.groups() else ''
+            
+            if endpoint:
+                # Validate that this is actually an API endpoint, not configuration
+                if self._is_valid_api_endpoint(endpoint, content, match.start()):
+                    # Extract function name (next line or same line)
+                    lines = source_index.lines
+                    match_line = source_index.line_of(match.start())
+                    
+                    # Debug: Log line number calculation
+                    logger.debug(f"Found API '{endpoint}' at line {match_line + 1} in {file_path}")
+                    
+                    function_name = self._extract_function_name(lines, match_line)
+                    framework = self._detect_framework(file_path, pattern)
+                    
+                    # Snippet, complexity and risk are computed from the location when first needed
+                    # Create endpoint with HTTP method
+                    full_endpoint = f"{http_method} {endpoint}" if http_method != 'GET' else endpoint
+                    
+                    # Debug: Log API creation with line number
+                    logger.debug(f"Creating API '{full_endpoint}' with line_number={match_line + 1}")
+                    
+                    api = DiscoveredAPI(
+                        endpoint=full_endpoint,
+                        file_path=file_path,
+                        function_name=function_name,
+                        framework=framework,
+                        line_number=match_line + 1  # Convert 0-based to 1-based line numbers
+                    )
+                    apis.append(api)
+        
+        return apis, False
+    
+    def _complete_file_apis(self, apis: List[DiscoveredAPI], content: str, file_path: str,
+                            use_ai: bool = True) -> List[DiscoveredAPI]:
+        """AI fallback detection, filtering and AI validation of the pattern matches of a file."""
         # If no APIs found with manual patterns, try AI-powered detection
-        if not apis:
+        if not apis and use_ai:
             logger.info(f"No APIs found with pattern matching in {file_path}, trying AI analysis...")
             apis = self._ai_powered_api_detection(content, file_path)
         
         # If still no APIs found, try comprehensive AI analysis
-        if not apis:
+        if not apis and use_ai:
             logger.info(f"No APIs found with standard AI detection in {file_path}, trying comprehensive analysis...")
             apis = self._comprehensive_ai_analysis(content, file_path)
         
@@ -1345,11 +1278,36 @@ class GitHubService:
             if ('/' in endpoint or endpoint.startswith(('GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'HEAD', 'OPTIONS'))):
                 filtered_apis.append(api)
         
+        if not use_ai:
+            return filtered_apis
+        
         # AI validation to double-check if endpoints are actually APIs
         ai_validated_apis = self._ai_validate_apis(filtered_apis, file_path, content)
         
         return ai_validated_apis
     
+    def _extract_python_apis(self, content: str, file_path: str) -> List[DiscoveredAPI]:
+        """Extract FastAPI, Flask and Django routes from the module's syntax tree."""
+        routes = extract_python_routes(content)
+        if not routes:
+            return []
+        
+        apis = []
+        for route in routes:
+            # The parser knows where each handler ends, so its details need no indentation heuristic later
+            full_endpoint = f"{route.method} {route.path}" if route.method != 'GET' else route.path
+            apis.append(DiscoveredAPI(
+                endpoint=full_endpoint,
+                file_path=file_path,
+                function_name=route.function_name,
+                framework=route.framework,
+                line_number=route.start_line + 1,
+                end_line_number=route.end_line
+            ))
+        
+        logger.debug(f"AST extraction found {len(apis)} routes in {file_path}")
+        return apis
+    
     def _ai_validate_apis(self, apis: List[DiscoveredAPI], file_path: str, content: str) -> List[DiscoveredAPI]:
         """AI validation to double-check if discovered endpoints are actually APIs."""
         if not apis or not self.bedrock_service:
@@ -1523,8 +1481,8 @@ class GitHubService:
             base_name = controller_name.replace('Controller', '').lower()
             base_route = f"/api/{base_name}"
             
-            # Split content into lines for line number calculation
-            lines = content.split('\n')
+            # Index line starts for line number calculation
+            source_index = SourceFileIndex(content, file_path)
             
             # Find all method blocks (from [HttpMethod] to the closing brace)
             # This pattern matches method blocks with HTTP attributes
@@ -1537,7 +1495,7 @@ class GitHubService:
                 
                 # Calculate line number for the method declaration
                 method_start = content.find(method_block)
-                match_line = content[:method_start].count('\n')
+                match_line = source_index.line_of(method_start)
                 
                 logger.debug(f"C# Controller Detection - Found method block:")
                 logger.debug(f"  HTTP Method: {http_method}")
@@ -1551,22 +1509,10 @@ class GitHubService:
                 # Create full endpoint with method
                 full_endpoint = f"{http_method} {endpoint}"
                 
-                # Extract function name and other details
+                # Extract function name and framework (snippet and metrics are computed when first needed)
                 function_name = method_name
                 framework = "ASP.NET Core"
                 
-                # Calculate complexity
-                complexity = self._calculate_complexity(content, match_line)
-                
-                # Identify potential issues
-                potential_issues = self._identify_potential_issues(content, match_line)
-                
-                # Determine risk level
-                risk_level = self._determine_risk_level(complexity, potential_issues)
-                
-                # Extract code snippet
-                code_snippet = self._extract_code_snippet(lines, match_line)
-                
                 logger.debug(f"Found C# API: {full_endpoint} at line {match_line + 1}")
                 
                 api = DiscoveredAPI(
@@ -1574,10 +1520,6 @@ class GitHubService:
                     file_path=file_path,
                     function_name=function_name,
                     framework=framework,
-                    complexity_score=complexity,
-                    potential_issues=potential_issues,
-                    risk_level=risk_level,
-                    code_snippet=code_snippet,
                     line_number=match_line + 1
                 )
                 apis.append(api)
@@ -1642,32 +1584,17 @@ class GitHubService:
             logger.error(f"Failed to extract C# endpoint: {str(e)}")
             return f"{base_route}/{method_name.lower()}"
     
-    def _extract_apis_from_file_chunked(self, owner: str, repo: str, file_path: str, branch: str = None) -> List[DiscoveredAPI]:
+    def _extract_apis_from_file_chunked(self, content: str, file_path: str) -> List[DiscoveredAPI]:
         """Extract APIs from large files using chunked processing for better performance."""
         all_apis = []
         chunk_size = 8192  # 8KB chunks
         overlap = 1024     # 1KB overlap to catch APIs split across chunks
         
         try:
-            # Get file content in chunks
-            file_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{file_path}"
-            if branch:
-                file_url += f"?ref={branch}"
-            
-            headers = {'Authorization': f'token {self.token}'}
-            response = requests.get(file_url, headers=headers)
-            
-            if response.status_code != 200:
-                logger.warning(f"Failed to fetch file {file_path}: {response.status_code}")
-                return []
-            
-            file_data = response.json()
-            if file_data.get('type') != 'file':
-                return []
-            
-            # Decode content
-            import base64
-            content = base64.b64decode(file_data['content']).decode('utf-8', errors='ignore')
+            # Classify the whole file once; a minified bundle split into chunks would look like many files
+            skip_reason = classify_source(content, file_path)
+            if skip_reason:
+                raise SkippedSourceFile(skip_reason)
             
             # Process file in chunks
             lines = content.split('\n')
@@ -1689,6 +1616,8 @@ class GitHubService:
                 for api in chunk_apis:
                     if api.line_number:
                         api.line_number += chunk_start
+                    if api.end_line_number:
+                        api.end_line_number += chunk_start
                 
                 all_apis.extend(chunk_apis)
                 
@@ -1709,6 +1638,8 @@ class GitHubService:
             logger.info(f"Chunked processing found {len(unique_apis)} unique APIs in {file_path}")
             return unique_apis
             
+        except SkippedSourceFile:
+            raise
         except Exception as e:
             logger.error(f"Chunked processing failed for {file_path}: {str(e)}")
             return []
@@ -2260,17 +2191,104 @@ class GitHubService:
         else:
             return 'Unknown'
     
-    def _calculate_complexity(self, content: str, match_line: int) -> float:
-        """Calculate complexity score for the API function."""
-        lines = content.split('\n')
-        start_line = match_line
-        end_line = self._find_function_end(lines, match_line)
+    def _bind_api_details(self, apis: List[DiscoveredAPI], source: RepositorySource,
+                          blob_sha: Optional[str] = None, content: Optional[str] = None) -> List[DiscoveredAPI]:
+        """Let the APIs compute their snippet and metrics from the source on first access."""
+        if content is not None and apis:
+            self._remember_api_source(self._api_source_key(source, apis[0].file_path, blob_sha), content)
+        loader = partial(self._load_api_details, source)
+        for api in apis:
+            if blob_sha and not api.blob_sha:
+                api.blob_sha = blob_sha
+            api.bind_detail_loader(loader)
+        return apis
+    
+    def _api_source_key(self, source: RepositorySource, file_path: str, blob_sha: Optional[str]) -> str:
+        """Cache key of a file's content: its blob SHA when known, as blobs never change."""
+        return f"blob:{blob_sha}" if blob_sha else f"{source.cache_key()}:{file_path}"
+    
+    def _remember_api_source(self, key: str, content: Any):
+        """Keep a file's content (or its index) in the bounded LRU used for API details."""
+        with self._api_detail_lock:
+            previous = self._api_detail_sources.pop(key, None)
+            if previous is not None:
+                self._api_detail_source_bytes -= self._source_size(previous)
+            self._api_detail_sources[key] = content
+            self._api_detail_source_bytes += self._source_size(content)
+            while self._api_detail_source_bytes > self.api_detail_cache_bytes and len(self._api_detail_sources) > 1:
+                _, evicted = self._api_detail_sources.popitem(last=False)
+                self._api_detail_source_bytes -= self._source_size(evicted)
+    
+    @staticmethod
+    def _source_size(content: Any) -> int:
+        return len(content.content if isinstance(content, SourceFileIndex) else content)
+    
+    def _load_api_details(self, source: RepositorySource, api: DiscoveredAPI) -> Dict[str, Any]:
+        """Compute an API's snippet and metrics from its file, fetching the file if it is no longer cached."""
+        key = self._api_source_key(source, api.file_path, api.blob_sha)
+        with self._api_detail_lock:
+            cached = self._api_detail_sources.get(key)
+            if cached is not None:
+                self._api_detail_sources.move_to_end(key)
+        
+        if cached is None:
+            content = source.get_blob_content(api.blob_sha, api.file_path) if api.blob_sha else source.get_file_content(api.file_path)
+            if content is None:
+                logger.warning(f"Could not load {api.file_path} to compute details of {api.endpoint}")
+                return {}
+            cached = content
         
-        if end_line == -1:
-            end_line = min(start_line + 20, len(lines))
+        # Split once per file; every API of the file reuses the index
+        source_index = cached if isinstance(cached, SourceFileIndex) else SourceFileIndex(cached, api.file_path)
+        if source_index is not cached:
+            self._remember_api_source(key, source_index)
         
-        function_lines = lines[start_line:end_line]
-        function_content = '\n'.join(function_lines)
+        try:
+            return self._compute_api_details(source_index, api)
+        except Exception as e:
+            logger.warning(f"Could not compute details of {api.endpoint} in {api.file_path}: {str(e)}")
+            return {}
+    
+    def _compute_api_details(self, source_index: SourceFileIndex, api: DiscoveredAPI) -> Dict[str, Any]:
+        """Snippet, complexity, potential issues and risk level of the API at its recorded location."""
+        line_number = api.line_number or self._find_handler_line(source_index, api.function_name)
+        match_line = max(0, min((line_number or 1) - 1, len(source_index.lines) - 1))
+        snippet_start = match_line
+        end_line = api.end_line_number
+        if end_line is not None:
+            source_index.set_function_end(match_line, end_line)
+        else:
+            # The match is part of a definition's header (decorator, annotation, signature): use its exact span
+            symbol = source_index.symbol_at(match_line)
+            if symbol is not None:
+                snippet_start, end_line = symbol.start_line, symbol.end_line
+        
+        complexity = self._calculate_complexity(source_index, match_line)
+        potential_issues = self._identify_potential_issues(source_index, match_line)
+        return {
+            'complexity_score': complexity,
+            'potential_issues': potential_issues,
+            'risk_level': self._determine_risk_level(complexity, potential_issues),
+            'code_snippet': self._extract_code_snippet(source_index.lines, snippet_start, end_line)
+        }
+    
+    def _find_handler_line(self, source_index: SourceFileIndex, function_name: str) -> Optional[int]:
+        """1-based line of a handler's definition, for APIs known only by name (e.g. from an OpenAPI spec)."""
+        if not function_name:
+            return None
+        symbols = source_index.symbols_named(function_name)
+        if symbols:
+            return symbols[0].start_line + 1
+        match = re.search(
+            rf'(?:\bdef|\bfunction|\bfunc(?:\s*\([^)]*\))?|\bpublic|\bprivate|\bprotected)[^\n(]*?\b{re.escape(function_name)}\s*[(<]'
+            rf'|\b{re.escape(function_name)}\s*[:=]\s*(?:async\s*)?(?:function\b|\()',
+            source_index.content
+        )
+        return source_index.line_of(match.start()) + 1 if match else None
+    
+    def _calculate_complexity(self, source_index: SourceFileIndex, match_line: int) -> float:
+        """Calculate complexity score for the API function."""
+        function_content = source_index.function_text(match_line)
         
         # Simple complexity calculation
         complexity = 0
@@ -2284,32 +2302,10 @@ class GitHubService:
         
         return min(complexity / 10.0, 10.0)  # Normalize to 0-10 scale
     
-    def _find_function_end(self, lines: List[str], start_line: int) -> int:
-        """Find the end of a function starting from start_line."""
-        indent_level = len(lines[start_line]) - len(lines[start_line].lstrip())
-        
-        for i in range(start_line + 1, len(lines)):
-            line = lines[i]
-            if line.strip() == '':
-                continue
-            
-            current_indent = len(line) - len(line.lstrip())
-            if current_indent <= indent_level and line.strip():
-                return i
-        
-        return -1
-    
-    def _identify_potential_issues(self, content: str, match_line: int) -> List[str]:
+    def _identify_potential_issues(self, source_index: SourceFileIndex, match_line: int) -> List[str]:
         """Identify potential issues in the API function."""
         issues = []
-        lines = content.split('\n')
-        start_line = match_line
-        end_line = self._find_function_end(lines, match_line)
-        
-        if end_line == -1:
-            end_line = min(start_line + 20, len(lines))
-        
-        function_content = '\n'.join(lines[start_line:end_line])
+        function_content = source_index.function_text(match_line)
         
         # Check for common issues
         if 'db.query' in function_content and 'for ' in function_content:
@@ -2352,8 +2348,12 @@ class GitHubService:
         else:
             return SeverityLevel.LOW
     
-    def _extract_code_snippet(self, lines: List[str], match_line: int) -> str:
+    def _extract_code_snippet(self, lines: List[str], match_line: int, end_line: Optional[int] = None) -> str:
         """Extract EXACT function/code block definition - no extra lines."""
+        # The span is already known (from the Python AST or the symbol index), no need to search for it
+        if end_line is not None:
+            return '\n'.join(lines[match_line:end_line]).rstrip()
+        
         # Try to find the function/route definition start
         start_line = match_line
         end_line = match_line
@@ -0,0 +1,158 @@
+"""
+OpenAPI / Swagger spec parsing for API discovery.
+
+A committed spec lists every route of a service in one file, so discovery can
+build its API set from the spec instead of pattern matching the sources.
+"""
+import re
+import json
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+try:
+    import yaml
+except ImportError:  # YAML specs are skipped without PyYAML
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+# openapi.json, swagger.yaml, petstore-openapi.yml, openapi.v1.json, api-docs.json, ...
+SPEC_FILE_REGEX = re.compile(
+    r'(?:^|/)(?:[\w.-]*[._-])?(?:openapi|swagger)(?:[._-][\w.-]*)?\.(?:json|ya?ml)$|(?:^|/)api-docs\.json$',
+    re.IGNORECASE
+)
+
+# Specs under these directories describe dependencies or test data, not the repository's API
+EXCLUDED_SPEC_DIRECTORY_REGEX = re.compile(
+    r'(?:^|/)(?:node_modules|vendor|third_party|tests?|__tests__|fixtures|examples?|samples?)/',
+    re.IGNORECASE
+)
+
+# Specs larger than this are generated bundles of many services, not a repository's own API
+MAX_SPEC_SIZE = 5 * 1024 * 1024
+
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'patch', 'head', 'options')
+
+
+class SpecOperation(NamedTuple):
+    """One operation (method + path) of an OpenAPI spec."""
+    method: str
+    path: str
+    operation_id: Optional[str]
+    controller: Optional[str]  # x-openapi-router-controller (Connexion) or similar handler module hint
+    line_number: Optional[int]  # Line of the path entry in the spec file
+
+
+def is_spec_file(file_path: str, size: int = 0) -> bool:
+    """Check whether a path looks like a committed OpenAPI/Swagger spec."""
+    return (bool(SPEC_FILE_REGEX.search(file_path)) and size <= MAX_SPEC_SIZE
+            and not EXCLUDED_SPEC_DIRECTORY_REGEX.search(file_path))
+
+
+def parse_spec(content: str, file_path: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON or YAML spec, or None if the file is not an OpenAPI/Swagger document."""
+    try:
+        if file_path.lower().endswith('.json'):
+            spec = json.loads(content)
+        elif yaml is not None:
+            spec = yaml.safe_load(content)
+        else:
+            logger.info(f"PyYAML is not installed, skipping spec {file_path}")
+            return None
+    except Exception as e:
+        logger.debug(f"Could not parse spec candidate {file_path}: {str(e)}")
+        return None
+
+    if not isinstance(spec, dict) or not isinstance(spec.get('paths'), dict):
+        return None
+    if 'openapi' not in spec and 'swagger' not in spec:
+        return None
+    return spec
+
+
+def _base_path(spec: Dict[str, Any]) -> str:
+    """Path prefix shared by all operations (Swagger 2 basePath or the first OpenAPI 3 server URL)."""
+    if 'swagger' in spec:
+        base = spec.get('basePath') or ''
+    else:
+        servers = spec.get('servers') or []
+        url = servers[0].get('url', '') if servers and isinstance(servers[0], dict) else ''
+        # Server URLs may be absolute or relative, and may contain {variables}
+        base = urlparse(url).path if '://' in url else url
+        if '{' in base:
+            base = ''
+    return base.rstrip('/')
+
+
+def _line_of_path(content: str, path: str) -> Optional[int]:
+    """1-based line of a path's key in the spec text."""
+    for key in (f'"{path}"', f"'{path}'", f"{path}:"):
+        offset = content.find(key)
+        if offset != -1:
+            return content.count('\n', 0, offset) + 1
+    return None
+
+
+def spec_operations(spec: Dict[str, Any], content: str) -> List[SpecOperation]:
+    """List the operations of a parsed spec with their full paths."""
+    base = _base_path(spec)
+    operations = []
+    for path, path_item in spec['paths'].items():
+        if not isinstance(path_item, dict):
+            continue
+        line_number = _line_of_path(content, path)
+        path_controller = path_item.get('x-openapi-router-controller')
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if not isinstance(operation, dict):
+                continue
+            operations.append(SpecOperation(
+                method=method.upper(),
+                path=f"{base}{path}" if base else path,
+                operation_id=operation.get('operationId'),
+                controller=operation.get('x-openapi-router-controller') or path_controller,
+                line_number=line_number
+            ))
+    return operations
+
+
+def handler_candidates(operation: SpecOperation) -> List[str]:
+    """Module path suffixes (without extension) that may hold the operation's handler.
+
+    Dotted operationIds ("api.users.get_user") and router controllers name the module directly.
+    """
+    candidates = []
+    if operation.controller:
+        candidates.append(operation.controller.replace('.', '/'))
+    if operation.operation_id and '.' in operation.operation_id:
+        candidates.append(operation.operation_id.rsplit('.', 1)[0].replace('.', '/'))
+    return candidates
+
+
+def handler_function(operation: SpecOperation) -> str:
+    """Name of the handler function, from the operationId when there is one."""
+    if operation.operation_id:
+        return operation.operation_id.rsplit('.', 1)[-1]
+    path_name = re.sub(r'\W+', '_', operation.path).strip('_') or 'root'
+    return f"{operation.method.lower()}_{path_name}"
+
+
+# {id}, :id, <id> and <int:id> all name one path segment
+_PATH_PARAMETER_REGEX = re.compile(r'\{[^}/]*\}|<[^>/]*>|:\w+')
+
+
+def route_key(method: str, path: str) -> str:
+    """Comparable form of a route, independent of the framework's path parameter syntax."""
+    path = _PATH_PARAMETER_REGEX.sub('{}', path.strip()).rstrip('/') or '/'
+    if not path.startswith('/'):
+        path = '/' + path
+    return f"{method.upper()} {path.lower()}"
+
+
+def endpoint_route_key(endpoint: str) -> str:
+    """route_key of a discovered endpoint ("POST /users" or "/users" for GET)."""
+    method, _, path = endpoint.strip().partition(' ')
+    if path and method.lower() in HTTP_METHODS:
+        return route_key(method, path)
+    return route_key('GET', endpoint)
@@ -0,0 +1,347 @@
+"""
+AST-based route extraction for Python web applications.
+
+Walks the syntax tree of a module to find FastAPI, Flask and Django routes:
+route decorators, APIRouter(prefix=...) / Blueprint(url_prefix=...) objects,
+include_router / register_blueprint mounts, add_url_rule calls and Django
+urlpatterns. Mount prefixes are resolved within the module; routers mounted
+from another module keep their own prefix only.
+"""
+import ast
+import re
+import logging
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+HTTP_METHOD_DECORATORS = {'get', 'post', 'put', 'delete', 'patch', 'head', 'options', 'trace'}
+ROUTE_DECORATORS = {'route', 'api_route'}
+
+# Constructors that create an application or router, with the framework they belong to
+ROUTER_CONSTRUCTORS = {
+    'FastAPI': 'FastAPI',
+    'APIRouter': 'FastAPI',
+    'Flask': 'Flask',
+    'Blueprint': 'Flask',
+}
+
+DJANGO_ROUTE_FUNCTIONS = {'path', 're_path', 'url'}
+
+# A module without any of these cannot declare a route, so it is not parsed at all
+ROUTE_MARKER_REGEX = re.compile(
+    r'@[\w.]+\.(?:' + '|'.join(sorted(HTTP_METHOD_DECORATORS | ROUTE_DECORATORS)) + r')\('
+    r'|add_url_rule|include_router|register_blueprint|django\.(?:conf\.)?urls'
+)
+
+
+class PythonRoute(NamedTuple):
+    """A route found in a Python module, with the exact span of its handler."""
+    method: str
+    path: str
+    function_name: str
+    framework: str
+    start_line: int  # 0-based line of the first decorator, or of the routing call
+    end_line: int  # 0-based line after the handler
+
+
+class _Router(NamedTuple):
+    framework: str
+    prefix: str
+
+
+def _join_paths(prefix: str, path: str) -> str:
+    """Join a mount prefix and a route path the way the frameworks concatenate them."""
+    if not prefix:
+        return path
+    if not path:
+        return prefix
+    return prefix.rstrip('/') + '/' + path.lstrip('/')
+
+
+def _name_of(node: ast.AST) -> Optional[str]:
+    """Get the trailing name of a Name or Attribute node (app, self.app -> 'app')."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _keyword(call: ast.Call, *names: str) -> Optional[ast.AST]:
+    """Get the value of the first matching keyword argument."""
+    for keyword in call.keywords:
+        if keyword.arg in names:
+            return keyword.value
+    return None
+
+
+class _ModuleRoutes:
+    """Collects the routers, mounts and routes of one parsed module."""
+
+    def __init__(self, tree: ast.Module):
+        self.tree = tree
+        self.constants: Dict[str, str] = {}
+        self.routers: Dict[str, _Router] = {}
+        self.mounts: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        self.functions: Dict[str, ast.AST] = {}
+        self.decorated: List[ast.AST] = []
+        self.calls: List[ast.Call] = []
+        self.imported_modules: Set[str] = set()
+        self.routes: List[PythonRoute] = []
+        self._seen: Set[Tuple[str, str, int]] = set()
+
+    def string_value(self, node: Optional[ast.AST]) -> Optional[str]:
+        """Evaluate a string literal, a module-level string constant, or an f-string/concatenation of them."""
+        if node is None:
+            return None
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Name):
+            return self.constants.get(node.id)
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                part = self.string_value(value.value if isinstance(value, ast.FormattedValue) else value)
+                if part is None:
+                    return None
+                parts.append(part)
+            return ''.join(parts)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left = self.string_value(node.left)
+            right = self.string_value(node.right)
+            if left is not None and right is not None:
+                return left + right
+        return None
+
+    def string_list(self, node: Optional[ast.AST]) -> List[str]:
+        """Evaluate a list, tuple or set of strings."""
+        if not isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return []
+        values = [self.string_value(element) for element in node.elts]
+        return [value for value in values if value is not None]
+
+    def collect_definitions(self):
+        """Single pass over the statements: string constants, imports, routers, routing calls and handlers."""
+        for node in self.tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                value = self.string_value(node.value)
+                if value is not None:
+                    self.constants[node.targets[0].id] = value
+
+        # Routing only happens in statements, so expression subtrees are never walked
+        stack = list(reversed(self.tree.body))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ast.Import):
+                self.imported_modules.update(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                self.imported_modules.add(node.module.split('.')[0])
+                if node.module in ('django.urls', 'django.conf.urls'):
+                    self.imported_modules.add('django.urls')
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.functions.setdefault(node.name, node)
+                if node.decorator_list:
+                    self.decorated.append(node)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                self._collect_router(node)
+                self._collect_calls(node.value)
+            elif isinstance(node, ast.Expr):
+                self._collect_calls(node.value)
+
+            for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+                children = getattr(node, field, None)
+                if isinstance(children, list):
+                    stack.extend(reversed(children))
+
+        for call in self.calls:
+            self._collect_mount(call)
+
+    def _collect_calls(self, node: Optional[ast.AST]):
+        """Collect calls made directly by a statement, including calls listed in urlpatterns-style literals."""
+        if isinstance(node, ast.Call):
+            self.calls.append(node)
+        elif isinstance(node, (ast.List, ast.Tuple)):
+            for element in node.elts:
+                self._collect_calls(element)
+        elif isinstance(node, ast.BinOp):
+            self._collect_calls(node.left)
+            self._collect_calls(node.right)
+
+    def _collect_router(self, node: ast.AST):
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        call = getattr(node, 'value', None)
+        if not isinstance(call, ast.Call):
+            return
+        framework = ROUTER_CONSTRUCTORS.get(_name_of(call.func))
+        if framework is None:
+            return
+        prefix = self.string_value(_keyword(call, 'prefix', 'url_prefix')) or ''
+        for target in targets:
+            name = _name_of(target)
+            if name:
+                self.routers[name] = _Router(framework, prefix)
+
+    def _collect_mount(self, call: ast.Call):
+        if not isinstance(call.func, ast.Attribute):
+            return
+        if call.func.attr not in ('include_router', 'register_blueprint') or not call.args:
+            return
+        parent = _name_of(call.func.value)
+        child = call.args[0].id if isinstance(call.args[0], ast.Name) else None
+        if parent and child:
+            prefix = self.string_value(_keyword(call, 'prefix', 'url_prefix'))
+            self.mounts.setdefault(child, []).append((parent, prefix))
+
+    def framework_for(self, router_name: Optional[str]) -> str:
+        """Get the framework of a router, falling back to the module's imports."""
+        if router_name in self.routers:
+            return self.routers[router_name].framework
+        if 'fastapi' in self.imported_modules:
+            return 'FastAPI'
+        if 'flask' in self.imported_modules:
+            return 'Flask'
+        return 'Python'
+
+    def prefixes_for(self, router_name: Optional[str], visiting: Optional[Set[str]] = None) -> List[str]:
+        """Resolve every full path prefix a router is mounted under."""
+        router = self.routers.get(router_name)
+        own_prefix = router.prefix if router else ''
+        visiting = (visiting or set()) | {router_name}
+
+        prefixes = []
+        for parent, mount_prefix in self.mounts.get(router_name, []):
+            if parent in visiting:
+                continue
+            if router and router.framework == 'Flask' and mount_prefix is not None:
+                # register_blueprint(url_prefix=...) replaces the blueprint's own prefix
+                local_prefix = mount_prefix
+            else:
+                local_prefix = _join_paths(mount_prefix or '', own_prefix)
+            for parent_prefix in self.prefixes_for(parent, visiting):
+                prefixes.append(_join_paths(parent_prefix, local_prefix))
+
+        return prefixes or [own_prefix]
+
+    def add_route(self, method: str, path: str, function_name: str, framework: str, node: ast.AST,
+                  start_line: int):
+        """Record a route once per method, path and handler."""
+        key = (method, path, start_line)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.routes.append(PythonRoute(method, path, function_name, framework, start_line, node.end_lineno))
+
+    def collect_decorated_routes(self):
+        """Routes declared with @app.get(...), @router.route(...), @bp.route(...) and friends."""
+        for node in self.decorated:
+            start_line = min(decorator.lineno for decorator in node.decorator_list) - 1
+
+            for decorator in node.decorator_list:
+                if not isinstance(decorator, ast.Call) or not isinstance(decorator.func, ast.Attribute):
+                    continue
+                attr = decorator.func.attr
+                router_name = _name_of(decorator.func.value)
+
+                if attr in HTTP_METHOD_DECORATORS:
+                    methods = [attr.upper()]
+                elif attr in ROUTE_DECORATORS:
+                    methods = [m.upper() for m in self.string_list(_keyword(decorator, 'methods'))]
+                    if not methods and isinstance(node, ast.ClassDef):
+                        # Class-based resources expose one route per HTTP method they implement
+                        methods = [item.name.upper() for item in node.body
+                                   if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                                   and item.name in HTTP_METHOD_DECORATORS]
+                    methods = methods or ['GET']
+                else:
+                    continue
+
+                path_node = decorator.args[0] if decorator.args else _keyword(decorator, 'path', 'rule')
+                path = self.string_value(path_node)
+                if path is None:
+                    continue
+                # Unknown objects only count when the argument clearly is a URL path (cache.get('key') is not)
+                if router_name not in self.routers and not path.startswith('/'):
+                    continue
+
+                framework = self.framework_for(router_name)
+                for prefix in self.prefixes_for(router_name):
+                    for method in methods:
+                        self.add_route(method, _join_paths(prefix, path), node.name, framework, node, start_line)
+
+    def collect_url_rules(self):
+        """Routes registered with app.add_url_rule(rule, endpoint, view_func, methods=[...])."""
+        for node in self.calls:
+            if not isinstance(node.func, ast.Attribute) or node.func.attr != 'add_url_rule':
+                continue
+            router_name = _name_of(node.func.value)
+            path = self.string_value(node.args[0] if node.args else _keyword(node, 'rule'))
+            if path is None:
+                continue
+
+            view = _keyword(node, 'view_func')
+            if view is None and len(node.args) > 2:
+                view = node.args[2]
+            if isinstance(view, ast.Call) and isinstance(view.func, ast.Attribute) and view.func.attr == 'as_view':
+                view = view.func.value
+            function_name = _name_of(view) if view is not None else None
+            function_name = function_name or self.string_value(node.args[1] if len(node.args) > 1 else None) or 'unknown_function'
+
+            methods = [m.upper() for m in self.string_list(_keyword(node, 'methods'))] or ['GET']
+            handler = self.functions.get(function_name, node)
+            start_line = self._start_line(handler)
+            framework = self.framework_for(router_name)
+            for prefix in self.prefixes_for(router_name):
+                for method in methods:
+                    self.add_route(method, _join_paths(prefix, path), function_name, framework, handler, start_line)
+
+    def collect_django_routes(self):
+        """Routes declared with path(), re_path() or url() in Django urlpatterns."""
+        if 'django.urls' not in self.imported_modules:
+            return
+        framework = 'Django REST Framework' if 'rest_framework' in self.imported_modules else 'Django'
+
+        for node in self.calls:
+            if _name_of(node.func) not in DJANGO_ROUTE_FUNCTIONS:
+                continue
+            if len(node.args) < 2:
+                continue
+            path = self.string_value(node.args[0])
+            view = node.args[1]
+            if path is None:
+                continue
+            if isinstance(view, ast.Call):
+                # include(...) mounts another urls module, which is resolved when that module is scanned
+                if not (isinstance(view.func, ast.Attribute) and view.func.attr == 'as_view'):
+                    continue
+                view = view.func.value
+            function_name = _name_of(view) or 'unknown_function'
+
+            if _name_of(node.func) != 'path':
+                path = path.lstrip('^').rstrip('$')
+            path = '/' + path.lstrip('/')
+            self.add_route('GET', path, function_name, framework, node, node.lineno - 1)
+
+    @staticmethod
+    def _start_line(node: ast.AST) -> int:
+        decorators = getattr(node, 'decorator_list', None)
+        if decorators:
+            return min(decorator.lineno for decorator in decorators) - 1
+        return node.lineno - 1
+
+
+def extract_python_routes(content: str) -> Optional[List[PythonRoute]]:
+    """Extract the routes of a Python module, or None if it cannot be parsed."""
+    if not ROUTE_MARKER_REGEX.search(content):
+        return []
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError) as e:
+        logger.debug(f"AST parse failed, falling back to pattern matching: {str(e)}")
+        return None
+
+    module = _ModuleRoutes(tree)
+    module.collect_definitions()
+    module.collect_decorated_routes()
+    module.collect_url_rules()
+    module.collect_django_routes()
+    return sorted(module.routes, key=lambda route: route.start_line)
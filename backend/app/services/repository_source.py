@@ -0,0 +1,325 @@
+"""
+Repository source backends for reading files from GitHub or a local checkout.
+"""
+import os
+import asyncio
+import logging
+import subprocess
+from typing import List, Dict, Any, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Directories that never contain application source code
+SKIPPED_DIRECTORIES = {'.git', 'node_modules', '__pycache__', '.pytest_cache', 'venv', 'env', 'bin', 'obj', 'packages'}
+
+
+class RepositorySource:
+    """Read-only view of the files in one revision of a repository."""
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        """List all files as dicts with at least 'path', 'size' and 'type' keys."""
+        raise NotImplementedError
+
+    def get_file_content(self, path: str) -> Optional[str]:
+        """Get the decoded content of a single file, or None if unavailable."""
+        raise NotImplementedError
+
+    def prefetch_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Fetch many files at once when the backend can do so cheaply; missing paths are fetched individually."""
+        return {}
+
+    async def fetch_file_content_async(self, path: str, session=None) -> Optional[str]:
+        """Get a file without blocking the event loop; session is an aiohttp session for HTTP backends."""
+        return await asyncio.to_thread(self.get_file_content, path)
+
+    def describe(self) -> str:
+        """Human readable description used in logs."""
+        raise NotImplementedError
+
+    def cache_key(self) -> str:
+        """Stable identifier of the repository and branch, used for persisted indexes."""
+        raise NotImplementedError
+
+    def repository_key(self) -> str:
+        """Stable identifier of the repository alone, for data keyed by commit (the same on every branch)."""
+        raise NotImplementedError
+
+    def resolve_commit(self) -> Optional[str]:
+        """Resolve the commit SHA being read, or None if the source is not pinned to a commit."""
+        return None
+
+    def get_blob_content(self, sha: str, path: str) -> Optional[str]:
+        """Get the content of a blob found at path, even if the ref has moved since."""
+        return self.get_file_content(path)
+
+    def changed_files(self, base_commit: str) -> Optional[Dict[str, List[str]]]:
+        """Paths 'changed' (added, modified, renamed) and 'removed' since base_commit, or None if unknown."""
+        return None
+
+
+class GitHubRepositorySource(RepositorySource):
+    """Repository files served by the GitHub REST API."""
+
+    def __init__(self, github_service, owner: str, repo: str, branch: Optional[str] = None):
+        self.github_service = github_service
+        self.owner = owner
+        self.repo = repo
+        self.branch = branch
+
+    @property
+    def ref(self) -> Optional[str]:
+        """Ref the files are read at: the resolved commit, so that a push to the branch cannot mix two trees."""
+        return self.resolve_commit() or self.branch
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        """List all files through the Contents API."""
+        return self.github_service._get_all_files(self.owner, self.repo, '', self.ref)
+
+    def get_file_content(self, path: str) -> Optional[str]:
+        """Get file content through the Contents API."""
+        return self.github_service.get_file_content(self.owner, self.repo, path, self.ref)
+
+    async def fetch_file_content_async(self, path: str, session=None) -> Optional[str]:
+        """Get file content through the Contents API on the shared aiohttp session."""
+        if session is None:
+            return await super().fetch_file_content_async(path)
+        return await self.github_service.get_file_content_async(session, self.owner, self.repo, path, self.ref)
+
+    def prefetch_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Download large file sets as a single tarball."""
+        paths = list(paths)
+        threshold = self.github_service.bulk_fetch_threshold
+        if len(paths) <= threshold:
+            return {}
+        logger.info(f"{len(paths)} files exceed bulk fetch threshold ({threshold}), using tarball download")
+        return self.github_service.fetch_files_bulk(self.owner, self.repo, paths, self.ref)
+
+    def describe(self) -> str:
+        branch_info = f" (branch: {self.branch})" if self.branch else " (default branch)"
+        return f"{self.owner}/{self.repo}{branch_info}"
+
+    def cache_key(self) -> str:
+        return f"github:{self.owner}/{self.repo}:{self.branch or 'default'}"
+
+    def repository_key(self) -> str:
+        return f"github:{self.owner}/{self.repo}"
+
+    def get_blob_content(self, sha: str, path: str) -> Optional[str]:
+        """Get blob content through the Git Data API."""
+        content = self.github_service.get_blob_content(self.owner, self.repo, sha)
+        return content if content is not None else self.get_file_content(path)
+
+    def resolve_commit(self) -> Optional[str]:
+        """Resolve the branch head through the commits API, once: every read of this source is pinned to it."""
+        if not hasattr(self, '_commit'):
+            self._commit = self.github_service.get_commit_sha(self.owner, self.repo, self.branch)
+        return self._commit
+
+    def changed_files(self, base_commit: str) -> Optional[Dict[str, List[str]]]:
+        """Use the compare API to list files changed since base_commit."""
+        head_commit = self.resolve_commit()
+        if not head_commit:
+            return None
+        files = self.github_service.compare_commits(self.owner, self.repo, base_commit, head_commit)
+        if files is None:
+            return None
+
+        changes = {'changed': [], 'removed': []}
+        for file_info in files:
+            status = file_info.get('status')
+            if status == 'removed':
+                changes['removed'].append(file_info['filename'])
+                continue
+            if status == 'renamed' and file_info.get('previous_filename'):
+                changes['removed'].append(file_info['previous_filename'])
+            changes['changed'].append(file_info['filename'])
+        return changes
+
+
+class LocalRepositorySource(RepositorySource):
+    """Repository files read from a checked-out directory or a local git repository."""
+
+    def __init__(self, path: str, ref: Optional[str] = None):
+        self.path = os.path.abspath(path)
+        self.ref = ref
+        # Bare mirrors have no working tree, and a specific ref may differ from what is checked out
+        self.use_git_objects = self._is_bare_repository() or (ref is not None and self._is_git_repository())
+        self._blob_shas = {}
+
+    def _run_git(self, *args: str) -> str:
+        """Run a git command against the repository and return its stdout."""
+        result = subprocess.run(
+            ['git', '-C', self.path, *args],
+            capture_output=True, check=True
+        )
+        return result.stdout.decode('utf-8', errors='replace')
+
+    def _is_git_repository(self) -> bool:
+        """Check whether the path is inside a git repository."""
+        try:
+            return self._run_git('rev-parse', '--git-dir').strip() != ''
+        except Exception:
+            return False
+
+    def _is_bare_repository(self) -> bool:
+        """Check whether the path is a bare git repository."""
+        try:
+            return self._run_git('rev-parse', '--is-bare-repository').strip() == 'true'
+        except Exception:
+            return False
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        """List files from the git tree or by walking the directory."""
+        if self.use_git_objects:
+            return self._list_git_files()
+        return self._list_directory_files()
+
+    def _list_git_files(self) -> List[Dict[str, Any]]:
+        """List blobs with 'git ls-tree -r -l'."""
+        files = []
+        output = self._run_git('ls-tree', '-r', '-l', '-z', self.ref or 'HEAD')
+
+        for entry in output.split('\0'):
+            if not entry:
+                continue
+            # Format: <mode> SP <type> SP <object> SP+ <size> TAB <path>
+            meta, path = entry.split('\t', 1)
+            mode, obj_type, sha, size = meta.split()
+            if obj_type != 'blob' or mode == '120000':
+                continue
+            if any(part in SKIPPED_DIRECTORIES for part in path.split('/')[:-1]):
+                continue
+            self._blob_shas[path] = sha
+            files.append({
+                'path': path,
+                'name': path.split('/')[-1],
+                'size': int(size) if size.isdigit() else 0,
+                'type': 'file',
+                'sha': sha
+            })
+
+        return files
+
+    def _list_directory_files(self) -> List[Dict[str, Any]]:
+        """List files by walking the checked-out directory."""
+        files = []
+
+        for root, dirs, filenames in os.walk(self.path):
+            dirs[:] = [d for d in dirs if d not in SKIPPED_DIRECTORIES]
+            for filename in filenames:
+                full_path = os.path.join(root, filename)
+                if os.path.islink(full_path):
+                    continue
+                rel_path = os.path.relpath(full_path, self.path).replace(os.sep, '/')
+                files.append({
+                    'path': rel_path,
+                    'name': filename,
+                    'size': os.path.getsize(full_path),
+                    'type': 'file'
+                })
+
+        return files
+
+    def get_file_content(self, path: str) -> Optional[str]:
+        """Read a single file from the git object store or the working tree."""
+        try:
+            if self.use_git_objects:
+                return self.prefetch_files([path]).get(path)
+            with open(os.path.join(self.path, path), 'rb') as f:
+                return f.read().decode('utf-8')
+        except Exception as e:
+            logger.error(f"Error reading local file {path}: {str(e)}")
+            return None
+
+    def get_blob_content(self, sha: str, path: str) -> Optional[str]:
+        """Read a blob with 'git cat-file'."""
+        try:
+            return self._run_git('cat-file', 'blob', sha)
+        except Exception:
+            return self.get_file_content(path)
+
+    def prefetch_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Read many blobs through a single 'git cat-file --batch' process."""
+        if not self.use_git_objects:
+            return {}
+        if not self._blob_shas:
+            self._list_git_files()
+
+        contents = {}
+        wanted = [(path, self._blob_shas[path]) for path in paths if path in self._blob_shas]
+        if not wanted:
+            return contents
+
+        process = subprocess.Popen(
+            ['git', '-C', self.path, 'cat-file', '--batch'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        try:
+            for path, sha in wanted:
+                process.stdin.write(f"{sha}\n".encode())
+                process.stdin.flush()
+                # Header: <sha> SP <type> SP <size> LF, followed by the object and a trailing LF
+                header = process.stdout.readline().decode().split()
+                if len(header) != 3:
+                    continue
+                data = process.stdout.read(int(header[2]))
+                process.stdout.read(1)
+                try:
+                    contents[path] = data.decode('utf-8')
+                except UnicodeDecodeError:
+                    logger.debug(f"Skipping non UTF-8 blob: {path}")
+        finally:
+            process.stdin.close()
+            process.wait()
+
+        return contents
+
+    def describe(self) -> str:
+        ref_info = f" (ref: {self.ref})" if self.ref else ""
+        return f"{self.path}{ref_info}"
+
+    def cache_key(self) -> str:
+        return f"local:{self.path}:{self.ref or 'HEAD'}"
+
+    def repository_key(self) -> str:
+        return f"local:{self.path}"
+
+    def resolve_commit(self) -> Optional[str]:
+        """Resolve the ref with 'git rev-parse'; working trees may hold uncommitted changes and are not pinned."""
+        if not self.use_git_objects:
+            return None
+        try:
+            return self._run_git('rev-parse', f"{self.ref or 'HEAD'}^{{commit}}").strip()
+        except Exception as e:
+            logger.warning(f"Could not resolve commit for {self.describe()}: {str(e)}")
+            return None
+
+    def changed_files(self, base_commit: str) -> Optional[Dict[str, List[str]]]:
+        """Use 'git diff --name-status' to list files changed since base_commit."""
+        head_commit = self.resolve_commit()
+        if not head_commit:
+            return None
+        try:
+            output = self._run_git('diff', '--name-status', '-z', base_commit, head_commit)
+        except Exception as e:
+            logger.warning(f"git diff failed for {self.describe()}: {str(e)}")
+            return None
+
+        changes = {'changed': [], 'removed': []}
+        fields = output.split('\0')
+        i = 0
+        while i < len(fields) and fields[i]:
+            status = fields[i][0]
+            if status in ('R', 'C'):
+                # Renames and copies are followed by the old and the new path
+                if status == 'R':
+                    changes['removed'].append(fields[i + 1])
+                changes['changed'].append(fields[i + 2])
+                i += 3
+            else:
+                if status == 'D':
+                    changes['removed'].append(fields[i + 1])
+                else:
+                    changes['changed'].append(fields[i + 1])
+                i += 2
+        return changes
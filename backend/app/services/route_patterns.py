@@ -0,0 +1,867 @@
+"""
+Precompiled route pattern registry used for API discovery.
+
+Patterns are grouped by language and compiled once at import. Each file is
+only scanned with the patterns of its own language (plus the language-agnostic
+generic patterns); files with an unknown extension fall back to every pattern.
+A RouteScanner per language looks up the literal text every match of a pattern
+must contain (route markers such as '@app.', '@router.', '@RequestMapping(' or
+'.HandleFunc(') once per file, skips patterns whose markers are absent and
+starts the others at their leading marker instead of the top of the file.
+"""
+import re
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from app.utils.file_classifier import SkippedSourceFile
+
+
+class RoutePattern(NamedTuple):
+    """A compiled route regex with templates for the HTTP method and endpoint."""
+    regex: re.Pattern
+    method: Union[str, Callable[[re.Match], str]]
+    endpoint: str
+
+
+def _spring_mapping_method(match: re.Match) -> str:
+    """Map Spring's @GetMapping/@PostMapping/... annotation name to an HTTP method."""
+    return match.group(1).replace('Mapping', '').upper()
+
+
+# Python frameworks - COMPREHENSIVE
+PYTHON_PATTERNS = [
+    # FastAPI - Comprehensive and Fixed
+    (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@api_router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@APIRouter\(\)\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # FastAPI with path parameters
+    (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
+
+    # FastAPI with additional parameters
+    (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*dependencies\s*=', r'\1', r'\2'),
+    (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*tags\s*=', r'\1', r'\2'),
+    (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*response_model\s*=', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*dependencies\s*=', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*tags\s*=', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*response_model\s*=', r'\1', r'\2'),
+
+    # FastAPI with multiple parameters
+    (r'@app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*[^)]*\)', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*[^)]*\)', r'\1', r'\2'),
+
+    # FastAPI without quotes (less common but possible)
+    (r'@app\.(get|post|put|delete|patch|head|options)\(([^)]+)\)', r'\1', r'\2'),
+    (r'@router\.(get|post|put|delete|patch|head|options)\(([^)]+)\)', r'\1', r'\2'),
+
+    # Flask - Comprehensive and Fixed
+    (r'@app\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@app\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
+    (r'@app\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']', r'\2', r'\1'),
+    (r'@app\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']', r'\2', r'\1'),
+
+    # Flask with path parameters
+    (r'@app\.route\(["\']([^"\']*<[^>]*>[^"\']*)["\']', 'GET', r'\1'),
+    (r'@app\.route\(["\']([^"\']*<[^>]*>[^"\']*)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
+
+    # Flask Blueprint patterns
+    (r'@bp\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@bp\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
+    (r'@blueprint\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@blueprint\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
+
+    # Flask with additional parameters
+    (r'@app\.route\(["\']([^"\']+)["\'],\s*[^)]*\)', 'GET', r'\1'),
+    (r'@bp\.route\(["\']([^"\']+)["\'],\s*[^)]*\)', 'GET', r'\1'),
+
+    # Generic route patterns (catch-all for Flask-like frameworks)
+    (r'@.*\.route\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@.*\.route\(["\']([^"\']+)["\'],\s*methods\s*=\s*\[["\']([^"\']+)["\']', r'\2', r'\1'),
+
+    # Additional Python API patterns
+    (r'@(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
+
+    # Function-based API patterns
+    (r'def\s+(get_|post_|put_|delete_|patch_|head_|options_)(\w+)', r'\1', r'\2'),
+    (r'def\s+(api_|endpoint_)(\w+)', 'API', r'\2'),
+    (r'async\s+def\s+(get_|post_|put_|delete_|patch_|head_|options_)(\w+)', r'\1', r'\2'),
+    (r'async\s+def\s+(api_|endpoint_)(\w+)', 'API', r'\2'),
+
+    # Django REST Framework - Enhanced and Comprehensive
+    (r'@api_view\(\[["\']([^"\']+)["\']\]\)', r'\1', ''),
+    (r'class\s+(\w+ViewSet|.*ViewSet).*:', 'REST', ''),
+    (r'class\s+(\w+APIView|.*APIView).*:', 'REST', ''),
+    (r'class\s+(\w+GenericViewSet).*:', 'REST', ''),
+    (r'class\s+(\w+ModelViewSet).*:', 'REST', ''),
+    (r'@action\(detail=(True|False)', 'POST', ''),
+    (r'path\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'url\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r're_path\(["\']([^"\']+)["\']', 'GET', r'\1'),
+
+    # Django REST Framework with decorators
+    (r'@api_view\(\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']\]\)', r'\1', ''),
+    (r'@action\(detail=(True|False),\s*methods\s*=\s*\[["\']([^"\']+)["\']\]', r'\2', ''),
+    (r'@action\(detail=(True|False),\s*methods\s*=\s*\[["\']([^"\']+)["\'],\s*["\']([^"\']+)["\']\]', r'\2', ''),
+
+    # Django URL patterns with views
+    (r'path\(["\']([^"\']+)["\'],\s*(\w+)\.as_view\(\)', 'GET', r'\1'),
+    (r'url\(["\']([^"\']+)["\'],\s*(\w+)\.as_view\(\)', 'GET', r'\1'),
+    (r're_path\(["\']([^"\']+)["\'],\s*(\w+)\.as_view\(\)', 'GET', r'\1'),
+
+    # Django class-based views
+    (r'class\s+(\w+View).*:', 'GET', r'\1'),
+    (r'class\s+(\w+CreateView).*:', 'POST', r'\1'),
+    (r'class\s+(\w+UpdateView).*:', 'PUT', r'\1'),
+    (r'class\s+(\w+DeleteView).*:', 'DELETE', r'\1'),
+    (r'class\s+(\w+ListView).*:', 'GET', r'\1'),
+    (r'class\s+(\w+DetailView).*:', 'GET', r'\1'),
+
+    # Sanic - Enhanced
+    (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@bp\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Bottle - Enhanced
+    (r'@(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@route\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # CherryPy - Enhanced
+    (r'@cherrypy\.expose.*\ndef\s+(\w+)', 'GET', r'\1'),
+    (r'@cherrypy\.tools\.(get|post|put|delete|patch)', r'\1', ''),
+    (r'def\s+(\w+)\s*\(self', 'GET', r'\1'),
+    (r'def\s+(index|default)\s*\(self', 'GET', r'\1'),
+
+    # Tornado
+    (r'class\s+(\w+Handler)', 'HTTP', r'\1'),
+    (r'def\s+(get|post|put|delete|patch)\s*\(', r'\1', ''),
+    (r'@tornado\.web\.(get|post|put|delete|patch)', r'\1', ''),
+
+    # Quart
+    (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Starlette
+    (r'@app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Sails.js (Python-like)
+    (r'(\w+):\s*function\s*\(req,\s*res\)', 'GET', r'\1'),
+
+    # Generic Python patterns
+    (r'def\s+(get|post|put|delete|patch)_(\w+)', r'\1', r'\2'),
+    (r'def\s+(\w+)\s*\(.*request.*\)', 'HTTP', r'\1'),
+    (r'def\s+(\w+)\s*\(.*req.*\)', 'HTTP', r'\1'),
+    (r'def\s+(\w+)\s*\(.*response.*\)', 'HTTP', r'\1'),
+]
+
+
+# Java frameworks - COMPREHENSIVE
+JAVA_PATTERNS = [
+    # Spring Boot - Enhanced and Comprehensive
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping|RequestMapping)\(["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+    (r'@RequestMapping\([^)]*value\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@RequestMapping\([^)]*method\s*=\s*RequestMethod\.([A-Z]+)', r'\1', ''),
+    (r'@RestController.*?class\s+(\w+)', 'REST', ''),
+    (r'@Controller.*?class\s+(\w+)', 'REST', ''),
+    (r'@RestController', 'REST', ''),
+    (r'@Controller', 'REST', ''),
+    (r'@RequestMapping\([^)]*path\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@RequestMapping\([^)]*value\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+
+    # Spring Boot with additional parameters
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*value\s*=\s*["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*path\s*=\s*["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+
+    # Spring Boot with path variables
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', 
+     _spring_mapping_method, r'\2'),
+
+    # Spring Boot with produces/consumes
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*produces\s*=\s*["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*consumes\s*=\s*["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+
+    # Spring Boot with headers
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*headers\s*=\s*["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+
+    # Spring Boot with params
+    (r'@(GetMapping|PostMapping|PutMapping|DeleteMapping|PatchMapping)\([^)]*params\s*=\s*["\']([^"\']+)["\']', 
+     _spring_mapping_method, r'\2'),
+
+    # JAX-RS - Enhanced
+    (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@Consumes\(["\']([^"\']+)["\']', 'POST', ''),
+    (r'@Produces\(["\']([^"\']+)["\']', 'GET', ''),
+
+    # Jersey - Enhanced
+    (r'@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@GET.*?@Path\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@POST.*?@Path\(["\']([^"\']+)["\']', 'POST', r'\1'),
+    (r'@PUT.*?@Path\(["\']([^"\']+)["\']', 'PUT', r'\1'),
+    (r'@DELETE.*?@Path\(["\']([^"\']+)["\']', 'DELETE', r'\1'),
+
+    # Struts
+    (r'@Action\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@Namespace\(["\']([^"\']+)["\']', 'GET', ''),
+
+    # Play Framework
+    (r'@(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@Action\(["\']([^"\']+)["\']', 'GET', r'\1'),
+
+    # Generic Java patterns
+    (r'public\s+.*\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'public\s+.*\s+(\w+)\s*\(.*HttpServletRequest.*\)', 'HTTP', r'\1'),
+    (r'public\s+.*\s+(\w+)\s*\(.*HttpServletResponse.*\)', 'HTTP', r'\1'),
+    (r'@WebServlet\(["\']([^"\']+)["\']', 'GET', r'\1'),
+]
+
+
+# JavaScript/Node.js frameworks - COMPREHENSIVE
+JAVASCRIPT_PATTERNS = [
+    # Express.js - Enhanced and Comprehensive
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'router\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'app\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'express\.Router\(\)\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'\.route\(["\']([^"\']+)["\']\)\.(get|post|put|delete|patch)', r'\2', r'\1'),
+    (r'\.all\(["\']([^"\']+)["\']', 'ALL', r'\1'),
+    (r'\.use\(["\']([^"\']+)["\']', 'USE', r'\1'),
+
+    # Express.js with middleware
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*[^,]+,\s*function', r'\1', r'\2'),
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*\[[^\]]+\],\s*function', r'\1', r'\2'),
+
+    # Express.js with path parameters
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*:[^"\']*)["\']', r'\1', r'\2'),
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
+
+    # Express.js with async/await
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*async\s*\(', r'\1', r'\2'),
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*async\s*function', r'\1', r'\2'),
+
+    # Express.js with arrow functions
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*\([^)]*\)\s*=>', r'\1', r'\2'),
+
+    # Express.js with error handling
+    (r'\.(get|post|put|delete|patch|head|options)\(["\']([^"\']+)["\'],\s*\([^,]+,\s*[^,]+,\s*[^)]+\)\s*=>', r'\1', r'\2'),
+
+    # Koa.js - Enhanced
+    (r'router\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'app\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Hapi.js - Enhanced
+    (r'route:\s*{\s*path:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'method:\s*["\']([^"\']+)["\'].*path:\s*["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'route\([^)]*path\s*:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'route\([^)]*method\s*:\s*["\']([^"\']+)["\']', r'\1', ''),
+    (r'server\.route\([^)]*path\s*:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+
+    # NestJS - Enhanced
+    (r'@(Get|Post|Put|Delete|Patch|Head|Options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@Controller\(["\']([^"\']+)["\']', 'REST', ''),
+    (r'@Controller', 'REST', ''),
+    (r'@Injectable', 'SERVICE', ''),
+
+    # Sails.js - Enhanced
+    (r'(\w+):\s*function\s*\(req,\s*res\)', 'GET', r'\1'),
+    (r'(\w+):\s*function\s*\(req,\s*res,\s*next\)', 'GET', r'\1'),
+    (r'(\w+):\s*async\s*function\s*\(req,\s*res\)', 'GET', r'\1'),
+
+    # Next.js API Routes
+    (r'export\s+default\s+function\s+handler', 'API', ''),
+    (r'export\s+default\s+async\s+function\s+handler', 'API', ''),
+    (r'export\s+async\s+function\s+(get|post|put|delete|patch)', r'\1', ''),
+
+    # Nuxt.js
+    (r'export\s+default\s+async\s+function\s+handler', 'API', ''),
+    (r'export\s+default\s+function\s+handler', 'API', ''),
+
+    # Fastify
+    (r'fastify\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Restify
+    (r'server\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'\.(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Generic JavaScript patterns
+    (r'function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'const\s+(get|post|put|delete|patch)(\w+)\s*=', r'\1', r'\2'),
+    (r'async\s+function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'(\w+)\s*:\s*async\s*\([^)]*req[^)]*\)', 'HTTP', r'\1'),
+    (r'(\w+)\s*:\s*\([^)]*req[^)]*\)', 'HTTP', r'\1'),
+]
+
+
+# C# frameworks - Enhanced patterns
+CSHARP_PATTERNS = [
+    # ASP.NET Core - Specific patterns for controller detection
+    (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+.*?\s+(\w+)\s*\(', r'\1', r'\2'),
+    (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+async\s+.*?\s+(\w+)\s*\(', r'\1', r'\2'),
+
+    # Route attributes with HTTP methods
+    (r'\[Route\(["\']([^"\']+)["\']\]\s*\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]', r'\2', r'\1'),
+    (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*\[Route\(["\']([^"\']+)["\']\]', r'\1', r'\2'),
+
+    # Controller-level route with method-level HTTP attributes (specific for api/[controller] pattern)
+    (r'\[Route\(["\']api/\[controller\]\["\']\)\]\s*.*?\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+.*?\s+(\w+)\s*\(', r'\1', r'/api/Employees'),
+    (r'\[Route\(["\']api/\[controller\]\["\']\)\]\s*.*?\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*public\s+async\s+.*?\s+(\w+)\s*\(', r'\1', r'/api/Employees'),
+
+    # Method-level route attributes
+    (r'\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]\s*\[Route\(["\']([^"\']+)["\']\]', r'\1', r'\2'),
+    (r'\[Route\(["\']([^"\']+)["\']\]\s*\[Http(Get|Post|Put|Delete|Patch|Head|Options)\]', r'\2', r'\1'),
+
+    # Generic route patterns
+    (r'\[Route\(["\']([^"\']+)["\']\]', 'GET', r'\1'),
+    (r'\[Route\(["\']([^"\']+)["\'],\s*Name\s*=\s*["\']([^"\']+)["\']\]', 'GET', r'\1'),
+
+    # Controller classes
+    (r'public\s+class\s+(\w+Controller)', 'REST', r'\1'),
+    (r'public\s+class\s+(\w+ApiController)', 'REST', r'\1'),
+
+    # API methods with return types
+    (r'public\s+(IHttpActionResult|HttpResponseMessage|IActionResult)\s+(\w+)\s*\(', 'GET', r'\2'),
+    (r'public\s+async\s+(Task<IHttpActionResult>|Task<HttpResponseMessage>|Task<IActionResult>)\s+(\w+)\s*\(', 'GET', r'\2'),
+
+    # Minimal API patterns (.NET 6+)
+    (r'app\.Map(Get|Post|Put|Delete|Patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'Map(Get|Post|Put|Delete|Patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Web API 2 patterns
+    (r'\[ActionName\(["\']([^"\']+)["\']\]', 'GET', r'\1'),
+    (r'\[AcceptVerbs\(["\']([^"\']+)["\']\]', r'\1', ''),
+
+    # Generic API patterns
+    (r'public\s+.*\s+(Get|Post|Put|Delete|Patch)(\w+)\s*\(', r'\1', r'\1\2'),
+    (r'private\s+.*\s+(Get|Post|Put|Delete|Patch)(\w+)\s*\(', r'\1', r'\1\2'),
+]
+
+
+# PHP frameworks - Enhanced and Comprehensive
+PHP_PATTERNS = [
+    # Laravel - Enhanced
+    (r'Route::(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'Route::resource\(["\']([^"\']+)["\']', 'REST', r'\1'),
+    (r'Route::apiResource\(["\']([^"\']+)["\']', 'REST', r'\1'),
+    (r'Route::group\([^)]*\)', 'GROUP', ''),
+    (r'Route::middleware\([^)]*\)', 'MIDDLEWARE', ''),
+    (r'Route::prefix\(["\']([^"\']+)["\']\)', 'PREFIX', r'\1'),
+    (r'Route::name\(["\']([^"\']+)["\']\)', 'NAME', r'\1'),
+
+    # Laravel with closures
+    (r'Route::(get|post|put|delete|patch)\(["\']([^"\']+)["\'],\s*function', r'\1', r'\2'),
+    (r'Route::(get|post|put|delete|patch)\(["\']([^"\']+)["\'],\s*\[[^\]]+\]', r'\1', r'\2'),
+
+    # Laravel with path parameters
+    (r'Route::(get|post|put|delete|patch)\(["\']([^"\']*\{[^}]*\}[^"\']*)["\']', r'\1', r'\2'),
+
+    # Symfony - Enhanced
+    (r'@Route\(["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@Route\([^)]*path\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'@Route\([^)]*methods\s*=\s*\[["\']([^"\']+)["\']', r'\1', ''),
+    (r'@Route\([^)]*name\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+
+    # CodeIgniter - Enhanced
+    (r'\$route\[["\']([^"\']+)["\']\]', 'GET', r'\1'),
+    (r'\$route\[["\']([^"\']+)["\']\]\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+
+    # Slim Framework
+    (r'\$app->(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'\$app->(get|post|put|delete|patch)\(["\']([^"\']+)["\'],\s*function', r'\1', r'\2'),
+
+    # Generic PHP patterns
+    (r'function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'public\s+function\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+
+# Ruby frameworks - Enhanced and Comprehensive
+RUBY_PATTERNS = [
+    # Ruby on Rails - Enhanced
+    (r'def\s+(index|show|create|update|destroy|new|edit)', 'REST', r'\1'),
+    (r'resources\s+:(\w+)', 'REST', r'\1'),
+    (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
+    (r'put\s+["\']([^"\']+)["\']', 'PUT', r'\1'),
+    (r'delete\s+["\']([^"\']+)["\']', 'DELETE', r'\1'),
+    (r'patch\s+["\']([^"\']+)["\']', 'PATCH', r'\1'),
+    (r'head\s+["\']([^"\']+)["\']', 'HEAD', r'\1'),
+    (r'options\s+["\']([^"\']+)["\']', 'OPTIONS', r'\1'),
+
+    # Rails with constraints
+    (r'get\s+["\']([^"\']+)["\'],\s*to:\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\'],\s*to:\s*["\']([^"\']+)["\']', 'POST', r'\1'),
+
+    # Rails with path parameters
+    (r'get\s+["\']([^"\']*:[^"\']*)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']*:[^"\']*)["\']', 'POST', r'\1'),
+
+    # Rails with namespaces
+    (r'namespace\s+:(\w+)\s+do', 'NAMESPACE', r'\1'),
+    (r'scope\s+["\']([^"\']+)["\']\s+do', 'SCOPE', r'\1'),
+
+    # Sinatra - Enhanced
+    (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
+    (r'put\s+["\']([^"\']+)["\']', 'PUT', r'\1'),
+    (r'delete\s+["\']([^"\']+)["\']', 'DELETE', r'\1'),
+    (r'patch\s+["\']([^"\']+)["\']', 'PATCH', r'\1'),
+    (r'head\s+["\']([^"\']+)["\']', 'HEAD', r'\1'),
+    (r'options\s+["\']([^"\']+)["\']', 'OPTIONS', r'\1'),
+
+    # Sinatra with blocks
+    (r'get\s+["\']([^"\']+)["\']\s+do', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\']\s+do', 'POST', r'\1'),
+
+    # Sinatra with path parameters
+    (r'get\s+["\']([^"\']*:[^"\']*)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']*:[^"\']*)["\']', 'POST', r'\1'),
+
+    # Generic Ruby patterns
+    (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'def\s+(\w+)\s*\([^)]*req[^)]*\)', 'HTTP', r'\1'),
+]
+
+
+# Go frameworks
+GO_PATTERNS = [
+    # Gin
+    (r'\.(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'router\.(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Echo
+    (r'\.(GET|POST|PUT|DELETE|PATCH)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Gorilla Mux
+    (r'\.HandleFunc\(["\']([^"\']+)["\']', 'GET', r'\1'),
+]
+
+
+# Rust frameworks
+RUST_PATTERNS = [
+    # Actix Web
+    (r'\.route\(["\']([^"\']+)["\'],\s*web::(get|post|put|delete|patch)', r'\2', r'\1'),
+    (r'web::(get|post|put|delete|patch)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+
+    # Rocket
+    (r'#\[(get|post|put|delete|patch)\(["\']([^"\']+)["\']\]', r'\1', r'\2'),
+]
+
+
+# Generic patterns (catch-all)
+GENERIC_PATTERNS = [
+    # URL patterns in any language
+    (r'["\']([^"\']*api[^"\']*)["\']', 'API', r'\1'),
+    (r'["\']([^"\']*endpoint[^"\']*)["\']', 'API', r'\1'),
+    (r'["\']([^"\']*service[^"\']*)["\']', 'API', r'\1'),
+
+    # Function names that look like APIs
+    (r'def\s+(get_|post_|put_|delete_|patch_|api_|endpoint_)(\w+)', 'API', r'\1\2'),
+    (r'function\s+(get|post|put|delete|patch|api|endpoint)(\w+)', 'API', r'\1\2'),
+    (r'public\s+.*\s+(get|post|put|delete|patch|api|endpoint)(\w+)', 'API', r'\1\2'),
+
+    # Route definitions
+    (r'route\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'path\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'url\s*=\s*["\']([^"\']+)["\']', 'GET', r'\1'),
+]
+
+
+# JAX-RS style annotations, shared by the JVM and other annotation-based languages
+JAX_RS_PATTERNS = [
+    (r'@(GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS).*?@Path\(["\']([^"\']+)["\']', r'\1', r'\2'),
+]
+
+# TypeScript patterns (NestJS style decorators)
+TYPESCRIPT_PATTERNS = [
+    (r'@(Get|Post|Put|Delete|Patch|Head|Options)\(["\']([^"\']+)["\']', r'\1', r'\2'),
+    (r'@Controller\(["\']([^"\']+)["\']', 'REST', r'\1'),
+    (r'@Injectable', 'SERVICE', ''),
+]
+
+# Kotlin patterns
+KOTLIN_PATTERNS = JAX_RS_PATTERNS + [
+    (r'@RestController.*?class\s+(\w+)', 'REST', r'\1'),
+    (r'@Controller.*?class\s+(\w+)', 'REST', r'\1'),
+]
+
+# Swift patterns
+SWIFT_PATTERNS = JAX_RS_PATTERNS + [
+    (r'func\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+# Dart/Flutter patterns
+DART_PATTERNS = JAX_RS_PATTERNS + [
+    (r'Future<.*>\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+# Scala patterns
+SCALA_PATTERNS = JAX_RS_PATTERNS + [
+    (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+# Clojure patterns
+CLOJURE_PATTERNS = [
+    (r'\(defn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'\(defroutes\s+(\w+)', 'ROUTES', r'\1'),
+]
+
+# Elixir patterns
+ELIXIR_PATTERNS = [
+    (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
+]
+
+# Haskell patterns
+HASKELL_PATTERNS = [
+    (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
+    (r'(\w+)\s*::\s*Handler', 'HANDLER', r'\1'),
+]
+
+# F# patterns
+FSHARP_PATTERNS = [
+    (r'let\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+] + JAX_RS_PATTERNS
+
+# Crystal patterns
+CRYSTAL_PATTERNS = [
+    (r'get\s+["\']([^"\']+)["\']', 'GET', r'\1'),
+    (r'post\s+["\']([^"\']+)["\']', 'POST', r'\1'),
+    (r'def\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+# Nim patterns
+NIM_PATTERNS = [
+    (r'proc\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+] + JAX_RS_PATTERNS
+
+# Zig and V patterns
+ZIG_PATTERNS = [
+    (r'fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+    (r'pub\s+fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+# Odin patterns
+ODIN_PATTERNS = JAX_RS_PATTERNS + [
+    (r'(\w+)\s*::\s*proc', 'PROC', r'\1'),
+]
+
+# Jai patterns
+JAI_PATTERNS = [
+    (r'(\w+)\s*::\s*proc', 'PROC', r'\1'),
+    (r'fn\s+(get|post|put|delete|patch)(\w+)', r'\1', r'\2'),
+]
+
+LANGUAGE_PATTERNS = {
+    'python': PYTHON_PATTERNS,
+    'java': JAVA_PATTERNS,
+    'javascript': JAVASCRIPT_PATTERNS + TYPESCRIPT_PATTERNS,
+    'csharp': CSHARP_PATTERNS,
+    'php': PHP_PATTERNS,
+    'ruby': RUBY_PATTERNS,
+    'go': GO_PATTERNS,
+    'rust': RUST_PATTERNS,
+    'kotlin': JAVA_PATTERNS + KOTLIN_PATTERNS,
+    'swift': SWIFT_PATTERNS,
+    'dart': DART_PATTERNS,
+    'scala': JAVA_PATTERNS + SCALA_PATTERNS,
+    'clojure': CLOJURE_PATTERNS,
+    'elixir': ELIXIR_PATTERNS,
+    'haskell': HASKELL_PATTERNS,
+    'fsharp': FSHARP_PATTERNS,
+    'crystal': CRYSTAL_PATTERNS,
+    'nim': NIM_PATTERNS,
+    'zig': ZIG_PATTERNS,
+    'v': ZIG_PATTERNS,
+    'odin': ODIN_PATTERNS,
+    'jai': JAI_PATTERNS,
+}
+
+EXTENSION_LANGUAGES = {
+    '.py': 'python', '.pyw': 'python',
+    '.java': 'java',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'javascript', '.tsx': 'javascript',
+    '.cs': 'csharp',
+    '.php': 'php',
+    '.rb': 'ruby',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.kt': 'kotlin', '.kts': 'kotlin',
+    '.swift': 'swift',
+    '.dart': 'dart',
+    '.scala': 'scala',
+    '.clj': 'clojure', '.cljs': 'clojure', '.cljc': 'clojure',
+    '.ex': 'elixir', '.exs': 'elixir',
+    '.hs': 'haskell', '.lhs': 'haskell',
+    '.fs': 'fsharp', '.fsx': 'fsharp', '.fsi': 'fsharp',
+    '.cr': 'crystal', '.ecr': 'crystal',
+    '.nim': 'nim', '.nims': 'nim',
+    '.zig': 'zig',
+    '.v': 'v',
+    '.odin': 'odin',
+    '.jai': 'jai',
+}
+
+
+def _compile_patterns(pattern_tuples: List[tuple]) -> List[RoutePattern]:
+    """Compile pattern tuples, dropping exact duplicates while keeping first-seen order."""
+    compiled = []
+    seen = set()
+    for pattern, method, endpoint in pattern_tuples:
+        key = (pattern, method, endpoint)
+        if key in seen:
+            continue
+        seen.add(key)
+        compiled.append(RoutePattern(re.compile(pattern, re.MULTILINE), method, endpoint))
+    return compiled
+
+
+# Punctuation that is a plain literal when escaped with a backslash
+_ESCAPED_LITERALS = set('.^$*+?{}[]|()\\/-:@#"\'<>=!&%,;~`')
+# Literals shorter than this occur in nearly every file and are not worth looking up
+_MIN_MARKER_LENGTH = 3
+
+
+class RouteRequirements(NamedTuple):
+    """Literal text that every match of a pattern contains."""
+    markers: List[str]
+    prefix: str
+
+
+def _class_end(pattern: str, start: int, end: int) -> int:
+    """Find the ']' closing the character class opened at start; -1 if unbalanced."""
+    i = start + 1
+    if i < end and pattern[i] == '^':
+        i += 1
+    if i < end and pattern[i] == ']':
+        i += 1
+    while i < end:
+        if pattern[i] == '\\':
+            i += 2
+            continue
+        if pattern[i] == ']':
+            return i
+        i += 1
+    return -1
+
+
+def _group_end(pattern: str, start: int, end: int) -> int:
+    """Find the ')' closing the group opened at start; -1 if unbalanced."""
+    depth = 0
+    i = start
+    while i < end:
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            i = _class_end(pattern, i, end)
+            if i == -1:
+                return -1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return -1
+
+
+def _has_alternation(pattern: str, start: int, end: int) -> bool:
+    """Check for a '|' directly inside pattern[start:end], outside nested groups and classes."""
+    depth = 0
+    i = start
+    while i < end:
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            i = _class_end(pattern, i, end)
+            if i == -1:
+                return True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def _skip_quantifier(pattern: str, i: int, end: int) -> Tuple[str, int]:
+    """Read the quantifier at i, if any, and return it with the index after it (and any lazy '?')."""
+    if i >= end or pattern[i] not in '?*+{':
+        return '', i
+    quantifier = pattern[i]
+    if quantifier == '{':
+        close = pattern.find('}', i, end)
+        if close == -1:
+            return quantifier, end
+        minimum = pattern[i + 1:close].split(',')[0]
+        # A repeat with a minimum of at least one behaves like '+' for required text
+        quantifier = '+' if minimum.isdigit() and int(minimum) > 0 else '*'
+        i = close + 1
+    else:
+        i += 1
+    if i < end and pattern[i] == '?':
+        i += 1
+    return quantifier, i
+
+
+def _literal_runs(pattern: str, start: int, end: int, runs: List[str]) -> str:
+    """Collect the literal runs every match of pattern[start:end] contains and return the leading one."""
+    leading = ''
+    current = ''
+    current_start = start
+    i = start
+
+    def flush():
+        nonlocal current, leading
+        if current:
+            runs.append(current)
+            if current_start == start:
+                leading = current
+        current = ''
+
+    while i < end:
+        c = pattern[i]
+        literal = None
+        group = None
+        if c == '\\':
+            if i + 1 < end and pattern[i + 1] in _ESCAPED_LITERALS:
+                literal = pattern[i + 1]
+            next_i = i + 2
+        elif c == '[':
+            close = _class_end(pattern, i, end)
+            next_i = close + 1 if close != -1 else end
+        elif c == '(':
+            close = _group_end(pattern, i, end)
+            next_i = close + 1 if close != -1 else end
+            if close != -1:
+                inner_start = i + 3 if pattern.startswith('(?:', i) else i + 1
+                # Lookarounds and other extensions do not consume required text
+                if inner_start == i + 3 or pattern[i + 1] != '?':
+                    group = (inner_start, close)
+        elif c in '.^$':
+            next_i = i + 1
+        else:
+            literal = c
+            next_i = i + 1
+
+        quantifier, after = _skip_quantifier(pattern, next_i, end)
+        required = quantifier not in ('?', '*', '{')
+
+        if literal is not None and required:
+            if not current:
+                current_start = i
+            current += literal
+            if quantifier == '+':
+                flush()
+        else:
+            flush()
+            if group is not None and required and not _has_alternation(pattern, *group):
+                _literal_runs(pattern, group[0], group[1], runs)
+        i = after
+
+    flush()
+    return leading
+
+
+def _route_requirements(pattern: str) -> RouteRequirements:
+    """Work out the literal markers every match of a pattern contains, and its literal prefix."""
+    if '(?' in pattern.replace('(?:', '') or _has_alternation(pattern, 0, len(pattern)):
+        return RouteRequirements([], '')
+    runs: List[str] = []
+    prefix = _literal_runs(pattern, 0, len(pattern), runs)
+    markers = [run for run in runs if len(run) >= _MIN_MARKER_LENGTH]
+    return RouteRequirements(markers, prefix)
+
+
+class RouteScanner:
+    """Runs a language's route patterns, skipping patterns and regions without their literal route markers."""
+
+    def __init__(self, patterns: List[RoutePattern]):
+        self.patterns = patterns
+        self.requirements = [_route_requirements(route_pattern.regex.pattern) for route_pattern in patterns]
+
+    def scan(self, content: str, deadline: Optional[float] = None) -> List[Tuple[RoutePattern, re.Match]]:
+        """Find all pattern matches, ordered by pattern and then position exactly like per-pattern finditer.
+
+        With a deadline (a time.perf_counter() value) the scan raises SkippedSourceFile once it is passed.
+        A single regex search cannot be interrupted, so the check runs between patterns and matches.
+        """
+        # First offset of every marker, looked up once per file and shared by all patterns that need it
+        marker_offsets: Dict[str, int] = {}
+
+        def offset_of(marker: str) -> int:
+            if marker not in marker_offsets:
+                marker_offsets[marker] = content.find(marker)
+            return marker_offsets[marker]
+
+        results = []
+        for route_pattern, requirements in zip(self.patterns, self.requirements):
+            if any(offset_of(marker) == -1 for marker in requirements.markers):
+                continue
+            if deadline is not None and time.perf_counter() > deadline:
+                raise SkippedSourceFile(f"route scan exceeded its time budget before pattern {route_pattern.regex.pattern[:60]!r}")
+            start = 0
+            if requirements.prefix:
+                start = offset_of(requirements.prefix)
+                if start == -1:
+                    continue
+            # No match can begin before the first occurrence of the pattern's literal prefix
+            for match in route_pattern.regex.finditer(content, start):
+                results.append((route_pattern, match))
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise SkippedSourceFile(f"route scan exceeded its time budget in pattern {route_pattern.regex.pattern[:60]!r}")
+        return results
+
+
+ROUTE_PATTERN_REGISTRY: Dict[str, List[RoutePattern]] = {
+    language: _compile_patterns(patterns + GENERIC_PATTERNS)
+    for language, patterns in LANGUAGE_PATTERNS.items()
+}
+
+# Files whose language is unknown are scanned with every pattern
+ALL_ROUTE_PATTERNS: List[RoutePattern] = _compile_patterns(
+    [pattern for patterns in LANGUAGE_PATTERNS.values() for pattern in patterns] + GENERIC_PATTERNS
+)
+
+
+def get_language(file_path: str) -> Optional[str]:
+    """Get the registry language for a file path from its extension."""
+    dot = file_path.rfind('.')
+    if dot == -1:
+        return None
+    return EXTENSION_LANGUAGES.get(file_path[dot:].lower())
+
+
+ROUTE_SCANNERS: Dict[str, RouteScanner] = {
+    language: RouteScanner(patterns) for language, patterns in ROUTE_PATTERN_REGISTRY.items()
+}
+ALL_ROUTE_SCANNER = RouteScanner(ALL_ROUTE_PATTERNS)
+
+
+def get_route_patterns(file_path: str) -> List[RoutePattern]:
+    """Get the compiled route patterns to run against a file."""
+    return ROUTE_PATTERN_REGISTRY.get(get_language(file_path), ALL_ROUTE_PATTERNS)
+
+
+def get_route_scanner(file_path: str) -> RouteScanner:
+    """Get the single-pass scanner for a file's language."""
+    return ROUTE_SCANNERS.get(get_language(file_path), ALL_ROUTE_SCANNER)
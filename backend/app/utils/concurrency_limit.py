@@ -0,0 +1,158 @@
+"""
+Process-wide limit on in-flight calls, shared by threads and event loops.
+
+Bedrock calls are made from async request handlers and from worker threads
+(API discovery, analyzer helpers). asyncio.Semaphore only orders coroutines of
+one loop and threading.Semaphore would block a loop while it waits, so this
+limit queues both kinds of callers in one FIFO and hands a released slot
+straight to the next waiter.
+
+AdaptiveConcurrencyLimit moves its limit with the downstream service's
+feedback: halved when it throttles, grown by one after a limit's worth of
+successful calls (additive increase, multiplicative decrease).
+"""
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Optional, Tuple, Union
+
+
+class ConcurrencyLimit:
+    """Counting semaphore whose waiters may be threads (acquire) or coroutines on any loop (aacquire)."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        # (loop, future) for coroutines, (None, event) for threads, in arrival order
+        self._waiters: Deque[Tuple[Optional[asyncio.AbstractEventLoop], Union[asyncio.Future, threading.Event]]] = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self):
+        """Take a slot, blocking the calling thread until one is free."""
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                return
+            granted = threading.Event()
+            self._waiters.append((None, granted))
+        granted.wait()
+
+    async def aacquire(self):
+        """Take a slot, suspending the calling coroutine until one is free."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # A slot handed over before the cancellation is given back (a pending grant gives it back itself)
+            if not queued and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """Give a slot back, handing it to the oldest waiter if the limit allows."""
+        with self._lock:
+            self._in_flight -= 1
+            granted = self._take_waiters()
+        self._wake(granted)
+
+    def _take_waiters(self) -> list:
+        """Pop the waiters that fit under the limit, counting their slots (called with the lock held)."""
+        granted = []
+        while self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            granted.append(self._waiters.popleft())
+        return granted
+
+    def _wake(self, granted: list):
+        for loop, waiter in granted:
+            if loop is None:
+                waiter.set()
+                continue
+            try:
+                loop.call_soon_threadsafe(self._grant, waiter)
+            except RuntimeError:
+                # The waiter's loop is closed
+                self.release()
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for the duration of a block (threads)."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Hold a slot for the duration of a block (coroutines)."""
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdaptiveConcurrencyLimit(ConcurrencyLimit):
+    """ConcurrencyLimit that halves on throttling and regrows by one after a limit's worth of successes.
+
+    Calls in flight when throttling starts tend to be throttled together, so only a call started after
+    the last decrease (at or after that decrease's epoch) halves the limit again. Calls already holding
+    slots above a lowered limit finish normally.
+    """
+
+    def __init__(self, limit: int, minimum: int = 1):
+        super().__init__(limit)
+        self.maximum = self.limit
+        self.minimum = max(1, min(minimum, self.limit))
+        self.throttled = 0
+        self.epoch = 0  # Number of decreases so far
+        self._successes = 0
+
+    def record_success(self):
+        """Count a call that went through; a limit's worth of them raise the limit by one."""
+        with self._lock:
+            self._successes += 1
+            if self.limit < self.maximum and self._successes >= self.limit:
+                self.limit += 1
+                self._successes = 0
+            granted = self._take_waiters()
+        self._wake(granted)
+
+    def record_throttle(self, started_epoch: Optional[int] = None):
+        """Count a throttled call and halve the limit, unless the call started before the last decrease.
+
+        started_epoch is the epoch read when the call started (None always halves).
+        """
+        with self._lock:
+            self.throttled += 1
+            self._successes = 0
+            if started_epoch is None or started_epoch >= self.epoch:
+                self.limit = max(self.minimum, self.limit // 2)
+                self.epoch += 1
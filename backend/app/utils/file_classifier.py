@@ -0,0 +1,74 @@
+"""
+Cheap checks that keep generated, minified and binary files away from the route patterns.
+
+Long single-line files make backtracking patterns like `@.*\.route\(` crawl, and
+they almost never hold hand-written routes, so they are rejected before any
+regex runs using only the path and a sample of the content.
+"""
+import re
+import math
+from collections import Counter
+from typing import Optional
+
+# File names produced by bundlers, minifiers and code generators
+GENERATED_FILE_SUFFIXES = (
+    '.min.js', '.min.mjs', '.min.cjs', '.bundle.js', '-bundle.js', '.chunk.js',
+    '.pb.go', '_pb2.py', '_pb2_grpc.py', '.g.cs', '.designer.cs', '.generated.cs',
+    '.generated.ts', '.gen.go', '.gen.ts'
+)
+
+# Header comments of generated files (checked in the first lines only). They must be about the
+# file itself: "version.py is auto-generated" or "do not edit this list by hand" do not count.
+GENERATED_HEADER_REGEX = re.compile(
+    r'@generated|<auto-generated'
+    r'|\b(?:this|the) (?:file|code|module|class) (?:is|was|has been) (?:auto-?generated|automatically generated|generated)'
+    r'|^[\s#/*!;-]*(?:warning:\s*)?(?:auto-?generated|automatically generated|code generated by)\b'
+    r'|\bdo not (?:edit|modify) this file\b',
+    re.IGNORECASE | re.MULTILINE
+)
+GENERATED_HEADER_LINES = 10
+
+SAMPLE_SIZE = 64 * 1024
+MINIFIED_AVERAGE_LINE_LENGTH = 200
+LONG_LINE_LENGTH = 5000
+# Bits per character; source code is around 4.5, base64 and compressed data approach 6
+ENCODED_DATA_ENTROPY = 5.5
+
+
+class SkippedSourceFile(Exception):
+    """A file was not scanned for APIs; the message gives the reason."""
+
+
+def shannon_entropy(text: str) -> float:
+    """Character entropy of text in bits per character."""
+    if not text:
+        return 0.0
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in Counter(text).values())
+
+
+def classify_source(content: str, file_path: str) -> Optional[str]:
+    """Get why a file is generated, minified or binary, or None if it looks like hand-written source."""
+    if file_path.lower().endswith(GENERATED_FILE_SUFFIXES):
+        return 'generated or bundled file name'
+
+    sample = content[:SAMPLE_SIZE]
+    if '\x00' in sample:
+        return 'binary content'
+
+    lines = sample.split('\n')
+    marker = GENERATED_HEADER_REGEX.search('\n'.join(lines[:GENERATED_HEADER_LINES]))
+    if marker:
+        return f"generated file marker '{marker.group(0).strip()}'"
+
+    # A single long line (an inline data URI, a long regex) is normal; files made of them are not
+    long_lines = [line for line in lines if len(line) >= LONG_LINE_LENGTH]
+    if sum(map(len, long_lines)) * 2 > len(sample):
+        if shannon_entropy(long_lines[0][:LONG_LINE_LENGTH]) > ENCODED_DATA_ENTROPY:
+            return f"encoded data ({len(long_lines)} lines over {LONG_LINE_LENGTH} characters)"
+        return f"minified ({len(long_lines)} lines over {LONG_LINE_LENGTH} characters)"
+
+    if len(sample) / len(lines) > MINIFIED_AVERAGE_LINE_LENGTH:
+        return f"minified (average line length {len(sample) // len(lines)})"
+
+    return None
@@ -0,0 +1,108 @@
+"""
+Character n-gram TF-IDF vectors and batch cosine similarity, using NumPy only.
+
+Endpoint matching ranks thousands of routes for hundreds of labels. Encoding both
+sides as sparse TF-IDF vectors turns that ranking into a sparse matrix product per
+block of labels instead of a SequenceMatcher call per pair.
+"""
+from collections import Counter
+from typing import Collection, Dict, List, Tuple
+
+import numpy as np
+
+# Similarity cells (queries x documents) computed per block, to bound memory on large repositories
+SIMILARITY_BLOCK_CELLS = 4 * 1024 * 1024
+
+
+def char_ngrams(text: str, n: int = 3) -> List[str]:
+    """Overlapping character n-grams of text padded with one boundary marker on each side."""
+    padded = f"^{text}$"
+    if len(padded) <= n:
+        return [padded]
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+class NgramTfidf:
+    """TF-IDF model fitted on a list of documents (source routes), kept as a sparse row matrix."""
+
+    def __init__(self, documents: List[str], n: int = 3):
+        self.n = n
+        self.vocabulary: Dict[str, int] = {}
+        rows, columns, counts = [], [], []
+        for row, document in enumerate(documents):
+            for gram, count in Counter(char_ngrams(document, n)).items():
+                rows.append(row)
+                columns.append(self.vocabulary.setdefault(gram, len(self.vocabulary)))
+                counts.append(count)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.columns = np.asarray(columns, dtype=np.int64)
+        # Smoothed inverse document frequency, as scikit-learn computes it
+        document_frequency = np.bincount(self.columns, minlength=len(self.vocabulary))
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+        self.values = self._normalized(self.rows, np.asarray(counts, dtype=np.float64) * self.idf[self.columns],
+                                       len(documents))
+        self.document_count = len(documents)
+        # The same matrix by column: the documents holding each n-gram, for the sparse product
+        order = np.argsort(self.columns, kind='stable')
+        self.posting_rows = self.rows[order]
+        self.posting_values = self.values[order]
+        self.posting_starts = np.concatenate(([0], np.cumsum(document_frequency))).astype(np.int64)
+
+    @staticmethod
+    def _normalized(rows: np.ndarray, values: np.ndarray, row_count: int) -> np.ndarray:
+        """Scale each row of a sparse matrix to unit length."""
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=row_count))
+        norms[norms == 0] = 1.0
+        return (values / norms[rows]).astype(np.float32)
+
+    def transform(self, queries: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse (rows, columns, values) of the queries; n-grams unseen in the documents are dropped."""
+        rows, columns, counts = [], [], []
+        for row, query in enumerate(queries):
+            for gram, count in Counter(char_ngrams(query, self.n)).items():
+                column = self.vocabulary.get(gram)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    counts.append(count)
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        values = self._normalized(rows, np.asarray(counts, dtype=np.float64) * self.idf[columns], len(queries))
+        return rows, columns, values
+
+    def similarity(self, queries: List[str]) -> np.ndarray:
+        """Cosine similarity of every query to every document, as a queries x documents float32 matrix.
+
+        The product is sparse: each query n-gram adds its weight times the document weights along the
+        n-gram's posting list, and the products are summed per (query, document) cell with bincount.
+        """
+        query_rows, query_columns, query_values = self.transform(queries)
+        result = np.zeros((len(queries), self.document_count), dtype=np.float32)
+        if not len(query_columns) or not self.document_count:
+            return result
+
+        block_size = max(1, SIMILARITY_BLOCK_CELLS // self.document_count)
+        for start in range(0, len(queries), block_size):
+            end = min(start + block_size, len(queries))
+            in_block = (query_rows >= start) & (query_rows < end)
+            rows, columns, values = query_rows[in_block] - start, query_columns[in_block], query_values[in_block]
+            lengths = self.posting_starts[columns + 1] - self.posting_starts[columns]
+            total = int(lengths.sum())
+            if not total:
+                continue
+            # Positions of every posting of every query n-gram, laid out one n-gram after another
+            offsets = np.repeat(self.posting_starts[columns] - (np.cumsum(lengths) - lengths), lengths)
+            postings = offsets + np.arange(total)
+            cells = np.repeat(rows, lengths) * self.document_count + self.posting_rows[postings]
+            weights = np.repeat(values, lengths).astype(np.float64) * self.posting_values[postings]
+            result[start:end] = np.bincount(cells, weights=weights,
+                                            minlength=(end - start) * self.document_count
+                                            ).reshape(end - start, self.document_count)
+        return result
+
+
+def top_k_positions(scores: np.ndarray, k: int, exclude: Collection[int] = ()) -> List[int]:
+    """Positions of the k highest scores outside exclude (earlier positions first among equal scores)."""
+    # Stable sort on the negated scores keeps the original order among ties
+    order = np.argsort(-scores, kind='stable')[:k + len(exclude)]
+    return [position for position in order.tolist() if position not in exclude][:k]
@@ -0,0 +1,226 @@
+"""
+Compiled path filters shared by API discovery and full repository analysis.
+
+Repository listings can hold 100k+ entries, so the skip lists are compiled
+once: substring lists into a single trie-shaped regex, file names and extensions
+into sets, and .gitignore / .analyzerignore rules into one regex per kind of
+path (directory or file) where the last matching rule wins.
+"""
+import re
+import os
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+# Ignore files honoured in every directory; rules of .analyzerignore apply after those of .gitignore
+IGNORE_FILE_NAMES = ('.gitignore', '.analyzerignore')
+
+# A regex that never matches, for empty rule sets
+_NEVER = re.compile(r'(?!)')
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Regex of a character trie; a word ending at a node makes its longer continuations redundant."""
+    if '' in node:
+        return ''
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items())]
+    return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+
+def compile_substrings(substrings: Iterable[str]) -> Pattern:
+    """Compile literal substrings into one regex; search() tells whether a path contains any of them.
+
+    re tries alternatives one by one at every position, so the substrings are merged into a trie
+    first and each position is rejected after looking at a character or two.
+    """
+    trie: Dict[str, dict] = {}
+    for substring in substrings:
+        if not substring:
+            continue
+        node = trie
+        for char in substring:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    if not trie:
+        return _NEVER
+    return re.compile(_trie_pattern(trie))
+
+
+def file_extension(path: str) -> str:
+    """Lowercased final extension of a path, including the dot ('' if none)."""
+    return os.path.splitext(path)[1].lower()
+
+
+def is_ignore_file(path: str) -> bool:
+    """Check whether a path is a .gitignore or .analyzerignore file."""
+    return path.rsplit('/', 1)[-1] in IGNORE_FILE_NAMES
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a gitignore glob (without leading/trailing slash handling) to a regex body."""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**', i) and (i == 0 or glob[i - 1] == '/'):
+                if i + 2 == n:
+                    # Trailing '/**' matches everything inside
+                    out.append('.*')
+                    i += 2
+                    continue
+                if glob[i + 2] == '/':
+                    # Leading or inner '**/' matches zero or more directories
+                    out.append('(?:.*/)?')
+                    i += 3
+                    continue
+            while i + 1 < n and glob[i + 1] == '*':
+                i += 1
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and glob[j] in '!^':
+                j += 1
+            if j < n and glob[j] == ']':
+                j += 1
+            j = glob.find(']', j)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                char_class = glob[i + 1:j].replace('\\', '\\\\')
+                if char_class[0] in '!^':
+                    char_class = '^' + char_class[1:]
+                out.append(f'[{char_class}]')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class IgnoreRules:
+    """.gitignore-style rules of a repository, compiled for fast repeated lookups.
+
+    Rules from an ignore file apply below the directory holding it. A path is ignored when the last
+    rule matching it is not negated, or when any of its parent directories is ignored (as in git,
+    files cannot be re-included from an ignored directory).
+    """
+
+    def __init__(self):
+        # (regex, negated, directory_only) in precedence order
+        self._rules: List[Tuple[str, bool, bool]] = []
+        self._compiled: Optional[Tuple[Pattern, List[bool], Pattern, List[bool]]] = None
+        self._ignored_directories: Dict[str, bool] = {}
+        self.sources: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def add(self, content: str, base_dir: str = '', source: Optional[str] = None):
+        """Add the rules of one ignore file located in base_dir ('' for the repository root)."""
+        prefix = re.escape(base_dir.strip('/') + '/') if base_dir.strip('/') else ''
+        for line in content.splitlines():
+            # Trailing spaces are dropped unless escaped
+            line = re.sub(r'(?<!\\)\s+$', '', line)
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            directory_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to the ignore file's directory
+            anchored = '/' in line
+            body = _glob_to_regex(line.lstrip('/'))
+            self._rules.append((prefix + ('' if anchored else '(?:.*/)?') + body, negated, directory_only))
+        if source:
+            self.sources.append(source)
+        self._compiled = None
+        self._ignored_directories.clear()
+
+    @classmethod
+    def from_files(cls, ignore_files: Dict[str, str]) -> 'IgnoreRules':
+        """Build the rules of a repository from its ignore files (path -> content), parents first."""
+        rules = cls()
+        ordered = sorted(ignore_files, key=lambda path: (path.count('/'), path.rsplit('/', 1)[0] if '/' in path else '',
+                                                          IGNORE_FILE_NAMES.index(path.rsplit('/', 1)[-1])))
+        for path in ordered:
+            rules.add(ignore_files[path], path.rsplit('/', 1)[0] if '/' in path else '', path)
+        return rules
+
+    @staticmethod
+    def _compile(rules: List[Tuple[str, bool, bool]]) -> Tuple[Pattern, List[bool]]:
+        """One alternation of the rules, last rule first, so the first alternative that matches decides."""
+        if not rules:
+            return _NEVER, []
+        ordered = list(reversed(rules))
+        regex = re.compile('|'.join(f'({rule})' for rule, _, _ in ordered))
+        return regex, [negated for _, negated, _ in ordered]
+
+    def _ensure_compiled(self):
+        if self._compiled is None:
+            directory_regex, directory_negated = self._compile(self._rules)
+            file_regex, file_negated = self._compile([rule for rule in self._rules if not rule[2]])
+            self._compiled = (directory_regex, directory_negated, file_regex, file_negated)
+        return self._compiled
+
+    @staticmethod
+    def _decide(regex: Pattern, negated: List[bool], path: str) -> bool:
+        match = regex.fullmatch(path)
+        return match is not None and not negated[match.lastindex - 1]
+
+    def is_ignored(self, path: str) -> bool:
+        """Check whether a file path (relative to the repository root) is ignored."""
+        if not self._rules:
+            return False
+        directory_regex, directory_negated, file_regex, file_negated = self._ensure_compiled()
+        parts = path.split('/')
+        for depth in range(1, len(parts)):
+            directory = '/'.join(parts[:depth])
+            ignored = self._ignored_directories.get(directory)
+            if ignored is None:
+                ignored = self._decide(directory_regex, directory_negated, directory)
+                self._ignored_directories[directory] = ignored
+            if ignored:
+                return True
+        return self._decide(file_regex, file_negated, path)
+
+
+class PathFilter:
+    """Decides which repository paths are analyzed, from compiled skip lists and ignore rules."""
+
+    def __init__(self, exclude_substrings: Iterable[str] = (), exclude_names: Iterable[str] = (),
+                 extensions: Optional[Iterable[str]] = None, ignore_rules: Optional[IgnoreRules] = None,
+                 case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        self._exclude_regex = compile_substrings(
+            exclude_substrings if case_sensitive else (substring.lower() for substring in exclude_substrings)
+        )
+        self._exclude_names = frozenset(exclude_names)
+        self._extensions = frozenset(extension.lower() for extension in extensions) if extensions is not None else None
+        self.ignore_rules = ignore_rules
+
+    def has_extension(self, path: str) -> bool:
+        """Check whether the path has one of the accepted extensions (always true without an extension list)."""
+        return self._extensions is None or file_extension(path) in self._extensions
+
+    def skip_reason(self, path: str) -> Optional[str]:
+        """Why a path is skipped ('ignored', 'excluded' or 'extension'), or None if it is accepted."""
+        if self.ignore_rules is not None and self.ignore_rules.is_ignored(path):
+            return 'ignored'
+        if self._exclude_regex.search(path if self.case_sensitive else path.lower()):
+            return 'excluded'
+        if path.rsplit('/', 1)[-1] in self._exclude_names:
+            return 'excluded'
+        if not self.has_extension(path):
+            return 'extension'
+        return None
+
+    def accepts(self, path: str) -> bool:
+        """Check whether a path passes the filter."""
+        return self.skip_reason(path) is None
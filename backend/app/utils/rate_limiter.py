@@ -0,0 +1,162 @@
+"""
+Process-wide request and token rate limiter with AIMD adaptation.
+
+Bedrock quotas are per account and per minute, for requests (RPM) and for
+tokens (TPM). Every call takes one request and its estimated tokens from two
+token buckets refilled at the current rates. Callers are served in arrival
+order: the first one waiting takes capacity as soon as both buckets hold
+enough, the others sleep about until their turn. The rates are scaled by a
+factor that halves when Bedrock throttles and recovers additively with each
+successful call, and waiting callers follow the rate as it changes.
+"""
+import asyncio
+import time
+import threading
+from typing import Any, Dict, Set
+
+
+class AdaptiveRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by threads and event loops.
+
+    Only a throttled call admitted after the last decrease (at or after its epoch) halves the rate
+    again, so one burst of throttled calls counts once.
+    """
+    # Longest sleep between two checks of a waiting caller, so it notices rate changes and its turn
+    MAX_RECHECK_SECONDS = 1.0
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = 10.0,
+                 min_factor: float = 0.05, increase_step: float = 0.05):
+        self.requests_per_minute = requests_per_minute  # 0 = no request limit
+        self.tokens_per_minute = tokens_per_minute  # 0 = no token limit
+        # The buckets hold burst_seconds of capacity, so quiet periods allow a short burst
+        self.burst_seconds = burst_seconds
+        self.min_factor = min_factor
+        self.increase_step = increase_step
+        self.factor = 1.0
+        self.epoch = 0  # Number of decreases so far
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._request_level = requests_per_minute / 60.0 * burst_seconds
+        self._token_level = tokens_per_minute / 60.0 * burst_seconds
+        self._refilled_at = time.monotonic()
+        # Tickets handed out and the ticket whose turn it is; abandoned tickets (cancelled callers) are skipped
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned: Set[int] = set()
+
+    @property
+    def waiting(self) -> int:
+        """Callers waiting for their turn or for capacity."""
+        return self._next_ticket - self._serving - len(self._abandoned)
+
+    def _buckets(self):
+        """(level attribute, per second rate) of the enabled buckets, at the current factor."""
+        if self.requests_per_minute > 0:
+            yield '_request_level', self.requests_per_minute * self.factor / 60.0
+        if self.tokens_per_minute > 0:
+            yield '_token_level', self.tokens_per_minute * self.factor / 60.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        for name, rate in self._buckets():
+            setattr(self, name, min(rate * self.burst_seconds, getattr(self, name) + rate * elapsed))
+
+    def _costs(self, tokens: int):
+        # A call larger than a whole bucket still goes through once the bucket is full
+        for name, rate in self._buckets():
+            yield name, rate, min(1 if name == '_request_level' else tokens, rate * self.burst_seconds)
+
+    def _advance(self):
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+
+    def _try_take(self, ticket: int, tokens: int) -> float:
+        """Take capacity for the call holding ticket if it is its turn; returns 0, or seconds to sleep before retrying."""
+        with self._lock:
+            self._refill(time.monotonic())
+            costs = list(self._costs(tokens))
+            shortfall = max([(cost - getattr(self, name)) / rate for name, rate, cost in costs] + [0.0])
+            if ticket != self._serving:
+                # Sleep about as long as the calls ahead need, if they are like this one
+                per_call = max([cost / rate for _, rate, cost in costs] + [0.0])
+                return min(self.MAX_RECHECK_SECONDS, max(0.01, shortfall + (ticket - self._serving - 1) * per_call))
+            if shortfall > 0:
+                return min(self.MAX_RECHECK_SECONDS, shortfall)
+            for name, _, cost in costs:
+                setattr(self, name, getattr(self, name) - cost)
+            self._advance()
+            return 0.0
+
+    def _take_ticket(self) -> int:
+        with self._lock:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            return ticket
+
+    def _abandon(self, ticket: int):
+        """Give up a ticket whose caller stopped waiting."""
+        with self._lock:
+            if ticket == self._serving:
+                self._advance()
+            elif ticket > self._serving:
+                self._abandoned.add(ticket)
+
+    def acquire(self, tokens: int) -> int:
+        """Wait (blocking the thread) until a call of the given tokens may be sent; returns the current epoch."""
+        ticket = self._take_ticket()
+        try:
+            while True:
+                delay = self._try_take(ticket, tokens)
+                if not delay:
+                    return self.epoch
+                time.sleep(delay)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    async def aacquire(self, tokens: int) -> int:
+        """Wait (suspending the coroutine) until a call of the given tokens may be sent; returns the current epoch."""
+        ticket = self._take_ticket()
+        try:
+            while True:
+                delay = self._try_take(ticket, tokens)
+                if not delay:
+                    return self.epoch
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def record_success(self):
+        """Recover the rate additively after a successful call."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.factor = min(1.0, self.factor + self.increase_step)
+
+    def record_throttle(self, epoch: int):
+        """Halve the rate after a throttled call, unless the call was admitted before the last decrease."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.throttled += 1
+            if epoch >= self.epoch:
+                self.factor = max(self.min_factor, self.factor / 2)
+                self.epoch += 1
+                # Capacity saved up at the old rate would let the next burst through at the old rate
+                for name, rate in self._buckets():
+                    setattr(self, name, min(getattr(self, name), rate * self.burst_seconds))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current (adapted) rates, their configured limits, throttled calls and callers waiting."""
+        with self._lock:
+            return {
+                'requests_per_minute': round(self.requests_per_minute * self.factor, 2) if self.requests_per_minute > 0 else None,
+                'tokens_per_minute': round(self.tokens_per_minute * self.factor) if self.tokens_per_minute > 0 else None,
+                'max_requests_per_minute': self.requests_per_minute or None,
+                'max_tokens_per_minute': self.tokens_per_minute or None,
+                'rate_factor': round(self.factor, 4),
+                'throttled': self.throttled,
+                'waiting': self.waiting
+            }
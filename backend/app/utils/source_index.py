@@ -0,0 +1,264 @@
+"""
+Per-file line index shared by the API extraction helpers.
+
+Besides line lookups, the index holds the file's symbols: function and method
+definitions with their exact span, found in one pass (the syntax tree for
+Python, brace matching for C-like languages, indentation for Ruby). Snippets,
+complexity and issue detection look the span of an API's handler up instead
+of searching around the match line.
+"""
+import re
+import ast
+import os
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional
+
+_NEWLINE = re.compile('\n')
+
+BRACE_LANGUAGE_EXTENSIONS = {
+    '.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.java', '.cs', '.go', '.rs', '.php', '.kt', '.swift',
+    '.scala', '.c', '.h', '.cpp', '.hpp', '.cc', '.cxx', '.dart', '.groovy'
+}
+
+# Comments, string literals and the tokens that delimit blocks and statements
+_BRACE_TOKEN_REGEX = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`|[{};]',
+    re.DOTALL
+)
+_LEADING_TRIVIA_REGEX = re.compile(r'(?:\s+|//[^\n]*|/\*.*?\*/)*', re.DOTALL)
+
+# Block headers that open something other than a function body
+_NON_FUNCTION_HEADER_REGEX = re.compile(
+    r'^(?:else|if|for|foreach|while|switch|catch|try|do|finally|using|lock|synchronized|unsafe|fixed|checked|'
+    r'namespace|class|interface|struct|enum|record|package|import|module|object|trait|impl|extension|return|case|'
+    r'default|select|go|defer)\b'
+    r'|^(?:(?:@[\w.]+(?:\([^)]*\))?|\[[^\]]*\])\s*)*'
+    r'(?:(?:public|private|protected|internal|static|abstract|sealed|final|partial|export|default|declare|data|open)\s+)*'
+    r'(?:class|interface|struct|enum|record|namespace|trait|object|impl)\b'
+)
+# Block headers that open a function body: keyword definitions, arrow functions and method signatures
+_FUNCTION_HEADER_REGEX = re.compile(
+    r'\b(?:function|func|fn|fun|def)\b|=>\s*$'
+    r'|\)\s*(?:(?:throws|where)\b[^{]*|:\s*[\w<>\[\],.?|&\s]+|->\s*[^{]+|const|override|noexcept|async)?\s*$'
+)
+_FUNCTION_NAME_REGEXES = (
+    re.compile(r'\bfunction\s*\*?\s*(\w+)'),
+    re.compile(r'\b(?:func|fn|fun|def)\s+(?:\([^)]*\)\s*)?(\w+)'),
+    re.compile(r'(\w+)\s*[:=]\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>)'),
+    re.compile(r'(\w+)\s*(?:<[^<>()]*>)?\s*\((?:[^()]|\([^()]*\))*\)\s*(?:(?:throws|where)\b[^{]*|:\s*[^{]+|->\s*[^{]+|const|override|noexcept|async)?\s*$'),
+)
+_CALL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'return', 'function', 'func', 'fn', 'fun', 'new', 'typeof', 'await'}
+
+_INDENTED_DEFINITION_REGEXES = {
+    '.py': re.compile(r'^(\s*)(?:async\s+)?def\s+(\w+)'),
+    '.rb': re.compile(r'^(\s*)def\s+(?:self\.)?([\w?!=]+)'),
+}
+
+
+class Symbol(NamedTuple):
+    """A function or method definition with its exact span."""
+    name: str
+    start_line: int  # 0-based first line, including decorators, annotations and attributes
+    body_line: int  # 0-based line where the body opens ('def' line or the line of '{')
+    end_line: int  # 0-based line after the definition
+
+
+class SourceFileIndex:
+    """Splits a file once and resolves offsets, lines and function bodies without rescanning it."""
+
+    def __init__(self, content: str, file_path: str = ''):
+        self.content = content
+        self.file_path = file_path
+        self.lines: List[str] = content.split('\n')
+        # line_starts[i] is the character offset where line i begins
+        self.line_starts: List[int] = [0] + [m.end() for m in _NEWLINE.finditer(content)]
+        self._function_ends: Dict[int, int] = {}
+        self._function_texts: Dict[int, str] = {}
+        self._symbols: Optional[List[Symbol]] = None
+        self._header_symbols: Dict[int, Symbol] = {}
+        self._symbols_by_name: Dict[str, List[Symbol]] = {}
+
+    def line_of(self, offset: int) -> int:
+        """Get the 0-based line number containing a character offset."""
+        return bisect_right(self.line_starts, offset) - 1
+
+    @property
+    def symbols(self) -> List[Symbol]:
+        """Function and method definitions of the file, built on first use."""
+        if self._symbols is None:
+            try:
+                self._symbols = self._build_symbols()
+            except (RecursionError, ValueError):
+                self._symbols = []
+            for symbol in sorted(self._symbols, key=lambda s: s.end_line - s.start_line, reverse=True):
+                # Each header line maps to its definition; nested definitions overwrite enclosing ones
+                for line in range(symbol.start_line, symbol.body_line + 1):
+                    self._header_symbols[line] = symbol
+                self._symbols_by_name.setdefault(symbol.name, []).append(symbol)
+        return self._symbols
+
+    def symbol_at(self, line: int) -> Optional[Symbol]:
+        """Get the definition whose header (decorators, signature) contains a 0-based line."""
+        self.symbols
+        return self._header_symbols.get(line)
+
+    def symbols_named(self, name: str) -> List[Symbol]:
+        """Get the definitions with a given name, outermost first."""
+        self.symbols
+        return self._symbols_by_name.get(name, [])
+
+    def _build_symbols(self) -> List[Symbol]:
+        extension = os.path.splitext(self.file_path)[1].lower()
+        if extension == '.py':
+            symbols = self._python_symbols()
+            if symbols is not None:
+                return symbols
+        if extension in _INDENTED_DEFINITION_REGEXES:
+            return self._indented_symbols(_INDENTED_DEFINITION_REGEXES[extension], extension == '.rb')
+        if extension in BRACE_LANGUAGE_EXTENSIONS:
+            return self._brace_symbols()
+        return []
+
+    def _python_symbols(self) -> Optional[List[Symbol]]:
+        """Exact spans from the syntax tree, or None if the module does not parse."""
+        try:
+            tree = ast.parse(self.content)
+        except SyntaxError:
+            return None
+        symbols = []
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]) - 1
+                symbols.append(Symbol(node.name, start, node.lineno - 1, node.end_lineno))
+        return symbols
+
+    def _indented_symbols(self, definition_regex, closed_by_end: bool) -> List[Symbol]:
+        """Spans of definitions whose body is everything indented below them."""
+        symbols = []
+        open_definitions = []  # (indent, name, start_line, body_line, last_body_line)
+        lines = self.lines
+
+        def close(indent_limit: int, line: int):
+            while open_definitions and open_definitions[-1][0] >= indent_limit:
+                indent, name, start, body, last = open_definitions.pop()
+                end = last + 1
+                if closed_by_end and line < len(lines) and lines[line].strip() == 'end' and indent == indent_limit:
+                    end = line + 1
+                symbols.append(Symbol(name, start, body, end))
+                if open_definitions:
+                    parent = open_definitions[-1]
+                    open_definitions[-1] = parent[:4] + (max(parent[4], end - 1),)
+
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            indent = len(line) - len(line.lstrip())
+            close(indent, i)
+            if open_definitions:
+                parent = open_definitions[-1]
+                open_definitions[-1] = parent[:4] + (i,)
+            match = definition_regex.match(line)
+            if match:
+                start = i
+                while start > 0 and lines[start - 1].strip().startswith('@'):
+                    start -= 1
+                open_definitions.append((indent, match.group(2), start, i, i))
+        close(0, len(lines))
+        return symbols
+
+    def _header_start(self, boundary: int, brace: int) -> int:
+        """Offset where the statement ending at a '{' begins, skipping comments and earlier statements."""
+        start = _LEADING_TRIVIA_REGEX.match(self.content, boundary).end()
+        header = self.content[start:brace]
+        if '\n' not in header:
+            return start
+        # Without semicolons (JavaScript) the previous statement may still be in the header: start at the
+        # last line that opens outside parentheses and does not continue an annotation or expression
+        offset = start
+        depth = 0
+        previous = ''
+        for line in header.split('\n'):
+            stripped = line.strip()
+            if depth == 0 and stripped and previous and not previous.startswith(('@', '[')) \
+                    and not previous.endswith((',', '(', '=', '+', '-', '*', '/', '&', '|', '?', ':', '<', '>', '.')) \
+                    and not stripped.startswith(('.', ')', '?', ':', '=', '&', '|', '+', '-', '{')):
+                start = offset + len(line) - len(line.lstrip())
+            depth = max(0, depth + line.count('(') - line.count(')'))
+            if stripped and not stripped.startswith(('//', '/*', '*')):
+                previous = stripped
+            offset += len(line) + 1
+        return start
+
+    def _brace_symbols(self) -> List[Symbol]:
+        """Spans of function bodies matched brace by brace, ignoring braces in strings and comments."""
+        symbols = []
+        open_blocks = []  # (header_start, brace_offset, name or None)
+        boundary = 0
+        for match in _BRACE_TOKEN_REGEX.finditer(self.content):
+            token = match.group()
+            if token == '{':
+                header_start = self._header_start(boundary, match.start())
+                header = ' '.join(self.content[header_start:match.start()].split())
+                name = None
+                if header and not _NON_FUNCTION_HEADER_REGEX.search(header) and _FUNCTION_HEADER_REGEX.search(header):
+                    name = ''
+                    for name_regex in _FUNCTION_NAME_REGEXES:
+                        name_match = name_regex.search(header)
+                        if name_match and name_match.group(1) not in _CALL_KEYWORDS:
+                            name = name_match.group(1)
+                            break
+                open_blocks.append((header_start, match.start(), name))
+                boundary = match.end()
+            elif token == '}':
+                if open_blocks:
+                    header_start, brace, name = open_blocks.pop()
+                    if name is not None:
+                        symbols.append(Symbol(name, self.line_of(header_start), self.line_of(brace),
+                                              self.line_of(match.start()) + 1))
+                boundary = match.end()
+            elif token == ';':
+                boundary = match.end()
+        return symbols
+
+    def function_end(self, start_line: int) -> int:
+        """Get the first line after the function starting at start_line, or -1 if unknown and it runs to EOF.
+
+        Uses the symbol index when the line is part of a definition's header, the indentation otherwise.
+        """
+        if start_line in self._function_ends:
+            return self._function_ends[start_line]
+
+        symbol = self.symbol_at(start_line)
+        if symbol is not None:
+            self._function_ends[start_line] = symbol.end_line
+            return symbol.end_line
+
+        lines = self.lines
+        end_line = -1
+        indent_level = len(lines[start_line]) - len(lines[start_line].lstrip())
+        for i in range(start_line + 1, len(lines)):
+            line = lines[i]
+            if line.strip() == '':
+                continue
+            current_indent = len(line) - len(line.lstrip())
+            if current_indent <= indent_level:
+                end_line = i
+                break
+
+        self._function_ends[start_line] = end_line
+        return end_line
+
+    def set_function_end(self, start_line: int, end_line: int):
+        """Record a function end already known from a parser, replacing the indentation heuristic."""
+        self._function_ends[start_line] = end_line
+        self._function_texts.pop(start_line, None)
+
+    def function_text(self, start_line: int) -> str:
+        """Get the text of the function starting at start_line (at most 20 lines when its end is unknown)."""
+        if start_line not in self._function_texts:
+            end_line = self.function_end(start_line)
+            if end_line == -1:
+                end_line = min(start_line + 20, len(self.lines))
+            self._function_texts[start_line] = '\n'.join(self.lines[start_line:end_line])
+        return self._function_texts[start_line]
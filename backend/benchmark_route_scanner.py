@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass route scanner against the per-pattern regex loop.
+
+Usage: python benchmark_route_scanner.py <repository path> [ref]
+"""
+
+import sys
+import time
+from collections import defaultdict
+
+from app.services.repository_source import LocalRepositorySource
+from app.services.route_patterns import get_language, get_route_patterns, get_route_scanner
+
+
+def per_pattern_scan(content, file_path):
+    """Run every pattern over the whole file, the way extraction worked before the scanner."""
+    results = []
+    for route_pattern in get_route_patterns(file_path):
+        for match in route_pattern.regex.finditer(content):
+            results.append((route_pattern, match))
+    return results
+
+
+def load_files(path, ref=None):
+    """Load every source file the route patterns know about."""
+    source = LocalRepositorySource(path, ref)
+    paths = [f['path'] for f in source.list_files() if get_language(f['path'])]
+    contents = source.prefetch_files(paths)
+    for file_path in paths:
+        if file_path not in contents:
+            content = source.get_file_content(file_path)
+            if content is not None:
+                contents[file_path] = content
+    return contents
+
+
+def time_scan(scan, files):
+    """Scan all files and return the elapsed time, match count and per-language time."""
+    per_language = defaultdict(float)
+    total_matches = 0
+    start = time.perf_counter()
+    for file_path, content in files.items():
+        file_start = time.perf_counter()
+        total_matches += len(scan(content, file_path))
+        per_language[get_language(file_path)] += time.perf_counter() - file_start
+    return time.perf_counter() - start, total_matches, per_language
+
+
+def benchmark(path, ref=None):
+    print("⏱️  Route Scanner Benchmark")
+    print("=" * 60)
+
+    files = load_files(path, ref)
+    total_bytes = sum(len(content) for content in files.values())
+    print(f"📁 Repository: {path}")
+    print(f"📄 Files: {len(files)} ({total_bytes / (1024 * 1024):.1f} MB)")
+
+    # Both strategies must report exactly the same matches, in the same order
+    mismatches = 0
+    for file_path, content in files.items():
+        expected = [(p.regex.pattern, m.span()) for p, m in per_pattern_scan(content, file_path)]
+        actual = [(p.regex.pattern, m.span()) for p, m in get_route_scanner(file_path).scan(content)]
+        if expected != actual:
+            mismatches += 1
+            print(f"❌ Match mismatch in {file_path}")
+    if mismatches:
+        print(f"❌ {mismatches} files differ, timings are not comparable")
+        return False
+    print("✅ Scanner matches are identical to the per-pattern loop")
+
+    baseline_time, baseline_matches, baseline_languages = time_scan(per_pattern_scan, files)
+    scanner_time, scanner_matches, scanner_languages = time_scan(
+        lambda content, file_path: get_route_scanner(file_path).scan(content), files
+    )
+
+    print(f"\n🐢 Per-pattern loop: {baseline_time:.2f}s ({baseline_matches} matches)")
+    print(f"🚀 Route scanner:    {scanner_time:.2f}s ({scanner_matches} matches)")
+    print(f"📈 Speedup:          {baseline_time / scanner_time:.1f}x")
+
+    print("\nPer language:")
+    for language in sorted(baseline_languages, key=baseline_languages.get, reverse=True):
+        before = baseline_languages[language]
+        after = scanner_languages[language]
+        print(f"   {language:<12} {before:7.2f}s -> {after:6.2f}s ({before / after if after else 0:.1f}x)")
+
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    ok = benchmark(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    sys.exit(0 if ok else 1)
@@ -4,13 +4,15 @@ Shows worst APIs from performance report vs source code analysis
 """
 from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Body, Form, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from typing import Optional, List
 import logging
 import os
 import time
+import json
+import asyncio
 from dotenv import load_dotenv
 import sys
 import io
@@ -21,15 +23,18 @@ from app.models.config import Settings
 from app.models.schemas import ThresholdsConfig, AnalysisResponse
 from app.models.improvement_models import EnhancedAnalysisResponse, APIPerformanceProfile, DetailedAnalysisResult, ImplementationPlan, DiscoveredAPI
 from app.analyzers.performance_analyzer import analyze_performance
-from app.services.bedrock_service import BedrockService
+from app.services.bedrock_service import BedrockService, BedrockResponseCache, BedrockThrottlingError, bypass_response_cache
 from app.services.github_service import GitHubService
-from app.services.api_matcher import APIMatcher
+from app.services.api_matcher import APIMatcher, MatchCache
 from app.services.ai_github_analyzer import AIGitHubAnalyzer
 from app.services.dynamodb_service import DynamoDBService
+from app.services.cache_store import create_cache_store
 from app.analyzers.code_analyzer import CodeAnalyzer
 from app.utils.file_processor import process_uploaded_file
 from app.utils.validators import validate_file_type, validate_thresholds, validate_data_not_empty
 from app.utils.json_parser import parse_ai_json_response
+from app.utils.path_filter import PathFilter
+from app.utils.concurrency_limit import AdaptiveConcurrencyLimit
 from mangum import Mangum
 # Load environment variables from .env file
 load_dotenv()
@@ -152,7 +157,9 @@ async def log_requests(request, call_next):
     logger.info(f"[START] {request.method} {request.url.path} - Starting request")
     start_time = time.time()
     
-    response = await call_next(request)
+    # cache=bypass on any request regenerates Bedrock answers instead of serving cached ones
+    with bypass_response_cache(request.query_params.get('cache') == 'bypass'):
+        response = await call_next(request)
     
     process_time = time.time() - start_time
     logger.info(f"[SUCCESS] {request.method} {request.url.path} -> {response.status_code} in {process_time:.2f}s")
@@ -190,19 +197,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize services
-bedrock_service = BedrockService(settings)
-github_service = GitHubService(settings, bedrock_service=bedrock_service)
-api_matcher = APIMatcher(min_confidence_threshold=0.3)
-ai_analyzer = AIGitHubAnalyzer(settings)
-code_analyzer = CodeAnalyzer()
-
 # Initialize DynamoDB service - uses .env config or AWS by default
 dynamodb_service = DynamoDBService(
     endpoint_url=settings.dynamodb_endpoint_url,
     region_name=settings.aws_region
 )
 
+# One API index store for every GitHubService, so all endpoints reuse each other's discovery per repo@commit
+# (it also persists matches and Bedrock answers)
+api_index_store = create_cache_store(settings, dynamodb_service)
+
+# Initialize services
+bedrock_service = BedrockService(
+    settings,
+    response_cache=BedrockResponseCache(
+        api_index_store,
+        max_entries=settings.bedrock_cache_entries,
+        ttl_seconds=settings.bedrock_cache_ttl_seconds
+    ) if settings.bedrock_cache_entries > 0 else None
+)
+github_service = GitHubService(settings, bedrock_service=bedrock_service, api_index_store=api_index_store)
+api_matcher = APIMatcher(
+    min_confidence_threshold=0.3,
+    batch_min_pairs=settings.matcher_batch_min_pairs,
+    batch_top_k=settings.matcher_batch_top_k,
+    match_cache=MatchCache(
+        api_index_store,
+        max_entries=settings.matcher_cache_entries,
+        ttl_seconds=settings.matcher_cache_ttl_seconds
+    ) if settings.matcher_cache_entries > 0 else None
+)
+ai_analyzer = AIGitHubAnalyzer(settings, bedrock_service=bedrock_service)
+code_analyzer = CodeAnalyzer()
+
+
+@app.on_event("shutdown")
+async def close_bedrock_client():
+    await bedrock_service.aclose()
+
 # Global storage for latest performance analysis
 latest_performance_analysis = None
 
@@ -268,7 +300,7 @@ async def analyze_report(
         latest_performance_analysis = analysis
 
         # Generate summary using AWS Bedrock
-        summary = bedrock_service.generate_summary(analysis)
+        summary = await bedrock_service.agenerate_summary(analysis)
         
         # Check if any thresholds are provided
         any_thresholds_provided = any(t is not None for t in [
@@ -392,7 +424,7 @@ async def analyze_github_with_code_suggestions(
         # Optional: enable debug sample APIs ONLY when explicitly requested
         if request_data.get('enable_debug_samples') is True:
             github_service.set_debug_worst_apis(worst_apis)
-        discovered_apis = github_service.discover_apis_in_repository(owner, repo, selected_branch)
+        discovered_apis = await asyncio.to_thread(github_service.discover_apis_with_details, owner, repo, selected_branch)
         
         # If no APIs found, provide helpful information instead of error
         if not discovered_apis:
@@ -465,8 +497,8 @@ async def analyze_github_with_code_suggestions(
         }
         
         # Process matched APIs for code suggestions
-        if matched_apis_with_colors:
-            detailed_analysis = ai_analyzer.analyze_matched_apis(matching_result.matched_apis)
+        if matching_result.matched_apis:
+            detailed_analysis = await ai_analyzer.aanalyze_matched_apis(matching_result.matched_apis)
             
             for i, match in enumerate(matching_result.matched_apis):
                 # Create detailed match info
@@ -604,7 +636,7 @@ async def analyze_github_repository(
                     )
         
         # Discover APIs
-        discovered_apis = github_service.discover_apis_in_repository(owner, repo, selected_branch)
+        discovered_apis = await asyncio.to_thread(github_service.discover_apis_with_details, owner, repo, selected_branch)
         
         if not discovered_apis:
             raise HTTPException(
@@ -647,8 +679,8 @@ async def analyze_github_repository(
                 # Match with itself to get analysis
                 matching_result = api_matcher.match_apis([mock_performance], [api])
                 
-                if matched_apis_with_colors:
-                    detailed_analysis = ai_analyzer.analyze_matched_apis(matching_result.matched_apis)
+                if matching_result.matched_apis:
+                    detailed_analysis = await ai_analyzer.aanalyze_matched_apis(matching_result.matched_apis)
                     
                     for match in matching_result.matched_apis:
                         if hasattr(match, 'improvements') and match.improvements:
@@ -771,11 +803,11 @@ async def analyze_full_repository(
         # Discover APIs from GitHub Repository
         owner, repo = github_repo.split('/')
         selected_branch = branch
-        gh = github_service if not token else GitHubService(settings, github_token=token)
+        gh = github_service if not token else GitHubService(settings, github_token=token, api_index_store=api_index_store)
         
         # Validate branch if specified
         if selected_branch:
-            available_branches = gh.get_repository_branches(owner, repo)
+            available_branches = await asyncio.to_thread(gh.get_repository_branches, owner, repo)
             if available_branches:
                 branch_names = [b.get('name', '') for b in available_branches]
                 if selected_branch not in branch_names:
@@ -787,8 +819,9 @@ async def analyze_full_repository(
         
         # FULL REPOSITORY ANALYSIS (file-based, not API-only)
         # 1) List all files in repo, 2) analyze each code file, 3) collect per-file suggestions and diffs
+        source = gh.get_repository_source(owner, repo, selected_branch)
         try:
-            all_files = gh._get_all_files(owner, repo, '', selected_branch)
+            all_files = await asyncio.to_thread(source.list_files)
         except Exception as e:
             logger.error(f"Failed to list repository files: {e}")
             all_files = []
@@ -827,16 +860,32 @@ async def analyze_full_repository(
             'jspm.config.js', 'systemjs.config.js', 'angular.json', 'nx.json'
         }
 
+        # Compiled once per repository, together with its .gitignore / .analyzerignore rules (fetched off the event loop)
+        ignore_rules = await asyncio.to_thread(gh.load_ignore_rules, source, [f.get('path') or '' for f in all_files])
+        path_filter = PathFilter(
+            exclude_substrings=skip_patterns,
+            exclude_names=skip_file_names,
+            extensions=code_extensions,
+            ignore_rules=ignore_rules,
+            case_sensitive=True
+        )
+
         files_with_suggestions = []
         total_files_analyzed = 0
         total_files_found = len(all_files)
         files_skipped_extension = 0
         files_skipped_content = 0
         files_skipped_config = 0
+        files_skipped_ignored = 0
 
         logger.info(f"Found {total_files_found} total files in repository")
         logger.info(f"Looking for actual code files (skipping config/build files)")
 
+        # Let the source fetch large file sets in bulk (e.g. a single tarball download), off the event loop
+        code_paths = [f.get('path') for f in all_files if f.get('path') and path_filter.accepts(f['path'])]
+        prefetched_contents = await asyncio.to_thread(source.prefetch_files, code_paths)
+        candidate_paths = []
+
         for f in all_files:
             path = f.get('path')
             if not path:
@@ -847,51 +896,65 @@ async def analyze_full_repository(
                 files_skipped_config += 1
                 continue
             
-            # Check if file path matches skip patterns
-            should_skip = False
-            for pattern in skip_patterns:
-                if pattern in path:
-                    should_skip = True
-                    break
-            if should_skip:
-                files_skipped_config += 1
-                logger.debug(f"Skipping config/build file: {path}")
+            # Check ignore rules, skip patterns, config file names and supported code extensions
+            skip_reason = path_filter.skip_reason(path)
+            if skip_reason == 'ignored':
+                files_skipped_ignored += 1
+                logger.debug(f"Skipping ignored file: {path}")
                 continue
-            
-            # Check if filename is in skip list
-            filename = path.split('/')[-1] if '/' in path else path
-            if filename in skip_file_names:
+            if skip_reason == 'excluded':
                 files_skipped_config += 1
-                logger.debug(f"Skipping config file: {path}")
+                logger.debug(f"Skipping config/build file: {path}")
                 continue
-                
-            # Check if file has supported code extension
-            if not any(path.lower().endswith(ext) for ext in code_extensions):
+            if skip_reason == 'extension':
                 files_skipped_extension += 1
                 continue
                 
-            logger.info(f"Analyzing file: {path}")
-            content = gh.get_file_content(owner, repo, path, selected_branch)
+            candidate_paths.append(path)
+
+        # Files are fetched and reviewed by Bedrock concurrently. The number of files in review halves when
+        # Bedrock throttles and grows back by one per window of successful reviews; results keep listing order.
+        review_limit = AdaptiveConcurrencyLimit(settings.full_analysis_concurrency)
+        fetch_semaphore = asyncio.Semaphore(max(1, settings.discovery_fetch_concurrency))
+
+        async def review_file(path: str, bedrock_prompt: str) -> str:
+            """Get Bedrock's review of a file, retrying throttled calls with fewer files in review."""
+            for attempt in range(settings.full_analysis_throttle_retries + 1):
+                async with review_limit.aslot():
+                    epoch = review_limit.epoch
+                    try:
+                        ai_response = await bedrock_service.agenerate_summary_from_prompt(bedrock_prompt)
+                        review_limit.record_success()
+                        return ai_response
+                    except BedrockThrottlingError:
+                        review_limit.record_throttle(epoch)
+                        if attempt == settings.full_analysis_throttle_retries:
+                            raise
+                logger.warning(f"Bedrock throttled the review of {path}, retrying with {review_limit.limit} files at once")
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+        async def analyze_file(path: str) -> Optional[list]:
+            """Fetch and review one file; returns its suggestions, or None if its content was skipped."""
+            content = prefetched_contents.get(path)
+            if content is None:
+                async with fetch_semaphore:
+                    content = await asyncio.to_thread(source.get_file_content, path)
             if not content:
-                files_skipped_content += 1
                 logger.warning(f"Could not retrieve content for {path}")
-                continue
+                return None
             
             # Skip very large files (likely reports/data files, not code)
             file_size = len(content)
             if file_size > 500000:  # Skip files larger than 500KB
-                files_skipped_content += 1
                 logger.info(f"Skipping large file {path} ({file_size} bytes) - likely a report/data file, not code")
-                continue
+                return None
             
             # Skip HTML report files
             if path.endswith('.html') and file_size > 50000:  # Large HTML files are likely reports
-                files_skipped_content += 1
                 logger.info(f"Skipping large HTML file {path} ({file_size} bytes) - likely a report file")
-                continue
-                
-            total_files_analyzed += 1
-            logger.info(f"Successfully analyzed {path} (file {total_files_analyzed})")
+                return None
+            
+            logger.info(f"Analyzing file: {path}")
 
             # Fresh Bedrock-driven analysis per file
             suggestions = []
@@ -961,7 +1024,7 @@ async def analyze_full_repository(
                 
                 # Set timeout for AI analysis (120 seconds max)
                 logger.info(f"Calling AI for {path} (timeout: 120s)")
-                ai_response = bedrock_service.generate_summary_from_prompt(bedrock_prompt)
+                ai_response = await review_file(path, bedrock_prompt)
                 logger.info(f"✅ AI response received for {path} ({len(ai_response) if ai_response else 0} chars)")
                 
                 # Try to parse JSON response
@@ -1119,16 +1182,27 @@ import java.util.logging.Logger;
                     "diff": None
                 })
 
+            return suggestions
+
+        file_results = await asyncio.gather(*(analyze_file(path) for path in candidate_paths))
+        for path, suggestions in zip(candidate_paths, file_results):
+            if suggestions is None:
+                files_skipped_content += 1
+                continue
+            total_files_analyzed += 1
             if suggestions:
                 files_with_suggestions.append({
                     "file_path": path,
                     "suggestions": suggestions
                 })
+        if review_limit.throttled:
+            logger.warning(f"Bedrock throttled {review_limit.throttled} file reviews, ending with {review_limit.limit} files at once")
 
         # Log analysis summary
         logger.info(f"Analysis complete:")
         logger.info(f"  Total files found: {total_files_found}")
         logger.info(f"  Files skipped (config/build files): {files_skipped_config}")
+        logger.info(f"  Files skipped (.gitignore/.analyzerignore): {files_skipped_ignored}")
         logger.info(f"  Files skipped (wrong extension): {files_skipped_extension}")
         logger.info(f"  Files skipped (no content): {files_skipped_content}")
         logger.info(f"  Files successfully analyzed: {total_files_analyzed}")
@@ -1145,6 +1219,7 @@ import java.util.logging.Logger;
                 "total_files_analyzed": total_files_analyzed,
                 "total_files_found": total_files_found,
                 "files_skipped_config": files_skipped_config,
+                "files_skipped_ignored": files_skipped_ignored,
                 "files_skipped_extension": files_skipped_extension,
                 "files_skipped_content": files_skipped_content
             },
@@ -1231,7 +1306,7 @@ async def analyze_worst_apis_with_github(
         selected_branch = branch or request_data.get('branch', None)
         
         # Prepare GitHub service instance (use token if provided)
-        gh = github_service if not token else GitHubService(settings, github_token=token)
+        gh = github_service if not token else GitHubService(settings, github_token=token, api_index_store=api_index_store)
         
         # If branch is specified, validate it exists
         if selected_branch:
@@ -1254,7 +1329,7 @@ async def analyze_worst_apis_with_github(
             gh.set_debug_worst_apis(worst_apis)
             logger.info(f"Debug mode enabled with {len(worst_apis)} worst APIs")
         
-        discovered_apis = gh.discover_apis_in_repository(owner, repo, selected_branch)
+        discovered_apis = await asyncio.to_thread(gh.discover_apis_with_details, owner, repo, selected_branch)
         logger.info(f"Discovered {len(discovered_apis)} APIs from GitHub repository")
         
         if not discovered_apis:
@@ -1473,7 +1548,7 @@ async def analyze_worst_apis_with_github(
                     if not code_snippet or len(code_snippet.strip()) < 50:
                         logger.warning(f"Insufficient code snippet for proper analysis of {matched_api['api_endpoint']}")
                     
-                    ai_analysis_results = ai_analyzer.analyze_matched_apis([detailed_result])
+                    ai_analysis_results = await ai_analyzer.aanalyze_matched_apis([detailed_result])
                     
                     if ai_analysis_results and ai_analysis_results[0].improvements:
                         logger.info(f"Generated {len(ai_analysis_results[0].improvements)} improvements for {matched_api['api_endpoint']}")
@@ -1861,7 +1936,7 @@ async def analyze_with_github(
         # STEP 2: Discover APIs from GitHub Repository
         logger.info(f"STEP 2: Discovering APIs from GitHub repository: {github_repo}")
         owner, repo = github_repo.split('/')
-        discovered_apis = github_service.discover_apis_in_repository(owner, repo)
+        discovered_apis = await asyncio.to_thread(github_service.discover_apis_with_details, owner, repo)
         
         if not discovered_apis:
             raise HTTPException(
@@ -1878,7 +1953,7 @@ async def analyze_with_github(
         
         # STEP 3: Match Performance APIs with Source Code APIs
         logger.info("STEP 3: Matching performance APIs with source code APIs...")
-        matching_result = api_matcher.match_apis(worst_apis, discovered_apis)
+        matched_apis_with_colors = api_matcher.match_apis_with_color_coding(worst_apis, discovered_apis)
         
         # STEP 4: Generate Detailed Analysis and Comparison
         logger.info("STEP 4: Generating detailed analysis and comparison...")
@@ -1929,7 +2004,7 @@ async def analyze_with_github(
             "matching_analysis": {
                 "matching_status": "completed",
                 "matched_apis_count": len(matched_apis_with_colors),
-                "unmatched_performance_apis": len(worst_api_profiles) - len(matched_apis_with_colors),
+                "unmatched_performance_apis": len(worst_apis) - len(matched_apis_with_colors),
                 "unmatched_source_apis": len(discovered_apis) - len(matched_apis_with_colors),
                 "matches": []
             }
@@ -1961,7 +2036,7 @@ async def analyze_with_github(
             
         
         # Add unmatched APIs analysis
-        if len(worst_api_profiles) > len(matched_apis_with_colors):
+        if len(worst_apis) > len(matched_apis_with_colors):
             comparison_analysis["unmatched_performance_apis"] = [
                 {
                     "endpoint": api.endpoint,
@@ -1969,7 +2044,7 @@ async def analyze_with_github(
                     "error_rate_percent": api.error_rate_percent,
                     "throughput_rps": api.throughput_rps,
                     "reason": "No matching API found in source code"
-                } for api in worst_api_profiles if api.endpoint not in [m["api_endpoint"] for m in matched_apis_with_colors]
+                } for api in worst_apis if api.endpoint not in [m["api_endpoint"] for m in matched_apis_with_colors]
             ]
         
         if len(discovered_apis) > len(matched_apis_with_colors):
@@ -2000,7 +2075,7 @@ async def analyze_with_github(
         MATCHING & COMPARISON:
         - Matching status: completed
         - Matched APIs: {len(matched_apis_with_colors)}
-        - Unmatched performance APIs: {len(worst_api_profiles) - len(matched_apis_with_colors)}
+        - Unmatched performance APIs: {len(worst_apis) - len(matched_apis_with_colors)}
         - Unmatched source APIs: {len(discovered_apis) - len(matched_apis_with_colors)}
         
         {'✅ Found matching APIs with detailed analysis and code suggestions!' if matched_apis_with_colors else '⚠️ No matching APIs found - showing all discovered APIs for proactive analysis'}
@@ -2068,6 +2143,21 @@ async def health_check():
         "github_rate_limit": "authenticated" if github_service.is_github_available() else "unauthenticated"
     }
 
+@app.get("/bedrock/metrics")
+async def bedrock_metrics():
+    """Bedrock calls in flight, current request/token rates and response cache hit rate since startup."""
+    cache = bedrock_service.response_cache
+    return {
+        "bedrock_available": bedrock_service.bedrock_client is not None,
+        "calls": {
+            "in_flight": bedrock_service.call_limit.in_flight,
+            "waiting": bedrock_service.call_limit.waiting,
+            "max_concurrency": bedrock_service.call_limit.limit
+        },
+        "rate_limit": bedrock_service.rate_limiter.metrics(),
+        "response_cache": cache.metrics() if cache is not None else {"enabled": False}
+    }
+
 @app.get("/repository-info/{github_repo:path}")
 async def get_repository_info(
     github_repo: str,
@@ -2085,7 +2175,7 @@ async def get_repository_info(
         owner, repo = github_repo.split('/', 1)
         
         # If a token is provided, create a temporary service instance that uses it
-        gh = github_service if not token else GitHubService(settings, github_token=token)
+        gh = github_service if not token else GitHubService(settings, github_token=token, api_index_store=api_index_store)
         
         # Get repository info (not async)
         repo_info = gh.get_repository_info(owner, repo)
@@ -2126,7 +2216,7 @@ async def get_repository_branches(
         owner, repo = github_repo.split('/', 1)
         
         # Use token if provided
-        gh = github_service if not token else GitHubService(settings, github_token=token)
+        gh = github_service if not token else GitHubService(settings, github_token=token, api_index_store=api_index_store)
         # Get available branches (not async)
         branches = gh.get_repository_branches(owner, repo)
         if not branches:
@@ -2142,6 +2232,44 @@ async def get_repository_branches(
         logger.error(f"Failed to get repository branches: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get repository branches: {str(e)}")
 
+@app.get("/discover-apis-stream/{github_repo:path}")
+async def discover_apis_stream(
+    github_repo: str,
+    branch: Optional[str] = Query(None, description="Branch to scan (defaults to the repository's default branch)"),
+    token: Optional[str] = Query(None, description="GitHub token for authentication")
+):
+    """Stream discovered APIs as newline-delimited JSON while the repository is scanned, most likely route files first.
+    The final summary line lists files that were not scanned (generated, minified, over budget) with the reason."""
+    # Normalize GitHub repository URL
+    if github_repo.startswith(('https://github.com/', 'http://github.com/')):
+        github_repo = github_repo.replace('https://github.com/', '').replace('http://github.com/', '')
+    
+    if '/' not in github_repo:
+        raise HTTPException(status_code=400, detail="Invalid repository format. Use 'owner/repo' or full GitHub URL")
+    
+    owner, repo = github_repo.split('/', 1)
+    gh = github_service if not token else GitHubService(settings, github_token=token, api_index_store=api_index_store)
+    source = gh.get_repository_source(owner, repo, branch)
+    
+    def stream():
+        start_time = time.time()
+        total = 0
+        skipped_files = {}
+        for api in gh.iter_discovered_apis(source, on_file_skipped=skipped_files.__setitem__):
+            total += 1
+            # The location and any details already computed; the rest would fetch and analyse every handler
+            yield json.dumps({"type": "api", "api": api.to_index_dict()}, default=str) + "\n"
+        yield json.dumps({
+            "type": "summary",
+            "repository": github_repo,
+            "branch": branch,
+            "total_apis": total,
+            "skipped_files": skipped_files,
+            "elapsed_seconds": round(time.time() - start_time, 2)
+        }) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @app.get("/latest-performance-analysis/")
 async def get_latest_performance_analysis():
     """Get the latest performance analysis results from report analysis"""
@@ -0,0 +1,131 @@
+"""
+Test script to verify that the indexed, tiered API matcher agrees with scoring every source API
+"""
+import random
+from app.models.improvement_models import APIPerformanceProfile, DiscoveredAPI
+from app.services.api_matcher import (
+    APIMatcher, EndpointFeatures, SourceAPIIndex, STRUCTURAL_MATCH_CONFIDENCE
+)
+
+SOURCE_ENDPOINTS = [
+    'GET /api/users', 'GET /api/users/{id}', 'POST /api/users', 'DELETE /api/users/{id}',
+    'GET /api/orders', 'GET /api/orders/{order_id}/items', 'POST /api/orders', 'PUT /api/orders/{id}',
+    'GET /api/products/search', 'GET /api/products/{sku}', 'GET /health', 'POST /',
+    'GET /api/v2/reports/daily', 'GET /api/customer/profile', 'DELETE /api/customers/{id}',
+    'POST /auth/login', 'POST /auth/logout', 'GET /api/inventory/warehouses/{id}/stock',
+    'GET /admin/users', 'DELETE /admin/users/{id}', 'GET /api/payments/{id}/refunds',
+]
+
+LABELS = [
+    'GET /api/users', 'GET /api/users/42', 'Delete user', 'GET /api/order/5/items', 'Search products',
+    'healthcheck', 'POST /login', 'GET /api/reports', 'random label', 'users', 'GET /api/customers/profile',
+    'DELETE /api/users/7', 'Get Orders', 'POST /api/order', 'GET /api/products/ABC-1', 'Logout',
+    'GET /inventory/stock', 'Refund payment', 'GET /admin/user', 'PUT /api/orders/9', 'GET /',
+]
+
+WORDS = ['users', 'orders', 'items', 'products', 'search', 'reports', 'daily', 'accounts', 'invoices',
+         'payments', 'refunds', 'customers', 'profile', 'settings', 'inventory', 'stock', 'carts', 'login']
+METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+
+
+def _synthetic(seed: int, routes: int, labels: int):
+    """Random routes over a shared vocabulary, and labels copied from them with typos, ids and dropped words."""
+    rng = random.Random(seed)
+    endpoints = []
+    for _ in range(routes):
+        segments = [rng.choice(WORDS) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.4:
+            segments.insert(rng.randint(1, len(segments)), '{id}')
+        endpoints.append(f"{rng.choice(METHODS)} /{rng.choice(['api/', 'api/v1/', ''])}{'/'.join(segments)}")
+    label_list = []
+    for _ in range(labels):
+        method, path = rng.choice(endpoints).split(' ', 1)
+        segments = [str(rng.randint(1, 999)) if s == '{id}' else s for s in path.strip('/').split('/')]
+        if len(segments) > 1 and rng.random() < 0.3:
+            segments.pop(rng.randrange(len(segments)))
+        if rng.random() < 0.3:
+            i = rng.randrange(len(segments))
+            word = segments[i]
+            if len(word) > 3:
+                j = rng.randrange(len(word))
+                segments[i] = word[:j] + word[j + 1:]
+        label_list.append(f"{rng.choice(METHODS + [method] * 3)} /{'/'.join(segments)}")
+    return endpoints, label_list
+
+
+def _sources(endpoints):
+    return [DiscoveredAPI(endpoint=endpoint, file_path='app/routes.py', function_name=f"handler_{i}",
+                          framework='FastAPI', line_number=i + 1) for i, endpoint in enumerate(endpoints)]
+
+
+def _profile(label):
+    return APIPerformanceProfile(endpoint=label, avg_response_time_ms=1500, error_rate_percent=2.0,
+                                 throughput_rps=10, percentile_95_latency_ms=3000, issues=[], status='RED')
+
+
+def _best(matcher, perf, features, positions):
+    """Best (position, confidence) among positions, ties to the earlier source."""
+    best_position, best_confidence = None, 0.0
+    for position in sorted(positions):
+        confidence = matcher._calculate_total_match_confidence(perf, features[position])
+        if confidence > best_confidence:
+            best_position, best_confidence = position, confidence
+    return best_position, best_confidence
+
+
+def _compare(endpoints, labels, threshold):
+    """Compare with exhaustive scoring; returns the number of labels matched by route template and by tier."""
+    matcher = APIMatcher(min_confidence_threshold=threshold)
+    source_apis = _sources(endpoints)
+    index = SourceAPIIndex(matcher, source_apis)
+    everything = range(len(source_apis))
+    similarity = index.similarity_matrix([EndpointFeatures(matcher, label) for label in labels])
+    structural = tiered = 0
+    for i, label in enumerate(labels):
+        perf = EndpointFeatures(matcher, label)
+        expected = _best(matcher, perf, index.features, everything)
+
+        # The index candidates alone give the exhaustive best whenever it clears the threshold
+        candidates = index.candidates(perf)
+        indexed = _best(matcher, perf, index.features, everything if candidates is None else candidates)
+        if expected[1] >= threshold:
+            assert indexed == expected, f"{label!r} at {threshold}: candidates {indexed}, exhaustive {expected}"
+        else:
+            assert indexed[1] < threshold, f"{label!r} at {threshold}: candidates {indexed}, exhaustive {expected}"
+        # Batch mode keeps only the batch_top_k most similar word-related sources, which still hold matches of 0.9+
+        if expected[1] >= 0.9:
+            candidates = index.candidates(perf, similarity[i])
+            batch = _best(matcher, perf, index.features, everything if candidates is None else candidates)
+            assert batch == expected, f"{label!r} at {threshold}: batch candidates {batch}, exhaustive {expected}"
+
+        source_api, confidence = matcher._find_best_match(_profile(label), source_apis, index)
+        position = None if source_api is None else source_apis.index(source_api)
+        if (position, confidence) == expected or (confidence < threshold and expected[1] < threshold):
+            continue
+        # Documented difference 1: a label resolving to a route template matches it outright
+        if confidence == STRUCTURAL_MATCH_CONFIDENCE and position == index.routes.resolve(label):
+            structural += 1
+            continue
+        # Documented difference 2: the first tier (method, then path prefix) whose best clears the threshold wins
+        first = next(tier for tier in index.candidate_tiers(perf) if _best(matcher, perf, index.features, tier)[1] >= threshold)
+        assert (position, confidence) == _best(matcher, perf, index.features, first) and expected[0] not in first, \
+            f"{label!r} at {threshold}: matched {(position, confidence)}, exhaustive {expected}"
+        tiered += 1
+    return structural, tiered
+
+
+def test_indexed_matcher_matches_exhaustive_scoring():
+    """Index candidates give the exhaustive best match; route templates and tiers are the only differences"""
+    structural = tiered = 0
+    for threshold in (0.2, 0.3, 0.5):
+        for endpoints, labels in [(SOURCE_ENDPOINTS, LABELS), _synthetic(int(threshold * 10), 200, 150)]:
+            counts = _compare(endpoints, labels, threshold)
+            structural += counts[0]
+            tiered += counts[1]
+    # The fixtures exercise both documented differences
+    assert structural > 0 and tiered > 0, (structural, tiered)
+
+
+if __name__ == "__main__":
+    test_indexed_matcher_matches_exhaustive_scoring()
+    print("✅ Indexed matching agrees with exhaustive scoring")
@@ -0,0 +1,100 @@
+"""
+Test script to verify that a partial API discovery is not persisted as a complete index
+"""
+import os
+import tempfile
+from app.models.config import Settings
+from app.services.cache_store import SQLiteCacheStore
+from app.services.github_service import GitHubService
+from app.services.repository_source import GitHubRepositorySource, RepositorySource
+
+FILES = {
+    'app/routes/users.py': "@app.get('/users')\ndef list_users():\n    return []\n",
+    'app/routes/orders.py': "@app.get('/orders')\ndef list_orders():\n    return []\n",
+}
+
+
+class FailingSource(RepositorySource):
+    """In-memory repository at a fixed commit whose fetch of one file raises."""
+
+    def __init__(self, failing_path: str):
+        self.failing_path = failing_path
+
+    def list_files(self):
+        return [{'path': path, 'size': len(content), 'type': 'file'} for path, content in FILES.items()]
+
+    def get_file_content(self, path):
+        if path == self.failing_path:
+            raise ConnectionError("connection reset")
+        return FILES.get(path)
+
+    def describe(self):
+        return "test/failing"
+
+    def cache_key(self):
+        return "test/failing:main"
+
+    def repository_key(self):
+        return "test/failing"
+
+    def resolve_commit(self):
+        return "0" * 40
+
+
+def test_fetch_failure_is_not_persisted():
+    """A file whose fetch raises leaves the index unsaved, and the next run scans it again"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteCacheStore(os.path.join(directory, 'cache.db'))
+        settings = Settings(enable_bedrock=False, discovery_extract_workers=1)
+        service = GitHubService(settings, api_index_store=store)
+
+        apis = service.discover_apis_from_source(FailingSource('app/routes/orders.py'))
+        assert [api.file_path for api in apis] == ['app/routes/users.py']
+        assert store.get('api_index', f"test/failing@{'0' * 40}") is None
+        assert store.get('api_index_head', 'test/failing:main') is None
+
+        # Once the file can be fetched, both files are found and the index is saved
+        apis = service.discover_apis_from_source(FailingSource(None))
+        assert sorted(api.file_path for api in apis) == ['app/routes/orders.py', 'app/routes/users.py']
+        assert store.get('api_index', f"test/failing@{'0' * 40}") is not None
+
+
+class RecordingGitHubService:
+    """GitHub API stand-in whose branch head moves after the first request, recording the ref of every read."""
+    bulk_fetch_threshold = 0
+
+    def __init__(self):
+        self.heads = ['1' * 40, '2' * 40]
+        self.refs = []
+
+    def get_commit_sha(self, owner, repo, ref=None):
+        return self.heads.pop(0)
+
+    def _get_all_files(self, owner, repo, path='', branch=None):
+        self.refs.append(branch)
+        return [{'path': path, 'size': len(content), 'type': 'file'} for path, content in FILES.items()]
+
+    def get_file_content(self, owner, repo, path, branch=None):
+        self.refs.append(branch)
+        return FILES.get(path)
+
+    def fetch_files_bulk(self, owner, repo, paths, branch=None):
+        self.refs.append(branch)
+        return {}
+
+
+def test_github_source_reads_at_resolved_commit():
+    """Every read of a GitHub source uses the commit resolved once, not the moving branch"""
+    github = RecordingGitHubService()
+    source = GitHubRepositorySource(github, 'owner', 'repo', 'main')
+    source.list_files()
+    source.prefetch_files(FILES)
+    source.get_file_content('app/routes/users.py')
+    assert source.resolve_commit() == '1' * 40
+    assert github.refs == ['1' * 40] * 3
+
+
+if __name__ == "__main__":
+    test_fetch_failure_is_not_persisted()
+    test_github_source_reads_at_resolved_commit()
+    print("✅ Partial discovery is not persisted")
@@ -0,0 +1,74 @@
+"""
+Test script to verify that GitHub analysis handlers never compute API details on the event loop
+"""
+import io
+import asyncio
+from unittest import mock
+from starlette.datastructures import UploadFile
+import reportanalysis_enhanced_v2 as server
+from app.models.improvement_models import DiscoveredAPI
+
+WORST_APIS = [{'endpoint': '/users', 'avg_response_time_ms': 2500, 'error_rate_percent': 8,
+               'throughput_rps': 20, 'percentile_95_latency_ms': 4000, 'status': 'RED'}]
+
+# JMeter CSV results for /users and /orders
+JTL_CSV = "timeStamp,elapsed,label,responseCode,success,bytes,Latency\n" + "".join(
+    f"{1700000000000 + i},{2500 if i % 2 else 300},{'/users' if i % 2 else '/orders'},200,true,100,10\n"
+    for i in range(20)
+)
+
+
+def _discovered_apis(loads):
+    """Two APIs whose detail loader records, per call, whether it ran on an event loop."""
+    def loader(api):
+        try:
+            asyncio.get_running_loop()
+            loads.append((api.endpoint, True))
+        except RuntimeError:
+            loads.append((api.endpoint, False))
+        return {'code_snippet': f"def handler():  # {api.endpoint}\n    return []", 'complexity_score': 2.0}
+
+    apis = [DiscoveredAPI(endpoint=endpoint, file_path='app/routes.py', function_name='handler',
+                          framework='FastAPI', line_number=1) for endpoint in ('/users', '/orders')]
+    for api in apis:
+        api.bind_detail_loader(loader)
+    return apis
+
+
+def _run_handler(handler, **kwargs):
+    """Run a handler with discovery stubbed out; returns the (endpoint, on event loop) of each detail load."""
+    loads = []
+    with mock.patch.object(server.github_service, 'discover_apis_in_repository',
+                           side_effect=lambda *args: _discovered_apis(loads)), \
+            mock.patch.object(server.bedrock_service, 'bedrock_client', None):
+        asyncio.run(handler(**kwargs))
+    return loads
+
+
+def test_handlers_compute_details_off_the_loop():
+    """Every handler that reports API details gets them computed in its discovery thread"""
+    cases = {
+        'analyze_github_repository': (server.analyze_github_repository,
+                                      dict(github_repo='owner/repo', branch=None)),
+        'analyze_github_with_code_suggestions': (server.analyze_github_with_code_suggestions,
+                                                 dict(request_data={'worst_apis': WORST_APIS},
+                                                      github_repo='owner/repo', branch=None)),
+        'analyze_worst_apis_with_github': (server.analyze_worst_apis_with_github,
+                                           dict(request_data={'worst_apis': WORST_APIS},
+                                                github_repo='owner/repo', branch=None, token=None)),
+        'analyze_with_github': (server.analyze_with_github, dict(
+            file=UploadFile(io.BytesIO(JTL_CSV.encode('utf-8')), filename='results.csv'),
+            github_repo='owner/repo', **{name: None for name in (
+                'response_time_good_threshold', 'response_time_bad_threshold', 'error_rate_good_threshold',
+                'error_rate_bad_threshold', 'throughput_good_threshold', 'throughput_bad_threshold',
+                'percentile_95_latency_good_threshold', 'percentile_95_latency_bad_threshold')})),
+    }
+    for name, (handler, kwargs) in cases.items():
+        loads = _run_handler(handler, **kwargs)
+        assert sorted(endpoint for endpoint, _ in loads) == ['/orders', '/users'], f"{name} loaded {loads}"
+        assert not any(on_loop for _, on_loop in loads), f"{name} computed details on the event loop: {loads}"
+
+
+if __name__ == "__main__":
+    test_handlers_compute_details_off_the_loop()
+    print("✅ API details are computed off the event loop")
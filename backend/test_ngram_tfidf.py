@@ -0,0 +1,74 @@
+"""
+Test script to verify the sparse n-gram TF-IDF similarity against a dense matrix product
+"""
+import random
+from collections import Counter
+from unittest import mock
+import numpy as np
+from app.utils import ngram_tfidf
+from app.utils.ngram_tfidf import NgramTfidf, char_ngrams
+
+DOCUMENTS = ['api_users', 'api_users_{id}', 'api_orders_{id}_items', 'health', 'users_users_users', '',
+             'api_v2_reports_daily', 'auth_login', 'auth_logout', 'products_search']
+QUERIES = ['users', 'api_users_42', 'orders_items', 'zzqqxx', '', 'auth_login', 'login', 'daily_reports', 'searc']
+
+
+def _dense(vocabulary, idf, texts):
+    """Unit length TF-IDF rows of texts over a vocabulary, computed densely."""
+    matrix = np.zeros((len(texts), len(vocabulary)))
+    for row, text in enumerate(texts):
+        for gram, count in Counter(char_ngrams(text)).items():
+            if gram in vocabulary:
+                matrix[row, vocabulary[gram]] = count * idf[gram]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _reference(documents, queries):
+    """Dense X @ Y.T with the smoothed idf log((1 + n) / (1 + df)) + 1 computed from the documents."""
+    frequency = Counter(gram for document in documents for gram in set(char_ngrams(document)))
+    vocabulary = {gram: column for column, gram in enumerate(frequency)}
+    idf = {gram: np.log((1 + len(documents)) / (1 + count)) + 1.0 for gram, count in frequency.items()}
+    return _dense(vocabulary, idf, queries) @ _dense(vocabulary, idf, documents).T
+
+
+def test_similarity_matches_dense_product():
+    """Sparse similarity equals the dense product, for known, partly known and unknown queries"""
+    result = NgramTfidf(DOCUMENTS).similarity(QUERIES)
+    assert result.shape == (len(QUERIES), len(DOCUMENTS)) and result.dtype == np.float32
+    assert np.allclose(result, _reference(DOCUMENTS, QUERIES), atol=1e-6)
+    # A query equal to a document is identical to it; one without known n-grams is similar to nothing
+    assert abs(result[QUERIES.index('auth_login'), DOCUMENTS.index('auth_login')] - 1.0) < 1e-6
+    assert not result[QUERIES.index('zzqqxx')].any()
+
+    rng = random.Random(7)
+    words = ['api', 'users', 'orders', 'items', 'v1', '{id}', 'search', 'daily', 'x']
+    documents = ['_'.join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    queries = ['_'.join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(25)]
+    assert np.allclose(NgramTfidf(documents).similarity(queries), _reference(documents, queries), atol=1e-6)
+
+
+def test_similarity_blocks():
+    """Blocks of one query, of a size leaving a partial last block and of every query give the same matrix"""
+    expected = NgramTfidf(DOCUMENTS).similarity(QUERIES)
+    for block_queries in (1, 2, 4, len(QUERIES) - 1, len(QUERIES), len(QUERIES) + 1):
+        with mock.patch.object(ngram_tfidf, 'SIMILARITY_BLOCK_CELLS', block_queries * len(DOCUMENTS)):
+            assert np.array_equal(NgramTfidf(DOCUMENTS).similarity(QUERIES), expected), block_queries
+    # Fewer cells than one row still computes one query per block
+    with mock.patch.object(ngram_tfidf, 'SIMILARITY_BLOCK_CELLS', 1):
+        assert np.array_equal(NgramTfidf(DOCUMENTS).similarity(QUERIES), expected)
+
+
+def test_similarity_without_documents_or_queries():
+    """No documents, no queries or no known n-grams give an all-zero matrix of the right shape"""
+    assert NgramTfidf([]).similarity(['users', '']).shape == (2, 0)
+    assert NgramTfidf(DOCUMENTS).similarity([]).shape == (0, len(DOCUMENTS))
+    unknown = NgramTfidf(DOCUMENTS).similarity(['zzqqxx', 'qqqq'])
+    assert unknown.shape == (2, len(DOCUMENTS)) and not unknown.any()
+
+
+if __name__ == "__main__":
+    test_similarity_matches_dense_product()
+    test_similarity_blocks()
+    test_similarity_without_documents_or_queries()
+    print("✅ N-gram TF-IDF similarity matches the dense product")
@@ -0,0 +1,76 @@
+"""
+Test script to verify that compiled .gitignore / .analyzerignore rules decide paths as git does
+"""
+from app.utils.path_filter import IgnoreRules
+
+# (case, ignore files, {path: ignored})
+CASES = [
+    ("negation after a directory rule cannot re-include a file",
+     {'.gitignore': "logs/\n!logs/keep.log\n"},
+     {'logs/debug.log': True, 'logs/keep.log': True, 'src/logs/a.py': True, 'logs.py': False}),
+    ("negation after a contents rule re-includes a file",
+     {'.gitignore': "logs/*\n!logs/keep.log\n"},
+     {'logs/debug.log': True, 'logs/keep.log': False}),
+    ("the last matching rule wins",
+     {'.gitignore': "*.log\n!important.log\n"},
+     {'debug.log': True, 'important.log': False, 'sub/important.log': False, 'sub/other.log': True}),
+    ("a leading slash anchors a pattern",
+     {'.gitignore': "/build\n"},
+     {'build/app.py': True, 'build': True, 'src/build/app.py': False}),
+    ("a pattern without a slash matches at any depth",
+     {'.gitignore': "build\n*.pyc\n"},
+     {'build/app.py': True, 'src/build/app.py': True, 'a.pyc': True, 'deep/er/b.pyc': True, 'a.py': False}),
+    ("an inner slash anchors a pattern",
+     {'.gitignore': "docs/generated\n"},
+     {'docs/generated/a.py': True, 'src/docs/generated/a.py': False}),
+    ("a leading **/ matches in every directory",
+     {'.gitignore': "**/fixtures\n**/snapshots/*.json\n"},
+     {'fixtures/a.py': True, 'tests/unit/fixtures/a.py': True, 'tests/snapshots/x.json': True,
+      'snapshots/x.json': True, 'tests/snapshots/x.py': False}),
+    ("an inner /**/ matches zero or more directories",
+     {'.gitignore': "src/**/gen\n"},
+     {'src/gen/a.py': True, 'src/a/b/gen/a.py': True, 'gen/a.py': False, 'lib/src/gen/a.py': False}),
+    ("a trailing /** matches everything inside",
+     {'.gitignore': "vendor/**\n"},
+     {'vendor/a/b.py': True, 'vendor/c.py': True, 'src/vendor/c.py': False}),
+    ("a directory-only rule skips files of that name",
+     {'.gitignore': "tmp/\n"},
+     {'tmp/a.py': True, 'src/tmp/b.py': True, 'tmp': False, 'src/tmp': False}),
+    ("nested ignore files apply below their directory",
+     {'.gitignore': "*.log\n", 'services/api/.gitignore': "secrets.py\n/local\n!keep.log\n"},
+     {'services/api/secrets.py': True, 'services/api/deep/secrets.py': True, 'secrets.py': False,
+      'services/secrets.py': False, 'services/api/local/x.py': True, 'services/api/deep/local/x.py': False,
+      'services/api/keep.log': False, 'services/api/deep/keep.log': False, 'keep.log': True}),
+    (".analyzerignore rules apply after .gitignore in the same directory",
+     {'.analyzerignore': "!vendor.min.js\ndocs/\n", '.gitignore': "*.min.js\n!docs/\n"},
+     {'vendor.min.js': False, 'app.min.js': True, 'docs/index.py': True}),
+    ("deeper ignore files apply after the root .analyzerignore",
+     {'sub/.gitignore': "!schema.sql\n", '.analyzerignore': "*.sql\n"},
+     {'sub/schema.sql': False, 'schema.sql': True, 'sub/data.sql': True}),
+    ("comments, blank lines and escaped characters",
+     {'.gitignore': "# comment\n\n\\#notes.txt\n\\!bang.py\nspace\\ \n"},
+     {'#notes.txt': True, '!bang.py': True, 'space ': True, 'space': False, 'comment': False}),
+]
+
+
+def test_ignore_rules():
+    """Each rule set ignores exactly the expected paths"""
+    for case, files, expected in CASES:
+        rules = IgnoreRules.from_files(files)
+        for path, ignored in expected.items():
+            assert rules.is_ignored(path) == ignored, f"{case}: {path} should{'' if ignored else ' not'} be ignored"
+
+
+def test_rules_compile_again_after_add():
+    """Rules added after a lookup take effect on the next lookup"""
+    rules = IgnoreRules.from_files({'.gitignore': "build/\n"})
+    assert rules.is_ignored('build/a.py') and not rules.is_ignored('dist/a.py')
+    rules.add("dist/\n", 'web', 'web/.analyzerignore')
+    assert rules.is_ignored('web/dist/a.py') and not rules.is_ignored('dist/a.py')
+    assert rules.sources == ['.gitignore', 'web/.analyzerignore'] and len(rules) == 2
+
+
+if __name__ == "__main__":
+    test_ignore_rules()
+    test_rules_compile_again_after_add()
+    print("✅ Ignore rules match git's behaviour")
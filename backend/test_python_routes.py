@@ -0,0 +1,107 @@
+"""
+Test script to verify that Python route extraction resolves router and mount prefixes into full paths
+"""
+from app.services.python_routes import extract_python_routes
+
+FASTAPI_SOURCE = '''
+from fastapi import FastAPI, APIRouter
+
+API_PREFIX = "/api"
+app = FastAPI()
+users = APIRouter(prefix="/users")
+items = APIRouter(prefix=f"{API_PREFIX}/items")
+admin = APIRouter()
+v1 = APIRouter(prefix="/v1")
+
+@users.get("/")
+def list_users():
+    return []
+
+@users.get("/{user_id}")
+async def get_user(user_id: int):
+    return {}
+
+@items.post("")
+def create_item():
+    return {}
+
+@admin.delete("/cache")
+def clear_cache():
+    return None
+
+@app.get("/health")
+def health():
+    return "ok"
+
+v1.include_router(users)
+app.include_router(v1, prefix=API_PREFIX)
+app.include_router(items)
+app.include_router(admin, prefix="/admin")
+app.include_router(admin, prefix="/internal/admin")
+'''
+
+FLASK_SOURCE = '''
+from flask import Flask, Blueprint
+
+app = Flask(__name__)
+orders = Blueprint("orders", __name__, url_prefix="/orders")
+reports = Blueprint("reports", __name__, url_prefix="/reports")
+legacy = Blueprint("legacy", __name__)
+api = Blueprint("api", __name__, url_prefix="/api")
+
+@orders.route("/<int:order_id>", methods=["GET", "PUT"])
+def order(order_id):
+    return {}
+
+@reports.get("/daily")
+def daily():
+    return []
+
+def export():
+    return b""
+
+reports.add_url_rule("/export", view_func=export, methods=["POST"])
+
+@legacy.route("/ping")
+def ping():
+    return "pong"
+
+api.register_blueprint(orders)
+app.register_blueprint(api)
+app.register_blueprint(reports, url_prefix="/v2/reporting")
+app.register_blueprint(legacy, url_prefix="/legacy")
+'''
+
+
+def _routes(source):
+    return sorted((route.method, route.path, route.function_name, route.framework)
+                  for route in extract_python_routes(source))
+
+
+def test_fastapi_prefixes():
+    """APIRouter(prefix=...) and include_router(prefix=...) are joined through every mount"""
+    assert _routes(FASTAPI_SOURCE) == sorted([
+        ('GET', '/api/v1/users/', 'list_users', 'FastAPI'),
+        ('GET', '/api/v1/users/{user_id}', 'get_user', 'FastAPI'),
+        ('POST', '/api/items', 'create_item', 'FastAPI'),
+        ('DELETE', '/admin/cache', 'clear_cache', 'FastAPI'),
+        ('DELETE', '/internal/admin/cache', 'clear_cache', 'FastAPI'),
+        ('GET', '/health', 'health', 'FastAPI'),
+    ])
+
+
+def test_flask_prefixes():
+    """register_blueprint(url_prefix=...) replaces the blueprint's own prefix, nested blueprints join theirs"""
+    assert _routes(FLASK_SOURCE) == sorted([
+        ('GET', '/api/orders/<int:order_id>', 'order', 'Flask'),
+        ('PUT', '/api/orders/<int:order_id>', 'order', 'Flask'),
+        ('GET', '/v2/reporting/daily', 'daily', 'Flask'),
+        ('POST', '/v2/reporting/export', 'export', 'Flask'),
+        ('GET', '/legacy/ping', 'ping', 'Flask'),
+    ])
+
+
+if __name__ == "__main__":
+    test_fastapi_prefixes()
+    test_flask_prefixes()
+    print("✅ Python route prefixes are resolved")
@@ -0,0 +1,174 @@
+"""
+Test script to verify the adaptive Bedrock rate and concurrency limits on a fake clock
+"""
+import asyncio
+from unittest import mock
+from app.utils import rate_limiter
+from app.utils.rate_limiter import AdaptiveRateLimiter
+from app.utils.concurrency_limit import AdaptiveConcurrencyLimit
+
+
+class FakeClock:
+    """Stands in for the time module: monotonic() only moves when sleep() or advance() is called."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def test_rate_limiter_serves_tickets_in_order():
+    """A later ticket waits for the earlier ones even when the bucket could serve it"""
+    clock = FakeClock()
+    with mock.patch.object(rate_limiter, 'time', clock):
+        # One request per second, one second of burst: the bucket holds a single request
+        limiter = AdaptiveRateLimiter(60, 0, burst_seconds=1.0)
+        first, second, third = (limiter._take_ticket() for _ in range(3))
+        assert limiter.waiting == 3
+
+        assert limiter._try_take(second, 0) > 0  # capacity is there, but it is not its turn
+        assert limiter._try_take(first, 0) == 0
+        assert limiter._try_take(third, 0) == 1.0  # not its turn: the bucket needs 1s for the call ahead
+        assert limiter._try_take(second, 0) == 1.0  # its turn, the bucket refills in 1s
+        clock.advance(1.0)
+        assert limiter._try_take(third, 0) > 0
+        assert limiter._try_take(second, 0) == 0
+        clock.advance(1.0)
+        assert limiter._try_take(third, 0) == 0
+        assert limiter.waiting == 0
+
+        # A blocking acquire sleeps on the clock until the bucket refills
+        assert limiter.acquire(0) == 0
+        assert abs(clock.now - 1003.0) < 1e-9 and clock.sleeps == [1.0]
+
+
+def test_rate_limiter_skips_abandoned_tickets():
+    """Tickets of cancelled callers are skipped, whether or not it was their turn"""
+    clock = FakeClock()
+    with mock.patch.object(rate_limiter, 'time', clock):
+        limiter = AdaptiveRateLimiter(60, 0, burst_seconds=1.0)
+        assert limiter.acquire(0) == 0  # empties the bucket
+
+        async def cancel_waiters():
+            # The clock does not move, so every caller waits until cancelled
+            waiters = [asyncio.ensure_future(limiter.aacquire(0)) for _ in range(3)]
+            await asyncio.sleep(0)
+            assert limiter.waiting == 3
+            waiters[1].cancel()  # not its turn: skipped later
+            await asyncio.sleep(0)
+            assert limiter.waiting == 2 and limiter._serving == 1
+            waiters[0].cancel()  # its turn: the next live ticket is served
+            await asyncio.sleep(0)
+            assert limiter.waiting == 1 and limiter._serving == 3
+            waiters[2].cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+
+        asyncio.run(cancel_waiters())
+        assert limiter.waiting == 0 and limiter._serving == 4 and not limiter._abandoned
+        clock.advance(1.0)
+        assert limiter.acquire(0) == 0 and clock.sleeps == []
+
+
+def test_rate_limiter_halves_once_per_burst_and_recovers():
+    """Throttles of calls admitted before the last decrease do not halve again; successes recover additively"""
+    clock = FakeClock()
+    with mock.patch.object(rate_limiter, 'time', clock):
+        limiter = AdaptiveRateLimiter(600, 60000, burst_seconds=10.0, min_factor=0.1, increase_step=0.05)
+        epochs = [limiter.acquire(100) for _ in range(3)]
+        assert epochs == [0, 0, 0]
+        for epoch in epochs:
+            limiter.record_throttle(epoch)
+        assert limiter.factor == 0.5 and limiter.epoch == 1 and limiter.throttled == 3
+        # Capacity saved at the old rate is cut to the new bucket size
+        assert limiter._request_level <= 600 * 0.5 / 60 * 10 and limiter._token_level <= 60000 * 0.5 / 60 * 10
+
+        limiter.record_throttle(limiter.acquire(100))
+        assert limiter.factor == 0.25 and limiter.epoch == 2
+        for _ in range(5):
+            limiter.record_throttle(limiter.epoch)
+        assert limiter.factor == 0.1  # min_factor
+
+        for _ in range(4):
+            limiter.record_success()
+        assert abs(limiter.factor - 0.3) < 1e-9
+        metrics = limiter.metrics()
+        assert metrics['requests_per_minute'] == 180 and metrics['tokens_per_minute'] == 18000
+        for _ in range(100):
+            limiter.record_success()
+        assert limiter.factor == 1.0
+
+        # The refill follows the current rate: at half rate an empty bucket gains 5 requests per second
+        limiter.record_throttle(limiter.epoch)
+        limiter._request_level = 0.0
+        clock.advance(1.0)
+        limiter.record_success()
+        assert abs(limiter._request_level - 5.0) < 1e-9
+
+
+def test_concurrency_limit_halves_once_per_burst_and_recovers():
+    """The limit halves once per epoch, regrows by one per limit's worth of successes, and wakes waiters"""
+    limit = AdaptiveConcurrencyLimit(8, minimum=2)
+    started = [limit.epoch for _ in range(4)]
+    for epoch in started:
+        limit.record_throttle(epoch)
+    assert limit.limit == 4 and limit.epoch == 1 and limit.throttled == 4
+    limit.record_throttle(limit.epoch)
+    limit.record_throttle()  # unknown start: always halves
+    assert limit.limit == 2 and limit.epoch == 3  # minimum
+
+    limit.record_success()
+    assert limit.limit == 2
+    limit.record_success()
+    assert limit.limit == 3
+    for _ in range(2):
+        limit.record_success()
+    limit.record_throttle(0)  # started before the decreases: ignored, but resets the success count
+    limit.record_success()
+    assert limit.limit == 3 and limit.epoch == 3
+    for _ in range(2):
+        limit.record_success()
+    assert limit.limit == 4
+
+    # Waiters are served in arrival order, and a raised limit lets the next one in
+    limit = AdaptiveConcurrencyLimit(2)
+    limit.record_throttle()
+    assert limit.limit == 1
+
+    async def waiters_in_order():
+        order = []
+
+        async def call(name):
+            await limit.aacquire()
+            order.append(name)
+
+        await limit.aacquire()
+        tasks = [asyncio.ensure_future(call(name)) for name in ('first', 'second', 'third')]
+        await asyncio.sleep(0)
+        assert limit.waiting == 3
+        limit.record_success()  # limit 1 -> 2: one more slot
+        await asyncio.sleep(0)
+        limit.release()
+        await asyncio.sleep(0)
+        limit.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(waiters_in_order()) == ['first', 'second', 'third']
+    assert limit.in_flight == 2 and limit.limit == 2
+
+
+if __name__ == "__main__":
+    test_rate_limiter_serves_tickets_in_order()
+    test_rate_limiter_skips_abandoned_tickets()
+    test_rate_limiter_halves_once_per_burst_and_recovers()
+    test_concurrency_limit_halves_once_per_burst_and_recovers()
+    print("✅ Adaptive rate and concurrency limits behave deterministically")
@@ -0,0 +1,69 @@
+"""
+Test script to verify the bulk tarball fetch of a GitHub repository at its resolved commit
+"""
+import io
+import tarfile
+from unittest import mock
+from app.models.config import Settings
+from app.services import github_service as github_module
+from app.services.github_service import GitHubService
+
+SHA = 'abc123' + '0' * 34
+PREFIX = f"owner-repo-{SHA[:7]}"
+
+
+def _tarball() -> bytes:
+    """A gzip tarball laid out like GitHub's: a pax global header and one top-level directory."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz', format=tarfile.PAX_FORMAT, pax_headers={'comment': SHA}) as archive:
+        def add(name, data=None, **fields):
+            info = tarfile.TarInfo(name)
+            for field, value in fields.items():
+                setattr(info, field, value)
+            if data is None:
+                archive.addfile(info)
+            else:
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+
+        add(f"{PREFIX}/", type=tarfile.DIRTYPE)
+        add(f"{PREFIX}/app/", type=tarfile.DIRTYPE)
+        add(f"{PREFIX}/app/main.py", b"@app.get('/users')\ndef list_users():\n    return []\n")
+        add(f"{PREFIX}/README.md", b"# repo\n")
+        add(f"{PREFIX}/app/link.py", type=tarfile.SYMTYPE, linkname='main.py')
+        add(f"{PREFIX}/app/logo.png", b"\x89PNG\xff\xfe")
+    return buffer.getvalue()
+
+
+def _response(data: bytes):
+    response = mock.MagicMock()
+    response.__enter__.return_value = response
+    response.raw = io.BytesIO(data)
+    return response
+
+
+def test_tarball_fetch_at_resolved_commit():
+    """The tarball is requested at the commit, its top-level directory is stripped, and non-files are skipped"""
+    service = GitHubService(Settings(enable_bedrock=False))
+    service.bulk_fetch_threshold = 0
+    source = service.get_repository_source('owner', 'repo', 'main')
+    paths = ['app/main.py', 'README.md', 'app/link.py', 'app/logo.png', 'app/missing.py']
+
+    with mock.patch.object(service, 'get_commit_sha', return_value=SHA), \
+            mock.patch.object(github_module.requests, 'get', return_value=_response(_tarball())) as get:
+        contents = source.prefetch_files(paths)
+
+    assert get.call_args[0][0] == f"{service.base_url}/repos/owner/repo/tarball/{SHA}"
+    assert contents == {
+        'app/main.py': "@app.get('/users')\ndef list_users():\n    return []\n",
+        'README.md': "# repo\n",
+    }
+
+    with mock.patch.object(github_module.requests, 'get', return_value=_response(_tarball())):
+        members = [path for path, _ in service.iter_repository_tarball('owner', 'repo', SHA)]
+    assert members == ['app/main.py', 'README.md', 'app/logo.png']
+
+
+if __name__ == "__main__":
+    test_tarball_fetch_at_resolved_commit()
+    print("✅ Tarball fetch reads the resolved commit")